@@ -5,18 +5,9 @@ from sqlalchemy import pool
 
 from alembic import context
 
-# Variables de entorno
-import os
-from dotenv import load_dotenv
-from schoolar_control_api.database.models import Base
-
-
-load_dotenv()
-HOST = os.getenv("HOST")
-USER_NAME = os.getenv("USER_NAME")
-PASSWORD = os.getenv("PASSWORD")
-DATABASE_NAME = os.getenv("DATABASE_NAME")
-DATABASE_URL = f"mysql+mysqlconnector://{USER_NAME}:{PASSWORD}@{HOST}/{DATABASE_NAME}"
+# La URL se obtiene de la misma configuración que usa el paquete; los modelos
+# sólo se importan cuando se comparan contra la base de datos.
+from schoolar_control_api.database.connection import get_database_url
 
 
 # this is the Alembic Config object, which provides
@@ -26,18 +17,34 @@ config = context.config
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+
+def get_url() -> str:
+    """URL de la base de datos.
+
+    ``-x url=...`` tiene prioridad; ``-x dialect=mysql`` basta para generar SQL
+    en modo offline sin credenciales. En otro caso se usa
+    ``connection.get_database_url()``.
+    """
+    x_args = context.get_x_argument(as_dictionary=True)
+    if "url" in x_args:
+        return x_args["url"]
+    if "dialect" in x_args:
+        return f"{x_args['dialect']}://"
+    return get_database_url()
 
-# add your model's MetaData object here
-# for 'autogenerate' support
-# from myapp import mymodel
-# target_metadata = mymodel.Base.metadata
-target_metadata = Base.metadata
 
-# other values from the config, defined by the needs of env.py,
-# can be acquired:
-# my_important_option = config.get_main_option("my_important_option")
-# ... etc.
+def get_target_metadata():
+    """Metadatos de los modelos, sólo para ``revision --autogenerate`` y ``check``."""
+    opts = config.cmd_opts
+    if opts is not None:
+        command = opts.cmd[0].__name__ if getattr(opts, "cmd", None) else ""
+        if command != "check" and not getattr(opts, "autogenerate", False):
+            return None
+    from schoolar_control_api.database.models import Base
+
+    return Base.metadata
 
 
 def run_migrations_offline() -> None:
@@ -52,12 +59,24 @@ def run_migrations_offline() -> None:
     script output.
 
     """
-    url = DATABASE_URL
+    url = get_url()
     context.configure(
         url=url,
-        target_metadata=target_metadata,
+        target_metadata=None,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=get_target_metadata(),
+        render_as_batch=connection.dialect.name == "sqlite",
     )
 
     with context.begin_transaction():
@@ -70,9 +89,16 @@ def run_migrations_online() -> None:
     In this scenario we need to create an Engine
     and associate a connection with the context.
 
+    Si se recibe una conexión en ``config.attributes["connection"]`` (por
+    ejemplo desde ``migration_check``), se usa esa en lugar de crear un motor.
     """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+
     configuration = config.get_section(config.config_ini_section) or {}
-    configuration["sqlalchemy.url"] = DATABASE_URL
+    configuration["sqlalchemy.url"] = get_url()
     connectable = engine_from_config(
         configuration,
         prefix="sqlalchemy.",
@@ -80,10 +106,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
-
-        with context.begin_transaction():
-            context.run_migrations()
+        run_migrations(connection)
 
 
 if context.is_offline_mode():
@@ -8,7 +8,7 @@ Create Date: 2025-01-03 23:24:04.571446
 
 from typing import Sequence, Union
 
-from alembic import op
+from alembic import context, op
 import sqlalchemy as sa
 from sqlalchemy.dialects import mysql
 
@@ -19,8 +19,44 @@ branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
 
+def _academic_periods_exists() -> bool:
+    # academic_periods se creó fuera de las migraciones en las bases existentes;
+    # sólo se crea aquí en una base nueva. El SQL offline supone, como la versión
+    # original de esta revisión, que la tabla ya existe.
+    if context.is_offline_mode():
+        return True
+    return sa.inspect(op.get_bind()).has_table("academic_periods")
+
+
+def _academic_periods_is_empty() -> bool:
+    # Al revertir, la tabla sólo se elimina si no tiene datos (una base creada
+    # por estas migraciones); en otro caso sólo se revierte el tipo de columna.
+    if context.is_offline_mode():
+        return False
+    row = op.get_bind().execute(sa.text("SELECT 1 FROM academic_periods LIMIT 1"))
+    return row.first() is None
+
+
 def upgrade() -> None:
     # ### commands auto generated by Alembic - please adjust! ###
+    academic_periods_exists = _academic_periods_exists()
+    if not academic_periods_exists:
+        op.create_table(
+            "academic_periods",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("name", sa.String(length=255), nullable=False),
+            sa.Column("start_date", sa.Date(), nullable=False),
+            sa.Column("end_date", sa.Date(), nullable=False),
+            sa.Column("status", sa.String(length=50), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.CheckConstraint("end_date >= start_date", name="check_period_dates"),
+            sa.CheckConstraint(
+                "status IN ('active', 'finished', 'cancelled', 'planned')",
+                name="check_period_status",
+            ),
+            sa.PrimaryKeyConstraint("id"),
+        )
     op.create_table(
         "degrees",
         sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
@@ -298,25 +334,28 @@ def upgrade() -> None:
         ),
         sa.PrimaryKeyConstraint("id"),
     )
-    op.alter_column(
-        "academic_periods",
-        "name",
-        existing_type=mysql.VARCHAR(length=500),
-        type_=sa.String(length=255),
-        existing_nullable=False,
-    )
+    if academic_periods_exists:
+        with op.batch_alter_table("academic_periods") as batch_op:
+            batch_op.alter_column(
+                "name",
+                existing_type=mysql.VARCHAR(length=500),
+                type_=sa.String(length=255),
+                existing_nullable=False,
+            )
     # ### end Alembic commands ###
 
 
 def downgrade() -> None:
     # ### commands auto generated by Alembic - please adjust! ###
-    op.alter_column(
-        "academic_periods",
-        "name",
-        existing_type=sa.String(length=255),
-        type_=mysql.VARCHAR(length=500),
-        existing_nullable=False,
-    )
+    drop_academic_periods = _academic_periods_is_empty()
+    if not drop_academic_periods:
+        with op.batch_alter_table("academic_periods") as batch_op:
+            batch_op.alter_column(
+                "name",
+                existing_type=sa.String(length=255),
+                type_=mysql.VARCHAR(length=500),
+                existing_nullable=False,
+            )
     op.drop_table("grades")
     op.drop_table("task_submissions")
     op.drop_table("topics")
@@ -330,4 +369,6 @@ def downgrade() -> None:
     op.drop_table("students")
     op.drop_table("platforms")
     op.drop_table("degrees")
+    if drop_academic_periods:
+        op.drop_table("academic_periods")
     # ### end Alembic commands ###
@@ -0,0 +1,395 @@
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from sqlalchemy import event, insert, inspect, select, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database.connection import get_session
+from schoolar_control_api.database.models import (
+    Attendance,
+    AuditLog,
+    Base,
+    CourseEnrollment,
+    Grade,
+)
+
+logger = logging.getLogger(__name__)
+
+AUDITED_MODELS: Tuple[Type[Base], ...] = (Grade, Attendance, CourseEnrollment)
+
+_PENDING_KEY = "audit_pending"
+_ACTOR_KEY = "audit_actor_id"
+_FLUSH = object()
+_STOP = object()
+# Cada cuánto se comprueba que el hilo escritor siga vivo mientras se espera.
+_POLL_INTERVAL = 0.1
+
+
+def set_actor(session: Session, user_id: Optional[int]) -> None:
+    """Registra en la sesión el usuario al que se atribuyen los cambios."""
+    session.info[_ACTOR_KEY] = user_id
+
+
+class AuditBuffer:
+    def __init__(
+        self,
+        engine: Engine,
+        max_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        policy: str = "block",
+        put_timeout: float = 1.0,
+    ):
+        """
+        Búfer en memoria que escribe los cambios auditados por lotes desde un hilo.
+
+        Las peticiones sólo encolan los cambios; el hilo escritor los inserta en
+        ``audit_log`` con una sentencia por lote, usando su propia conexión.
+
+        :param engine: Motor con el que se escriben los lotes.
+        :param max_size: Capacidad máxima de la cola.
+        :param batch_size: Filas máximas por inserción.
+        :param flush_interval: Segundos máximos que un cambio espera en la cola.
+        :param policy: Qué hacer con la cola llena: ``block`` espera hasta
+            ``put_timeout`` segundos y luego descarta; ``drop`` descarta de inmediato.
+        :param put_timeout: Espera máxima por confirmación (no por fila) con la
+            política ``block``.
+        """
+        if policy not in ("block", "drop"):
+            raise ValueError(f"Unknown backpressure policy {policy!r}")
+        self._engine = engine
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._policy = policy
+        self._put_timeout = put_timeout
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="audit-writer", daemon=True
+        )
+        self._thread.start()
+
+    def put_many(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Encola cambios aplicando la política de contrapresión.
+
+        Con la política ``block`` todas las filas comparten un solo plazo de
+        ``put_timeout`` segundos, de modo que una confirmación con muchas filas
+        no retiene al hilo de la petición más que una con una sola. Tras
+        ``close`` los cambios se descartan.
+        """
+        deadline = time.monotonic() + self._put_timeout
+        for row in rows:
+            try:
+                if self._closed:
+                    raise queue.Full
+                if self._policy == "block":
+                    remaining = max(deadline - time.monotonic(), 0)
+                    self._queue.put(row, timeout=remaining)
+                else:
+                    self._queue.put_nowait(row)
+                with self._lock:
+                    self.enqueued += 1
+            except queue.Full:
+                with self._lock:
+                    self.dropped += 1
+                logger.warning("Audit queue is full, change dropped: %s", row)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Escribe de inmediato todo lo encolado hasta ahora y espera a que termine.
+
+        :param timeout: Espera máxima en segundos (None espera indefinidamente).
+        :return: True si la cola quedó vacía dentro del tiempo indicado; False
+            si venció el plazo o el hilo escritor ya no está vivo.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        return self._flush(deadline)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Escribe lo pendiente y detiene el hilo escritor.
+
+        Llamarlo de nuevo no tiene efecto.
+
+        :param timeout: Espera máxima en segundos para todo el cierre.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._flush(deadline)
+        if self._put_control(_STOP, deadline):
+            self._thread.join(_remaining(deadline))
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores del búfer."""
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "pending": self._queue.qsize(),
+        }
+
+    def _flush(self, deadline: Optional[float]) -> bool:
+        if not self._put_control(_FLUSH, deadline):
+            return False
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if not self._thread.is_alive():
+                    return False
+                remaining = _remaining(deadline)
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(
+                    _POLL_INTERVAL
+                    if remaining is None
+                    else min(remaining, _POLL_INTERVAL)
+                )
+        return True
+
+    def _put_control(self, item: object, deadline: Optional[float]) -> bool:
+        # La cola es acotada: se espera un lugar hasta el plazo y sólo mientras
+        # el hilo escritor pueda liberarlo.
+        while self._thread.is_alive():
+            remaining = _remaining(deadline)
+            if remaining is not None and remaining <= 0:
+                return False
+            wait = (
+                _POLL_INTERVAL if remaining is None else min(remaining, _POLL_INTERVAL)
+            )
+            try:
+                self._queue.put(item, timeout=wait)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self) -> None:
+        batch: List[Dict[str, Any]] = []
+        deadline: Optional[float] = None
+        unacked = 0
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+                unacked += 1
+            except queue.Empty:
+                # Venció el intervalo de escritura del lote en curso.
+                item = _FLUSH
+            if item is not _FLUSH and item is not _STOP:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self._flush_interval
+            if item is _FLUSH or item is _STOP or len(batch) >= self._batch_size:
+                if batch:
+                    self._write(batch)
+                    batch = []
+                    deadline = None
+                for _ in range(unacked):
+                    self._queue.task_done()
+                unacked = 0
+            if item is _STOP:
+                return
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            with self._engine.begin() as connection:
+                connection.execute(insert(AuditLog.__table__), batch)
+            with self._lock:
+                self.written += len(batch)
+        except SQLAlchemyError:
+            with self._lock:
+                self.failed += len(batch)
+            logger.exception("Error writing %d audit rows", len(batch))
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class AuditTrail:
+    def __init__(self, buffer: AuditBuffer, models: Iterable[type] = AUDITED_MODELS):
+        """
+        Captura los cambios de los modelos auditados en las sesiones adjuntas.
+
+        Los cambios se recolectan al hacer flush (y antes de las actualizaciones y
+        borrados masivos de ``Repository``), y sólo se envían al búfer cuando la
+        transacción se confirma; si se revierte, se descartan.
+
+        :param buffer: Búfer que escribe los cambios.
+        :param models: Modelos a auditar.
+        """
+        self._buffer = buffer
+        self._models = tuple(models)
+        self._tables = {m.__table__ for m in self._models}
+
+    def attach(self, session: Session) -> Session:
+        """Registra los eventos de auditoría en la sesión."""
+        event.listen(session, "after_flush", self._after_flush)
+        event.listen(session, "do_orm_execute", self._do_orm_execute)
+        event.listen(session, "after_commit", self._after_commit)
+        event.listen(session, "after_rollback", self._after_rollback)
+        return session
+
+    def _after_flush(self, session: Session, flush_context) -> None:
+        pending = session.info.setdefault(_PENDING_KEY, [])
+        actor = session.info.get(_ACTOR_KEY)
+        for action, objects in (
+            ("insert", session.new),
+            ("update", session.dirty),
+            ("delete", session.deleted),
+        ):
+            for obj in objects:
+                if not isinstance(obj, self._models):
+                    continue
+                changes = _changes(obj, action)
+                if changes:
+                    pending.append(
+                        _row(
+                            obj.__table__.name,
+                            _format_key(
+                                inspect(obj).mapper.primary_key_from_instance(obj)
+                            ),
+                            action,
+                            changes,
+                            actor,
+                        )
+                    )
+
+    def _do_orm_execute(self, state) -> Any:
+        # Las actualizaciones y borrados masivos no pasan por el flush: se leen
+        # las filas afectadas antes y después de ejecutar la sentencia.
+        if not (state.is_update or state.is_delete):
+            return None
+        mapper = state.bind_mapper
+        if mapper is None or mapper.local_table not in self._tables:
+            return None
+        table = mapper.local_table
+        pk = list(table.primary_key.columns)
+        lookup = select(*table.columns)
+        if state.statement.whereclause is not None:
+            lookup = lookup.where(state.statement.whereclause)
+        before = {
+            tuple(row._mapping[c] for c in pk): row._asdict()
+            for row in state.session.execute(lookup)
+        }
+        result = state.invoke_statement()
+        if not before:
+            return result
+        actor = state.session.info.get(_ACTOR_KEY)
+        pending = state.session.info.setdefault(_PENDING_KEY, [])
+        if state.is_delete:
+            for key, values in before.items():
+                pending.append(
+                    _row(
+                        table.name, _format_key(key), "delete", _snapshot(values), actor
+                    )
+                )
+            return result
+        after = select(*table.columns).where(tuple_(*pk).in_(list(before)))
+        for row in state.session.execute(after):
+            key = tuple(row._mapping[c] for c in pk)
+            old = before[key]
+            changes = {
+                name: [_json(old[name]), _json(value)]
+                for name, value in row._asdict().items()
+                if old[name] != value
+            }
+            if changes:
+                pending.append(
+                    _row(table.name, _format_key(key), "update", changes, actor)
+                )
+        return result
+
+    def _after_commit(self, session: Session) -> None:
+        pending = session.info.pop(_PENDING_KEY, None)
+        if pending:
+            self._buffer.put_many(pending)
+
+    def _after_rollback(self, session: Session) -> None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+@contextmanager
+def audited_session(
+    trail: AuditTrail, buffer: AuditBuffer, actor_id: Optional[int] = None
+):
+    """
+    Abre una sesión con auditoría y garantiza la escritura de sus cambios al cerrarla.
+
+    Ejemplos:
+        with audited_session(trail, buffer, actor_id=user.id) as session:
+            Repository[Grade](Grade, session).update(Grade.id == 1, values={"grade": 90})
+    """
+    with get_session() as session:
+        trail.attach(session)
+        set_actor(session, actor_id)
+        try:
+            yield session
+        finally:
+            session.close()
+            buffer.flush()
+
+
+def _changes(obj: Base, action: str) -> Dict[str, Any]:
+    state = inspect(obj)
+    if action != "update":
+        return _snapshot(
+            {
+                attr.key: state.dict[attr.key]
+                for attr in state.mapper.column_attrs
+                if attr.key in state.dict
+            }
+        )
+    changes = {}
+    for attr in state.mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        # ``deleted`` queda vacío si el valor anterior era None o no estaba cargado.
+        if history.has_changes():
+            old = history.deleted[0] if history.deleted else None
+            new = history.added[0] if history.added else None
+            changes[attr.key] = [_json(old), _json(new)]
+    return changes
+
+
+def _snapshot(values: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: _json(value) for key, value in values.items()}
+
+
+def _format_key(key: Tuple[Any, ...]) -> str:
+    return ",".join(str(value) for value in key)
+
+
+def _row(table: str, entity_id: str, action: str, changes: Dict[str, Any], actor):
+    return {
+        "table_name": table,
+        "entity_id": entity_id,
+        "action": action,
+        "changes": changes,
+        "user_id": actor,
+        "changed_at": datetime.utcnow(),
+    }
+
+
+def _json(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
@@ -1,29 +1,196 @@
 import os
+import threading
 from dotenv import load_dotenv
 from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
+from schoolar_control_api.database.session_profiler import SessionProfiler
 
-load_dotenv()
+if TYPE_CHECKING:
+    from schoolar_control_api.database.outbox import Outbox
 
-HOST = os.getenv("HOST")
-USER_NAME = os.getenv("USER_NAME")
-PASSWORD = os.getenv("PASSWORD")
-DATABASE_NAME = os.getenv("DATABASE_NAME")
+SessionLocal = sessionmaker(autoflush=False, autocommit=False)
 
-DATABASE_URL = f"mysql+mysqlconnector://{USER_NAME}:{PASSWORD}@{HOST}/{DATABASE_NAME}"
+_engine: Optional[Engine] = None
+_database_url: Optional[str] = None
+_engine_options: Dict[str, Any] = {}
+_lock = threading.Lock()
+_profiler: Optional[SessionProfiler] = None
+_outbox: Optional["Outbox"] = None
 
-engine = create_engine(DATABASE_URL)
 
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+def get_database_url() -> str:
+    """
+    Obtiene la URL de conexión a la base de datos.
+
+    Si no se configuró una URL con ``configure``, se construye a partir de las
+    variables de entorno (cargando ``.env`` en ese momento, no al importar).
+
+    :return: URL de conexión de SQLAlchemy.
+    """
+    if _database_url is not None:
+        return _database_url
+    load_dotenv()
+    host = os.getenv("HOST")
+    user_name = os.getenv("USER_NAME")
+    password = os.getenv("PASSWORD")
+    database_name = os.getenv("DATABASE_NAME")
+    return f"mysql+mysqlconnector://{user_name}:{password}@{host}/{database_name}"
+
+
+def configure(url: Optional[str] = None, **engine_options: Any) -> None:
+    """
+    Configura explícitamente la conexión antes de su primer uso.
+
+    Si ya existía un motor, se libera y se creará uno nuevo con la nueva
+    configuración en el siguiente uso.
+
+    :param url: URL de conexión (por defecto, la de las variables de entorno).
+    :param engine_options: Argumentos adicionales para ``create_engine``.
+
+    Ejemplos:
+        configure("sqlite:///local.db")
+        configure(pool_size=20, pool_pre_ping=True)
+    """
+    global _engine, _database_url, _engine_options
+    with _lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+        _database_url = url
+        _engine_options = dict(engine_options)
+
+
+def get_engine() -> Engine:
+    """
+    Obtiene el motor de la base de datos, creándolo en el primer uso.
+
+    :return: Motor de SQLAlchemy compartido por el proceso.
+    """
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                _engine = create_engine(get_database_url(), **_engine_options)
+                SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+def dispose_engine(close: bool = True) -> None:
+    """
+    Libera las conexiones del pool del motor actual, si existe.
+
+    En un proceso hijo creado con ``fork`` debe llamarse con ``close=False``
+    para descartar las conexiones heredadas sin cerrar las del proceso padre.
+
+    :param close: Si es False, las conexiones se descartan sin cerrarse.
+    """
+    with _lock:
+        if _engine is not None:
+            _engine.dispose(close=close)
+
+
+def __getattr__(name: str) -> Any:
+    # Compatibilidad con ``connection.engine`` y ``connection.DATABASE_URL``.
+    if name == "engine":
+        return get_engine()
+    if name == "DATABASE_URL":
+        return get_database_url()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def enable_profiling(
+    profiler: Optional[SessionProfiler] = None, **thresholds: Any
+) -> SessionProfiler:
+    """
+    Activa el perfilado de las sesiones abiertas con ``get_session``.
+
+    :param profiler: Perfilador a usar (por defecto, uno nuevo).
+    :param thresholds: Umbrales para un perfilador nuevo (ver ``SessionProfiler``).
+    :return: El perfilador activo, para consultar ``summary`` o ``report``.
+
+    Ejemplos:
+        profiler = enable_profiling(max_hold=0.5, max_identity_map=2000)
+        ...
+        print(profiler.report())
+    """
+    global _profiler
+    with _lock:
+        if _profiler is not None:
+            _profiler.uninstall()
+        _profiler = profiler or SessionProfiler(**thresholds)
+        _profiler.install()
+        return _profiler
+
+
+def disable_profiling() -> Optional[SessionProfiler]:
+    """
+    Desactiva el perfilado de sesiones.
+
+    :return: El perfilador que estaba activo, con sus datos, o None.
+    """
+    global _profiler
+    with _lock:
+        profiler, _profiler = _profiler, None
+        if profiler is not None:
+            profiler.uninstall()
+        return profiler
+
+
+def enable_outbox(outbox: Optional["Outbox"] = None) -> "Outbox":
+    """
+    Hace que las sesiones de ``get_session`` escriban los eventos de la bandeja
+    de salida (``outbox_events``) en la misma transacción que sus cambios.
+
+    Los modelos se importan aquí y no al importar este módulo.
+
+    :param outbox: Bandeja a usar (por defecto, una nueva con ``OUTBOX_MODELS``).
+    :return: La bandeja activa.
+
+    Ejemplos:
+        enable_outbox()
+        with get_session() as db:
+            db.add(grade)
+            db.commit()  # escribe también el evento de ``grades``
+    """
+    from schoolar_control_api.database.outbox import Outbox
+
+    global _outbox
+    with _lock:
+        if _outbox is not None:
+            _outbox.detach(SessionLocal)
+        _outbox = outbox or Outbox()
+        _outbox.attach(SessionLocal)
+        return _outbox
+
+
+def disable_outbox() -> Optional["Outbox"]:
+    """
+    Deja de escribir eventos de la bandeja de salida en ``get_session``.
+
+    :return: La bandeja que estaba activa, o None.
+    """
+    global _outbox
+    with _lock:
+        outbox, _outbox = _outbox, None
+        if outbox is not None:
+            outbox.detach(SessionLocal)
+        return outbox
 
 
 @contextmanager
 def get_session():
+    get_engine()
     db = SessionLocal()
+    profiler = _profiler
+    profile = profiler.session_opened(db) if profiler is not None else None
     try:
         yield db
     finally:
+        if profile is not None:
+            profiler.session_closed(db, profile)
         db.close()
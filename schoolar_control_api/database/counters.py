@@ -0,0 +1,185 @@
+import argparse
+from typing import Dict, Iterable, Optional, Set, Type
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from schoolar_control_api.database.models import (
+    Base,
+    Course,
+    CourseEnrollment,
+    Task,
+    TaskSubmission,
+)
+
+
+class Counter:
+    def __init__(
+        self,
+        parent: Type[Base],
+        column: str,
+        child: Type[Base],
+        foreign_key: str,
+        status: Optional[str] = None,
+    ):
+        """
+        Define una columna contador desnormalizada en ``parent`` que refleja el
+        número de filas de ``child`` que apuntan a ella.
+
+        :param parent: Modelo que almacena el contador.
+        :param column: Nombre de la columna contador en ``parent``.
+        :param child: Modelo cuyas filas se cuentan.
+        :param foreign_key: Columna de ``child`` que referencia a ``parent``.
+        :param status: Si se indica, sólo se cuentan las filas con ese estado.
+        """
+        self.parent = parent
+        self.column = column
+        self.child = child
+        self.foreign_key = foreign_key
+        self.status = status
+
+    def counts(self, entity: Base) -> bool:
+        """Indica si la entidad hija contribuye al contador."""
+        return self.status is None or entity.status == self.status
+
+    def count_expression(self) -> ColumnElement[int]:
+        """Subconsulta correlacionada con el valor real del contador."""
+        fk = getattr(self.child, self.foreign_key)
+        stmt = select(func.count()).where(fk == self.parent.id)
+        if self.status is not None:
+            stmt = stmt.where(self.child.status == self.status)
+        return stmt.scalar_subquery()
+
+    def parent_ids(
+        self, session: Session, *conditions: ColumnElement[bool]
+    ) -> Set[int]:
+        """Obtiene los ids de los padres de las filas hijas que cumplen las condiciones."""
+        fk = getattr(self.child, self.foreign_key)
+        return set(session.execute(select(fk).where(*conditions).distinct()).scalars())
+
+    def adjust(self, connection, parent_id: int, delta: int) -> None:
+        """Suma ``delta`` al contador de un padre sin alterar su ``updated_at``."""
+        table = self.parent.__table__
+        connection.execute(
+            update(table)
+            .where(table.c.id == parent_id)
+            .values(
+                {
+                    self.column: table.c[self.column] + delta,
+                    "updated_at": table.c.updated_at,
+                }
+            )
+        )
+
+    def refresh(
+        self, session: Session, parent_ids: Optional[Iterable[int]] = None
+    ) -> int:
+        """
+        Recalcula el contador a partir de las filas hijas.
+
+        :param session: Sesión de SQLAlchemy.
+        :param parent_ids: Padres a recalcular (por defecto, todos).
+        :return: Número de filas de ``parent`` actualizadas.
+        """
+        table = self.parent.__table__
+        stmt = update(table).values(
+            {self.column: self.count_expression(), "updated_at": table.c.updated_at}
+        )
+        if parent_ids is not None:
+            ids = list(parent_ids)
+            if not ids:
+                return 0
+            stmt = stmt.where(table.c.id.in_(ids))
+        return session.execute(stmt).rowcount
+
+
+COUNTERS = (
+    Counter(Course, "enrolled_count", CourseEnrollment, "course_id", status="active"),
+    Counter(Task, "submission_count", TaskSubmission, "task_id"),
+)
+
+
+def counters_for(model: type) -> tuple:
+    """Devuelve los contadores que dependen de las filas de ``model``."""
+    return tuple(c for c in COUNTERS if c.child is model)
+
+
+def affected_parents(
+    session: Session, model: type, *conditions: ColumnElement[bool]
+) -> Dict[Counter, Set[int]]:
+    """
+    Obtiene, por contador, los padres afectados por una escritura masiva sobre ``model``.
+
+    Se usa desde ``Repository.update`` y ``Repository.delete``, cuyas sentencias
+    masivas no disparan los eventos del ORM.
+    """
+    return {c: c.parent_ids(session, *conditions) for c in counters_for(model)}
+
+
+def refresh_parents(session: Session, parents: Dict[Counter, Set[int]]) -> None:
+    """Recalcula los contadores de los padres indicados."""
+    for counter, ids in parents.items():
+        counter.refresh(session, ids)
+
+
+def reconcile(session: Session) -> Dict[str, int]:
+    """
+    Recalcula todos los contadores desnormalizados y confirma la transacción.
+
+    :return: Filas actualizadas por contador (``tabla.columna``).
+    """
+    summary = {}
+    for counter in COUNTERS:
+        key = f"{counter.parent.__tablename__}.{counter.column}"
+        summary[key] = counter.refresh(session)
+    session.commit()
+    return summary
+
+
+def _previous_value(target: Base, key: str):
+    history = inspect(target).attrs[key].history
+    return history.deleted[0] if history.deleted else getattr(target, key)
+
+
+def _register(counter: Counter) -> None:
+    @event.listens_for(counter.child, "after_insert")
+    def after_insert(mapper, connection, target):
+        if counter.counts(target):
+            counter.adjust(connection, getattr(target, counter.foreign_key), 1)
+
+    @event.listens_for(counter.child, "after_delete")
+    def after_delete(mapper, connection, target):
+        if counter.counts(target):
+            counter.adjust(connection, getattr(target, counter.foreign_key), -1)
+
+    @event.listens_for(counter.child, "after_update")
+    def after_update(mapper, connection, target):
+        before_fk = _previous_value(target, counter.foreign_key)
+        before_counts = counter.counts(target)
+        if counter.status is not None:
+            before_counts = _previous_value(target, "status") == counter.status
+        after_fk = getattr(target, counter.foreign_key)
+        after_counts = counter.counts(target)
+        if (before_fk, before_counts) == (after_fk, after_counts):
+            return
+        if before_counts:
+            counter.adjust(connection, before_fk, -1)
+        if after_counts:
+            counter.adjust(connection, after_fk, 1)
+
+
+for _counter in COUNTERS:
+    _register(_counter)
+
+
+if __name__ == "__main__":
+    from schoolar_control_api.database.connection import get_session
+
+    parser = argparse.ArgumentParser(
+        description="Recalcula los contadores desnormalizados de cursos y tareas."
+    )
+    parser.parse_args()
+    with get_session() as session:
+        for name, rows in reconcile(session).items():
+            print(f"{name}: {rows} rows reconciled")
@@ -0,0 +1,137 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+@dataclass(frozen=True)
+class Step:
+    """Resultado de aplicar una revisión en una dirección."""
+
+    revision: str
+    direction: str
+    seconds: float
+    error: Optional[str] = None
+
+
+@dataclass
+class CheckReport:
+    """Resultado de recorrer todas las revisiones hacia arriba y hacia abajo."""
+
+    steps: List[Step]
+    drift: List[str]
+    leftover_tables: List[str]
+
+    @property
+    def ok(self) -> bool:
+        return (
+            all(step.error is None for step in self.steps)
+            and not self.drift
+            and not self.leftover_tables
+        )
+
+
+def alembic_config(ini_path: Optional[Path] = None) -> Config:
+    """Configuración de Alembic del proyecto, independiente del directorio actual."""
+    ini_path = ini_path or PROJECT_ROOT / "alembic.ini"
+    config = Config(str(ini_path))
+    config.set_main_option("script_location", str(ini_path.parent / "alembic"))
+    return config
+
+
+def check_migrations(url: Optional[str] = None) -> CheckReport:
+    """
+    Aplica cada revisión una por una hasta ``head``, compara el esquema con los
+    modelos, revierte cada revisión hasta ``base`` y vuelve a subir a ``head``.
+
+    :param url: Base de datos de prueba (por defecto, un archivo SQLite temporal).
+    :return: Tiempo o error de cada paso, diferencias con los modelos y tablas
+        que quedaron tras revertir todo.
+    """
+    if url is None:
+        with tempfile.TemporaryDirectory() as directory:
+            return check_migrations(f"sqlite:///{os.path.join(directory, 'check.db')}")
+
+    from schoolar_control_api.database.models import Base
+
+    config = alembic_config()
+    script = ScriptDirectory.from_config(config)
+    revisions = [rev.revision for rev in reversed(list(script.walk_revisions()))]
+    engine = create_engine(url)
+    steps: List[Step] = []
+    drift: List[str] = []
+    leftover: List[str] = []
+    try:
+        with engine.connect() as connection:
+            config.attributes["connection"] = connection
+
+            def run(target: str, revision: str, direction: str) -> bool:
+                start = time.perf_counter()
+                try:
+                    if direction == "upgrade":
+                        command.upgrade(config, target)
+                    else:
+                        command.downgrade(config, target)
+                    connection.commit()
+                except Exception as e:
+                    connection.rollback()
+                    steps.append(
+                        Step(revision, direction, time.perf_counter() - start, repr(e))
+                    )
+                    return False
+                steps.append(Step(revision, direction, time.perf_counter() - start))
+                return True
+
+            for revision in revisions:
+                if not run(revision, revision, "upgrade"):
+                    return CheckReport(steps, drift, leftover)
+            context = MigrationContext.configure(connection)
+            drift = [str(diff) for diff in compare_metadata(context, Base.metadata)]
+            for revision in reversed(revisions):
+                down = script.get_revision(revision).down_revision or "base"
+                if not run(down, revision, "downgrade"):
+                    return CheckReport(steps, drift, leftover)
+            leftover = [
+                name
+                for name in inspect(connection).get_table_names()
+                if name != "alembic_version"
+            ]
+            run("head", "head", "upgrade")
+    finally:
+        engine.dispose()
+    return CheckReport(steps, drift, leftover)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=(
+            "Verifica que cada revisión de Alembic suba y baje limpiamente "
+            "(por defecto, sobre SQLite temporal)."
+        )
+    )
+    parser.add_argument("--url", help="URL de una base de datos de prueba.")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    report = check_migrations(args.url)
+    for step in report.steps:
+        status = "ok" if step.error is None else f"FAILED: {step.error}"
+        print(f"{step.direction:<9} {step.revision:<14} {step.seconds:6.3f}s  {status}")
+    for diff in report.drift:
+        print(f"drift: {diff}")
+    for table in report.leftover_tables:
+        print(f"left after downgrade to base: {table}")
+    print(f"{'ok' if report.ok else 'FAILED'} in {time.perf_counter() - start:.2f}s")
+    sys.exit(0 if report.ok else 1)
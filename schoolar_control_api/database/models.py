@@ -1,19 +1,29 @@
-from datetime import date, datetime
+from datetime import date, datetime, time
 from typing import Any, Dict, List, Optional
-from sqlalchemy.orm import relationship, Mapped, mapped_column, DeclarativeBase
+from sqlalchemy.orm import (
+    relationship,
+    Mapped,
+    mapped_column,
+    DeclarativeBase,
+    configure_mappers,
+)
 from sqlalchemy import (
     JSON,
+    BigInteger,
     Boolean,
     Date,
     DateTime,
     Integer,
+    LargeBinary,
     Numeric,
     String,
     ForeignKey,
     Column,
     Table,
     CheckConstraint,
+    Index,
     Text,
+    Time,
 )
 
 
@@ -23,6 +33,17 @@ class Base(DeclarativeBase):
     pass
 
 
+def configure_models() -> None:
+    """
+    Configura explícitamente las relaciones de todos los modelos.
+
+    SQLAlchemy difiere esta configuración hasta la primera consulta; las
+    aplicaciones de larga duración pueden llamarla al arrancar para no pagar
+    ese costo en la primera petición, mientras que los scripts y Alembic la omiten.
+    """
+    configure_mappers()
+
+
 class Role(Base):
     """Modelo que representa un rol en el sistema."""
 
@@ -86,6 +107,7 @@ class Degree(Base):
         CheckConstraint(
             "LENGTH(description) > 3", name="check_degree_description_length"
         ),
+        Index("ix_degrees_updated_at", "updated_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -115,6 +137,7 @@ class AcademicPeriod(Base):
             "status IN ('active', 'finished', 'cancelled', 'planned')",
             name="check_period_status",
         ),
+        Index("ix_academic_periods_updated_at", "updated_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -143,6 +166,7 @@ class Teacher(Base):
         CheckConstraint(
             "LENGTH(specialization) > 3", name="check_specialization_length"
         ),
+        Index("ix_teachers_updated_at", "updated_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -171,6 +195,7 @@ class Student(Base):
     __tablename__ = "students"
     __table_args__ = (
         CheckConstraint("LENGTH(key_registration) >= 5", name="check_key_registration"),
+        Index("ix_students_updated_at", "updated_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -212,6 +237,10 @@ class Course(Base):
             "status IN ('active', 'finished', 'cancelled', 'planned')",
             name="check_course_status",
         ),
+        CheckConstraint(
+            "capacity IS NULL OR capacity > 0", name="check_course_capacity"
+        ),
+        Index("ix_courses_updated_at", "updated_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -223,6 +252,10 @@ class Course(Base):
     )
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     status: Mapped[str] = mapped_column(String(50), default="active", nullable=False)
+    capacity: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    enrolled_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
     created_at: Mapped[datetime] = mapped_column(
         nullable=False, default=datetime.utcnow
     )
@@ -246,6 +279,9 @@ class Course(Base):
     attendance_records: Mapped[List["Attendance"]] = relationship(
         back_populates="course"
     )
+    schedules: Mapped[List["CourseSchedule"]] = relationship(
+        back_populates="course", order_by="CourseSchedule.weekday"
+    )
 
     def __repr__(self) -> str:
         return f"Course(id={self.id!r}, code={self.code!r}, name={self.name!r})"
@@ -257,17 +293,30 @@ class CourseEnrollment(Base):
     __tablename__ = "course_enrollments"
     __table_args__ = (
         CheckConstraint(
-            "status IN ('active', 'dropped', 'completed', 'failed')",
+            "status IN ('active', 'waitlisted', 'dropped', 'completed', 'failed')",
             name="check_enrollment_status",
         ),
+        Index(
+            "ix_course_enrollments_waitlist", "course_id", "status", "enrollment_date"
+        ),
+        Index(
+            "ix_course_enrollments_updated_at", "updated_at", "student_id", "course_id"
+        ),
     )
 
     student_id: Mapped[int] = mapped_column(ForeignKey("students.id"), primary_key=True)
-    course_id: Mapped[int] = mapped_column(ForeignKey("courses.id"), primary_key=True)
+    # ``active_history``: el contador ``Course.enrolled_count`` necesita el valor
+    # anterior aunque la entidad esté expirada (por ejemplo, tras un commit).
+    course_id: Mapped[int] = mapped_column(
+        ForeignKey("courses.id"), primary_key=True, active_history=True
+    )
     enrollment_date: Mapped[datetime] = mapped_column(
         nullable=False, default=datetime.utcnow
     )
-    status: Mapped[str] = mapped_column(String(50), default="active", nullable=False)
+    status: Mapped[str] = mapped_column(
+        String(50), default="active", nullable=False, active_history=True
+    )
+    version: Mapped[int] = mapped_column(Integer, server_default="1", nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         nullable=False, default=datetime.utcnow
     )
@@ -275,6 +324,8 @@ class CourseEnrollment(Base):
         nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
     student: Mapped[Student] = relationship(back_populates="enrollments")
     course: Mapped[Course] = relationship(back_populates="enrollments")
 
@@ -288,6 +339,7 @@ class Unit(Base):
     __tablename__ = "units"
     __table_args__ = (
         CheckConstraint("end_date >= start_date", name="check_unit_dates"),
+        Index("ix_units_updated_at", "updated_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -318,6 +370,7 @@ class Topic(Base):
     """Modelo que representa un tema dentro de una unidad."""
 
     __tablename__ = "topics"
+    __table_args__ = (Index("ix_topics_updated_at", "updated_at", "id"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     unit_id: Mapped[int] = mapped_column(ForeignKey("units.id"), nullable=False)
@@ -341,6 +394,7 @@ class Platform(Base):
     """Modelo que representa una plataforma externa utilizada en el sistema."""
 
     __tablename__ = "platforms"
+    __table_args__ = (Index("ix_platforms_updated_at", "updated_at", "id"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
@@ -369,6 +423,7 @@ class EvaluationComponent(Base):
     __tablename__ = "evaluation_components"
     __table_args__ = (
         CheckConstraint("weight BETWEEN 0 AND 100", name="check_component_weight"),
+        Index("ix_evaluation_components_updated_at", "updated_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -401,6 +456,7 @@ class Task(Base):
     __table_args__ = (
         CheckConstraint("max_score > 0", name="check_task_score"),
         CheckConstraint("weight BETWEEN 0 AND 100", name="check_task_weight"),
+        Index("ix_tasks_updated_at", "updated_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -420,7 +476,10 @@ class Task(Base):
     weight: Mapped[float] = mapped_column(Numeric(5, 2), default=1.00, nullable=False)
     external_url: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     external_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    due_date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    due_date: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    submission_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
     created_at: Mapped[datetime] = mapped_column(
         nullable=False, default=datetime.utcnow
     )
@@ -447,10 +506,15 @@ class TaskSubmission(Base):
             "status IN ('draft', 'submitted', 'late', 'graded', 'returned')",
             name="check_submission_status",
         ),
+        Index("ix_task_submissions_task_status", "task_id", "status"),
+        Index("ix_task_submissions_updated_at", "updated_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id"), nullable=False)
+    # ``active_history``: ver ``CourseEnrollment.course_id``.
+    task_id: Mapped[int] = mapped_column(
+        ForeignKey("tasks.id"), nullable=False, active_history=True
+    )
     student_id: Mapped[int] = mapped_column(ForeignKey("students.id"), nullable=False)
     submission_url: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     submission_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -481,6 +545,7 @@ class Grade(Base):
     __tablename__ = "grades"
     __table_args__ = (
         CheckConstraint("grade BETWEEN 0 AND 100", name="check_grade_value"),
+        Index("ix_grades_updated_at", "updated_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -490,6 +555,7 @@ class Grade(Base):
     grade: Mapped[float] = mapped_column(Numeric(5, 2), nullable=False)
     feedback: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     graded_by: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    version: Mapped[int] = mapped_column(Integer, server_default="1", nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         nullable=False, default=datetime.utcnow
     )
@@ -497,6 +563,8 @@ class Grade(Base):
         nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
     submission: Mapped[TaskSubmission] = relationship(back_populates="grade")
     grader: Mapped[User] = relationship(foreign_keys=[graded_by])
 
@@ -513,6 +581,7 @@ class Attendance(Base):
             "status IN ('present', 'absent', 'late', 'excused')",
             name="check_attendance_status",
         ),
+        Index("ix_attendance_updated_at", "updated_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -533,3 +602,164 @@ class Attendance(Base):
 
     def __repr__(self) -> str:
         return f"Attendance(id={self.id!r}, student_id={self.student_id!r}, status={self.status!r})"
+
+
+class AuditLog(Base):
+    """Modelo que representa un cambio registrado sobre una entidad auditada."""
+
+    __tablename__ = "audit_log"
+    __table_args__ = (
+        CheckConstraint(
+            "action IN ('insert', 'update', 'delete')",
+            name="check_audit_action",
+        ),
+        Index("ix_audit_log_entity", "table_name", "entity_id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    table_name: Mapped[str] = mapped_column(String(100), nullable=False)
+    entity_id: Mapped[str] = mapped_column(String(100), nullable=False)
+    action: Mapped[str] = mapped_column(String(10), nullable=False)
+    changes: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    user_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("users.id"), nullable=True
+    )
+    changed_at: Mapped[datetime] = mapped_column(nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow
+    )
+
+    user: Mapped[Optional[User]] = relationship(foreign_keys=[user_id])
+
+    def __repr__(self) -> str:
+        return f"AuditLog(id={self.id!r}, table_name={self.table_name!r}, entity_id={self.entity_id!r}, action={self.action!r})"
+
+
+class Room(Base):
+    """Modelo que representa un aula en la que se imparten cursos."""
+
+    __tablename__ = "rooms"
+    __table_args__ = (
+        CheckConstraint("capacity > 0", name="check_room_capacity"),
+        Index("ix_rooms_updated_at", "updated_at", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
+    building: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    capacity: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+
+    schedules: Mapped[List["CourseSchedule"]] = relationship(back_populates="room")
+
+    def __repr__(self) -> str:
+        return f"Room(id={self.id!r}, name={self.name!r}, capacity={self.capacity!r})"
+
+
+class CourseSchedule(Base):
+    """Modelo que representa una sesión semanal de un curso en un aula."""
+
+    __tablename__ = "course_schedules"
+    __table_args__ = (
+        CheckConstraint("weekday BETWEEN 0 AND 6", name="check_schedule_weekday"),
+        CheckConstraint("end_time > start_time", name="check_schedule_times"),
+        Index("ix_course_schedules_room_weekday", "room_id", "weekday"),
+        Index("ix_course_schedules_updated_at", "updated_at", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    course_id: Mapped[int] = mapped_column(ForeignKey("courses.id"), nullable=False)
+    room_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("rooms.id"), nullable=True
+    )
+    weekday: Mapped[int] = mapped_column(Integer, nullable=False)
+    start_time: Mapped[time] = mapped_column(Time, nullable=False)
+    end_time: Mapped[time] = mapped_column(Time, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    course: Mapped[Course] = relationship(back_populates="schedules")
+    room: Mapped[Optional[Room]] = relationship(back_populates="schedules")
+
+    def __repr__(self) -> str:
+        return f"CourseSchedule(id={self.id!r}, course_id={self.course_id!r}, weekday={self.weekday!r}, start_time={self.start_time!r})"
+
+
+class OutboxEvent(Base):
+    """Modelo que representa un cambio pendiente de publicar a sistemas externos."""
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        CheckConstraint(
+            "action IN ('insert', 'update', 'delete')",
+            name="check_outbox_action",
+        ),
+        Index("ix_outbox_events_pending", "published_at", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    topic: Mapped[str] = mapped_column(String(100), nullable=False)
+    aggregate_id: Mapped[str] = mapped_column(String(100), nullable=False)
+    action: Mapped[str] = mapped_column(String(10), nullable=False)
+    payload: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow
+    )
+    published_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+
+    def __repr__(self) -> str:
+        return f"OutboxEvent(id={self.id!r}, topic={self.topic!r}, aggregate_id={self.aggregate_id!r}, action={self.action!r})"
+
+
+class SubmissionSignature(Base):
+    """Modelo que representa la firma MinHash del texto de una entrega."""
+
+    __tablename__ = "submission_signatures"
+
+    submission_id: Mapped[int] = mapped_column(
+        ForeignKey("task_submissions.id", ondelete="CASCADE"), primary_key=True
+    )
+    task_id: Mapped[int] = mapped_column(
+        ForeignKey("tasks.id"), nullable=False, index=True
+    )
+    num_perm: Mapped[int] = mapped_column(Integer, nullable=False)
+    signature: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow
+    )
+    # ``updated_at`` de la entrega leído junto con el texto firmado y SHA-256
+    # de ese texto: la firma está al día mientras la entrega no cambie.
+    source_updated_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    text_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"SubmissionSignature(submission_id={self.submission_id!r}, task_id={self.task_id!r})"
+
+
+class SubmissionLshBucket(Base):
+    """Modelo que representa la cubeta LSH de una banda de la firma de una entrega."""
+
+    __tablename__ = "submission_lsh_buckets"
+    __table_args__ = (Index("ix_submission_lsh_buckets_submission", "submission_id"),)
+
+    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id"), primary_key=True)
+    band: Mapped[int] = mapped_column(Integer, primary_key=True)
+    bucket: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    submission_id: Mapped[int] = mapped_column(
+        ForeignKey("task_submissions.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    def __repr__(self) -> str:
+        return f"SubmissionLshBucket(task_id={self.task_id!r}, band={self.band!r}, submission_id={self.submission_id!r})"
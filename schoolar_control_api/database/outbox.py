@@ -0,0 +1,482 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import threading
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
+
+from sqlalchemy import delete, event, func, insert, inspect, select, tuple_, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import InvalidRequestError, SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+
+from schoolar_control_api.database.models import (
+    Base,
+    CourseEnrollment,
+    Grade,
+    OutboxEvent,
+)
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_MODELS: Tuple[Type[Base], ...] = (Grade, CourseEnrollment)
+
+_outbox = OutboxEvent.__table__
+
+
+class Outbox:
+    def __init__(self, models: Iterable[type] = OUTBOX_MODELS):
+        """
+        Escribe en ``outbox_events`` los cambios de los modelos publicados, en
+        la misma transacción que los produce.
+
+        Captura los cambios hechos con el ORM (al hacer flush) y las
+        sentencias ``insert``/``update``/``delete`` ejecutadas con la sesión,
+        incluidas las de ``Repository`` y ``EnrollmentService``. Si la
+        transacción se revierte, los eventos se revierten con ella.
+
+        El tema de cada evento es el nombre de la tabla; la carga útil contiene
+        la fila (``row``) y, en las actualizaciones, las columnas modificadas
+        (``changed``).
+
+        Las sesiones de ``connection.get_session`` la usan tras
+        ``connection.enable_outbox()``; ``attach`` sirve para sesiones o
+        ``sessionmaker`` creadas aparte.
+
+        Una inserción de varias filas cuyas claves no pueden recuperarse (en
+        MySQL, sin ``RETURNING``, las de columnas autoincrementales) hace fallar
+        la transacción en lugar de perder sus eventos.
+
+        :param models: Modelos cuyos cambios se publican.
+        """
+        self._models = tuple(models)
+        self._tables = {m.__table__.name: m.__table__ for m in self._models}
+
+    def attach(
+        self, session: Union[Session, sessionmaker]
+    ) -> Union[Session, sessionmaker]:
+        """
+        Registra los eventos de la bandeja de salida en una sesión o en todas
+        las que cree una ``sessionmaker``.
+        """
+        event.listen(session, "after_flush", self._after_flush)
+        event.listen(session, "do_orm_execute", self._do_orm_execute)
+        return session
+
+    def detach(self, session: Union[Session, sessionmaker]) -> None:
+        """Quita los eventos registrados con ``attach``."""
+        event.remove(session, "after_flush", self._after_flush)
+        event.remove(session, "do_orm_execute", self._do_orm_execute)
+
+    def _after_flush(self, session: Session, flush_context) -> None:
+        events = []
+        for action, objects in (
+            ("insert", session.new),
+            ("update", session.dirty),
+            ("delete", session.deleted),
+        ):
+            for obj in objects:
+                if not isinstance(obj, self._models):
+                    continue
+                state = inspect(obj)
+                row = {
+                    attr.key: state.dict[attr.key]
+                    for attr in state.mapper.column_attrs
+                    if attr.key in state.dict
+                }
+                changed = None
+                if action == "update":
+                    changed = [
+                        attr.key
+                        for attr in state.mapper.column_attrs
+                        if state.attrs[attr.key].history.has_changes()
+                    ]
+                    if not changed:
+                        continue
+                key = state.mapper.primary_key_from_instance(obj)
+                events.append(_event(obj.__table__.name, key, action, row, changed))
+        if events:
+            session.connection().execute(insert(_outbox), events)
+
+    def _do_orm_execute(self, state) -> Any:
+        if not (state.is_insert or state.is_update or state.is_delete):
+            return None
+        mapper = state.bind_mapper
+        table = (
+            mapper.local_table
+            if mapper is not None
+            else getattr(state.statement, "table", None)
+        )
+        table = self._tables.get(getattr(table, "name", None))
+        if table is None:
+            return None
+        pk = list(table.primary_key.columns)
+        if state.is_insert:
+            result, keys = self._insert(state, pk)
+            if keys is None or any(None in key for key in keys):
+                # Sin las claves no se pueden escribir los eventos: la
+                # transacción no debe confirmarse sin ellos.
+                raise InvalidRequestError(
+                    f"Cannot capture rows inserted into {table.name} for the "
+                    "outbox; insert them one by one or through the ORM"
+                )
+            self._record(state.session, table, pk, keys, "insert")
+            return result
+        lookup = select(*table.columns)
+        if state.statement.whereclause is not None:
+            lookup = lookup.where(state.statement.whereclause)
+        before = {
+            tuple(row._mapping[c] for c in pk): row._asdict()
+            for row in state.session.execute(lookup)
+        }
+        result = state.invoke_statement()
+        if not before:
+            return result
+        if state.is_delete:
+            events = [
+                _event(table.name, key, "delete", values)
+                for key, values in before.items()
+            ]
+            state.session.execute(insert(_outbox), events)
+            return result
+        self._record(state.session, table, pk, list(before), "update", before)
+        return result
+
+    def _insert(self, state, pk: list) -> Tuple[Any, Optional[List[tuple]]]:
+        stmt = state.statement
+        bulk = state.bind_mapper is not None and isinstance(state.parameters, list)
+        if stmt.returning_column_descriptions or (
+            bulk and not state.session.get_bind().dialect.insert_executemany_returning
+        ):
+            # Con RETURNING propio, o una inserción masiva del ORM en un motor
+            # sin RETURNING (MySQL), las claves no se pueden pedir.
+            result = state.invoke_statement()
+            try:
+                return result, [tuple(key) for key in result.inserted_primary_key_rows]
+            except (SQLAlchemyError, AttributeError):
+                return result, None
+        if bulk:
+            # La inserción masiva del ORM no expone las claves: se piden con
+            # RETURNING y se devuelven como filas del resultado.
+            frozen = state.invoke_statement(statement=stmt.returning(*pk)).freeze()
+            return frozen(), [tuple(row) for row in frozen()]
+        result = state.invoke_statement(statement=stmt.return_defaults())
+        return result, [tuple(key) for key in result.inserted_primary_key_rows]
+
+    def _record(
+        self,
+        session: Session,
+        table,
+        pk: list,
+        keys: List[tuple],
+        action: str,
+        before: Optional[Dict[tuple, Dict[str, Any]]] = None,
+    ) -> None:
+        if not keys:
+            return
+        events = []
+        stmt = select(*table.columns).where(tuple_(*pk).in_(keys))
+        for row in session.execute(stmt):
+            key = tuple(row._mapping[c] for c in pk)
+            values = row._asdict()
+            changed = None
+            if before is not None:
+                old = before[key]
+                changed = [name for name, value in values.items() if old[name] != value]
+                if not changed:
+                    continue
+            events.append(_event(table.name, key, action, values, changed))
+        if events:
+            session.execute(insert(_outbox), events)
+
+
+@dataclass(frozen=True)
+class OutboxMessage:
+    """Evento entregado a los destinos; ``id`` permite descartar duplicados."""
+
+    id: int
+    topic: str
+    aggregate_id: str
+    action: str
+    payload: Optional[Dict[str, Any]]
+    created_at: datetime
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["created_at"] = self.created_at.isoformat()
+        return data
+
+
+class Sink:
+    """Destino de los eventos. ``send`` debe lanzar una excepción si no los aceptó."""
+
+    def send(self, messages: Sequence[OutboxMessage]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class FileSink(Sink):
+    def __init__(self, path: str):
+        """
+        Escribe cada evento como una línea JSON al final de un archivo.
+
+        :param path: Ruta del archivo.
+        """
+        self._file = open(path, "a", encoding="utf-8")
+
+    def send(self, messages: Sequence[OutboxMessage]) -> None:
+        for message in messages:
+            self._file.write(json.dumps(message.to_dict(), ensure_ascii=False))
+            self._file.write("\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class QueueSink(Sink):
+    def __init__(self, target: Optional["queue.Queue[OutboxMessage]"] = None):
+        """
+        Entrega los eventos a una cola en memoria (útil en pruebas).
+
+        :param target: Cola destino (por defecto, una nueva sin límite).
+        """
+        self.queue = target if target is not None else queue.Queue()
+
+    def send(self, messages: Sequence[OutboxMessage]) -> None:
+        for message in messages:
+            self.queue.put(message)
+
+
+class OutboxRelay:
+    def __init__(
+        self,
+        engine: Engine,
+        sinks: Sequence[Sink],
+        batch_size: int = 100,
+        max_attempts: int = 10,
+        poll_interval: float = 1.0,
+    ):
+        """
+        Publica los eventos pendientes de ``outbox_events`` por lotes.
+
+        Cada lote se bloquea (``FOR UPDATE SKIP LOCKED`` en MySQL, de modo que
+        varios relevos pueden convivir), se envía a todos los destinos y sólo
+        entonces se marca como publicado. La entrega es al menos una vez: si el
+        proceso cae entre el envío y la confirmación, el lote se reenvía.
+
+        Un lote que falla se reintenta en la siguiente pasada; los eventos que
+        alcanzan ``max_attempts`` se dejan en la tabla con ``last_error`` para
+        revisarlos y dejan de bloquear a los posteriores.
+
+        :param engine: Motor de la base de datos.
+        :param sinks: Destinos de los eventos.
+        :param batch_size: Eventos máximos por lote.
+        :param max_attempts: Envíos fallidos tras los que se omite un evento.
+        :param poll_interval: Segundos entre consultas cuando no hay pendientes.
+
+        Ejemplos:
+            relay = OutboxRelay(get_engine(), [FileSink("events.jsonl")])
+            relay.start()
+            ...
+            relay.stop()
+        """
+        if not sinks:
+            raise ValueError("At least one sink is required")
+        self._engine = engine
+        self._sinks = list(sinks)
+        self._batch_size = batch_size
+        self._max_attempts = max_attempts
+        self._poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.published = 0
+        self.failed = 0
+
+    def publish_batch(self) -> int:
+        """
+        Envía un lote de eventos pendientes.
+
+        :return: Eventos publicados (0 si no había pendientes o el envío falló).
+        """
+        stmt = (
+            select(_outbox)
+            .where(
+                _outbox.c.published_at.is_(None),
+                _outbox.c.attempts < self._max_attempts,
+            )
+            .order_by(_outbox.c.id)
+            .limit(self._batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        try:
+            with self._engine.begin() as connection:
+                rows = connection.execute(stmt).all()
+                if not rows:
+                    return 0
+                ids = [row.id for row in rows]
+                messages = [
+                    OutboxMessage(
+                        id=row.id,
+                        topic=row.topic,
+                        aggregate_id=row.aggregate_id,
+                        action=row.action,
+                        payload=row.payload,
+                        created_at=row.created_at,
+                    )
+                    for row in rows
+                ]
+                try:
+                    for sink in self._sinks:
+                        sink.send(messages)
+                except Exception as e:
+                    self.failed += len(ids)
+                    logger.exception("Error publishing %d outbox events", len(ids))
+                    connection.execute(
+                        update(_outbox)
+                        .where(_outbox.c.id.in_(ids))
+                        .values(attempts=_outbox.c.attempts + 1, last_error=repr(e))
+                    )
+                    return 0
+                connection.execute(
+                    update(_outbox)
+                    .where(_outbox.c.id.in_(ids))
+                    .values(published_at=datetime.utcnow())
+                )
+        except SQLAlchemyError:
+            logger.exception("Error reading outbox events")
+            return 0
+        self.published += len(ids)
+        return len(ids)
+
+    def drain(self) -> int:
+        """
+        Publica lotes hasta que no queden pendientes o falle un envío.
+
+        :return: Eventos publicados.
+        """
+        total = 0
+        while not self._stop.is_set():
+            published = self.publish_batch()
+            if not published:
+                break
+            total += published
+        return total
+
+    def start(self) -> None:
+        """Publica en un hilo en segundo plano hasta llamar a ``stop``."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="outbox-relay", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Detiene el hilo tras el lote en curso y cierra los destinos."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        for sink in self._sinks:
+            sink.close()
+
+    def purge(self, older_than: timedelta = timedelta(days=7)) -> int:
+        """
+        Elimina los eventos publicados hace más de ``older_than``.
+
+        :return: Eventos eliminados.
+        """
+        cutoff = datetime.utcnow() - older_than
+        with self._engine.begin() as connection:
+            return connection.execute(
+                delete(_outbox).where(_outbox.c.published_at < cutoff)
+            ).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores del relevo y eventos que siguen en la tabla."""
+        pending = _outbox.c.published_at.is_(None)
+        live = _outbox.c.attempts < self._max_attempts
+        with self._engine.connect() as connection:
+            waiting = connection.execute(
+                select(func.count()).where(pending, live)
+            ).scalar()
+            dead = connection.execute(
+                select(func.count()).where(pending, ~live)
+            ).scalar()
+        return {
+            "published": self.published,
+            "failed": self.failed,
+            "pending": waiting,
+            "dead": dead,
+        }
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if not self.drain():
+                self._stop.wait(self._poll_interval)
+
+
+def _event(
+    table: str,
+    key: Tuple[Any, ...],
+    action: str,
+    row: Dict[str, Any],
+    changed: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {"row": {k: _json(v) for k, v in row.items()}}
+    if changed is not None:
+        payload["changed"] = changed
+    return {
+        "topic": table,
+        "aggregate_id": ",".join(str(value) for value in key),
+        "action": action,
+        "payload": payload,
+        "attempts": 0,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def _json(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+if __name__ == "__main__":
+    from schoolar_control_api.database.connection import get_engine
+
+    parser = argparse.ArgumentParser(
+        description="Publica los eventos de outbox_events en un archivo JSON Lines."
+    )
+    parser.add_argument("--file", required=True, help="Archivo destino.")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Sigue publicando hasta interrumpirlo (por defecto, vacía y termina).",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    relay = OutboxRelay(get_engine(), [FileSink(args.file)], args.batch_size)
+    try:
+        if args.follow:
+            relay.start()
+            threading.Event().wait()
+        else:
+            print(f"published {relay.drain()} events")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        relay.stop()
+        print(relay.stats())
@@ -0,0 +1,198 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, Optional, Tuple
+
+from sqlalchemy.engine import Result
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.loading import merge_frozen_result
+from sqlalchemy.sql import Executable
+from sqlalchemy.sql.util import find_tables
+
+
+class QueryCache:
+    def __init__(self, max_entries: int = 1000, default_ttl: float = 60.0):
+        """
+        Caché de resultados de consultas, compartida entre repositorios y sesiones.
+
+        La clave es el SQL compilado más sus parámetros. Cada entrada recuerda
+        las tablas que lee la consulta y se descarta cuando ``Repository``
+        escribe en alguna de ellas, cuando vence su TTL o por LRU.
+
+        Los resultados se guardan serializados y se fusionan en la sesión que
+        los pide sin emitir SQL (``merge_frozen_result`` con ``load=False``),
+        de modo que cada sesión recibe sus propias instancias.
+
+        :param max_entries: Número máximo de consultas en caché.
+        :param default_ttl: Segundos de vida por defecto de cada entrada.
+        """
+        self._max_entries = max_entries
+        self._default_ttl = default_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, FrozenSet[str], bytes]]" = (
+            OrderedDict()
+        )
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Proporción de lecturas servidas desde la caché."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def execute(
+        self,
+        session: Session,
+        stmt: Executable,
+        ttl: Optional[float] = None,
+        namespace: str = "",
+    ) -> Result:
+        """
+        Ejecuta una consulta ORM a través de la caché.
+
+        :param session: Sesión en la que se devuelven las entidades.
+        :param stmt: Sentencia ``select``.
+        :param ttl: Segundos de vida de la entrada (por defecto, ``default_ttl``;
+            0 omite la caché).
+        :param namespace: Espacio de claves y tablas, por ejemplo el id de un
+            shard: la misma consulta en otro espacio es otra entrada.
+        :return: Resultado equivalente a ``session.execute(stmt)``.
+        """
+        ttl = self._default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return session.execute(stmt)
+        key = (namespace, self._key(session, stmt))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                payload = entry[2]
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                payload = None
+                tables = frozenset(
+                    _scoped(namespace, table.name) for table in find_tables(stmt)
+                )
+                generations = self._snapshot(tables)
+        if payload is not None:
+            frozen = pickle.loads(payload)
+            return merge_frozen_result(session, stmt, frozen, load=False)()
+        frozen = session.execute(stmt).freeze()
+        payload = pickle.dumps(frozen)
+        with self._lock:
+            # Si otra escritura invalidó alguna tabla mientras se ejecutaba la
+            # consulta, el resultado puede estar desactualizado: no se guarda.
+            if self._snapshot(tables) == generations:
+                self._entries[key] = (time.monotonic() + ttl, tables, payload)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return frozen()
+
+    def invalidate(self, tables: Iterable[str], namespace: str = "") -> int:
+        """
+        Descarta las entradas que leen alguna de las tablas indicadas.
+
+        :param tables: Nombres de las tablas modificadas.
+        :param namespace: Espacio de las entradas a descartar.
+        :return: Número de entradas descartadas.
+        """
+        tables = {_scoped(namespace, table) for table in tables}
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            stale = [
+                key
+                for key, (_, entry_tables, _) in self._entries.items()
+                if not entry_tables.isdisjoint(tables)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def scoped(self, namespace: str) -> "ScopedCache":
+        """
+        Devuelve una vista de la caché con su propio espacio de claves.
+
+        Ejemplos:
+            cache = QueryCache()
+            repo = Repository(Student, db, cache=cache.scoped("norte"))
+        """
+        return ScopedCache(self, namespace)
+
+    def clear(self) -> None:
+        """Descarta todas las entradas."""
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de la caché."""
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "size": size,
+        }
+
+    def _snapshot(self, tables: FrozenSet[str]) -> Tuple[int, ...]:
+        return (self._epoch, *(self._generations.get(t, 0) for t in sorted(tables)))
+
+    @staticmethod
+    def _key(session: Session, stmt: Executable) -> Hashable:
+        compiled = stmt.compile(dialect=session.get_bind().dialect)
+        return str(compiled), _freeze(compiled.params)
+
+
+class ScopedCache:
+    def __init__(self, cache: QueryCache, namespace: str):
+        """
+        Vista de una ``QueryCache`` con su propio espacio de claves y tablas.
+
+        Las entradas y los límites (``max_entries``, LRU) se comparten con la
+        caché original, pero una consulta idéntica en otro espacio no devuelve
+        estas filas y las invalidaciones no cruzan de un espacio a otro.
+
+        :param cache: Caché compartida.
+        :param namespace: Nombre del espacio, por ejemplo el id de un shard.
+        """
+        self.cache = cache
+        self.namespace = namespace
+
+    def execute(
+        self, session: Session, stmt: Executable, ttl: Optional[float] = None
+    ) -> Result:
+        """Ejecuta una consulta ORM a través de la caché, en este espacio."""
+        return self.cache.execute(session, stmt, ttl, namespace=self.namespace)
+
+    def invalidate(self, tables: Iterable[str]) -> int:
+        """Descarta las entradas de este espacio que leen las tablas indicadas."""
+        return self.cache.invalidate(tables, namespace=self.namespace)
+
+
+def _scoped(namespace: str, table: str) -> str:
+    return f"{namespace}:{table}" if namespace else table
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(v) for v in value)
+    return value
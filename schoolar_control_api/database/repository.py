@@ -1,28 +1,133 @@
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import wraps
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import Pool
 from sqlalchemy.sql.elements import ColumnElement
-from sqlalchemy import select, update, delete, and_
-from typing import TypeVar, Generic, Type, Optional, List
+from sqlalchemy import select, update, delete, and_, or_, event, exists, inspect, text
+from typing import Any, TypeVar, Generic, Type, Optional, List, Dict, Tuple, Union
+
+from schoolar_control_api.database import counters
+from schoolar_control_api.database.query_cache import QueryCache, ScopedCache
+from schoolar_control_api.database.resilience import (
+    CONNECTION,
+    DEADLOCK,
+    INTEGRITY,
+    TIMEOUT,
+    CircuitBreaker,
+    RetryPolicy,
+    classify,
+    default_breaker,
+)
 
 T = TypeVar("T")
 
+# (updated_at, *clave primaria) de la última fila entregada por ``changes_since``.
+Watermark = Tuple[Any, ...]
+
+# Marca en ``Connection.info`` de las conexiones con ``innodb_lock_wait_timeout``
+# modificado.
+_LOCK_TIMEOUT_KEY = "repository_lock_wait_timeout"
+
+
+def _resilient(operation: str):
+    """Aplica el circuito y la política de reintentos a una operación del repositorio."""
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            attempt = 1
+            last_error = None
+            while True:
+                if not self._breaker.allow():
+                    if last_error is not None:
+                        raise last_error
+                    raise CircuitOpenError(
+                        f"Database unavailable, {operation} on "
+                        f"{self._model.__name__} rejected"
+                    )
+                try:
+                    result = method(self, *args, **kwargs)
+                except RepositoryError as e:
+                    if e.kind in (CONNECTION, TIMEOUT):
+                        self._breaker.record_failure()
+                    else:
+                        self._breaker.record_success()
+                    if e.kind is None or not self._retry_policy.should_retry(
+                        operation, e.kind, attempt
+                    ):
+                        raise
+                    last_error = e
+                    self._rollback_quietly()
+                    time.sleep(self._retry_policy.delay(attempt))
+                    attempt += 1
+                    continue
+                except Exception:
+                    self._breaker.record_success()
+                    raise
+                self._breaker.record_success()
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+@dataclass
+class ChangeBatch(Generic[T]):
+    """Página de cambios de ``Repository.changes_since``."""
+
+    items: List[T]
+    watermark: Optional[Watermark]
+    has_more: bool
+
 
 class Repository(Generic[T]):
-    def __init__(self, model: Type[T], session: Session):
+    def __init__(
+        self,
+        model: Type[T],
+        session: Session,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: CircuitBreaker = default_breaker,
+        timeouts: Optional[Dict[str, float]] = None,
+        cache: Optional[Union[QueryCache, ScopedCache]] = None,
+    ):
         """
         Inicializa el repositorio con el modelo y la sesión de la base de datos.
 
         :param model: Clase del modelo de SQLAlchemy.
         :param session: Sesión de SQLAlchemy.
+        :param retry_policy: Reintentos ante errores transitorios (por defecto,
+            ``RetryPolicy()``; ``NO_RETRY`` los desactiva).
+        :param breaker: Circuito compartido que falla rápido si la base de datos
+            no responde.
+        :param timeouts: Segundos máximos por operación (``get``, ``get_all``,
+            ``changes_since``, ``update``, ``delete``). En MySQL las lecturas usan
+            ``MAX_EXECUTION_TIME`` y las escrituras ``innodb_lock_wait_timeout``.
+        :param cache: Caché de resultados para ``get`` y ``get_all`` (opcional).
+            Las escrituras hechas por el repositorio invalidan las tablas afectadas.
         """
         self._model = model
         self._session = session
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._breaker = breaker
+        self._timeouts = timeouts or {}
+        self._cache = cache
 
-    def get(self, *conditions: ColumnElement[bool]) -> Optional[T]:
+    @_resilient("get")
+    def get(
+        self, *conditions: ColumnElement[bool], cache_ttl: Optional[float] = None
+    ) -> Optional[T]:
         """
         Recupera una única entidad basada en las condiciones proporcionadas.
 
         :param conditions: Condiciones para filtrar la consulta.
+        :param cache_ttl: Segundos de vida del resultado en la caché del
+            repositorio (por defecto, el de la caché; 0 la omite).
         :return: La entidad encontrada o None si no se encuentra ninguna.
         :raises RepositoryError: Si ocurre un error durante la consulta.
 
@@ -35,16 +140,21 @@ class Repository(Generic[T]):
         """
         try:
             stmt = select(self._model).where(and_(*conditions))
-            result = self._session.execute(stmt)
+            result = self._execute(self._with_timeout(stmt, "get"), cache_ttl)
             return result.scalar_one_or_none()
         except SQLAlchemyError as e:
-            raise RepositoryError(f"Error retrieving {self._model.__name__}") from e
+            raise _translate_error(e, f"Error retrieving {self._model.__name__}") from e
 
-    def get_all(self, *conditions: ColumnElement[bool]) -> List[T]:
+    @_resilient("get_all")
+    def get_all(
+        self, *conditions: ColumnElement[bool], cache_ttl: Optional[float] = None
+    ) -> List[T]:
         """
         Recupera todas las entidades que coincidan con las condiciones proporcionadas.
 
         :param conditions: Condiciones para filtrar la consulta (opcional).
+        :param cache_ttl: Segundos de vida del resultado en la caché del
+            repositorio (por defecto, el de la caché; 0 la omite).
         :return: Lista de entidades encontradas.
         :raises RepositoryError: Si ocurre un error durante la consulta.
 
@@ -54,22 +164,98 @@ class Repository(Generic[T]):
 
             # Obtener todos con condiciones
             repo.get_all(User.is_active == True)
+
+            # Cachear un filtro costoso durante cinco minutos
+            repo = Repository(Student, session, cache=dashboard_cache)
+            repo.get_all(Student.degree_id == 1, cache_ttl=300)
         """
         try:
             stmt = select(self._model)
             if conditions:
                 stmt = stmt.where(and_(*conditions))
-            result = self._session.execute(stmt)
+            result = self._execute(self._with_timeout(stmt, "get_all"), cache_ttl)
             return list(result.scalars().all())
         except SQLAlchemyError as e:
-            raise RepositoryError(f"Error retrieving all {self._model.__name__}") from e
+            raise _translate_error(
+                e, f"Error retrieving all {self._model.__name__}"
+            ) from e
+
+    @_resilient("changes_since")
+    def changes_since(
+        self,
+        *conditions: ColumnElement[bool],
+        watermark: Optional[Watermark] = None,
+        limit: int = 500,
+        settle: float = 0.0,
+    ) -> ChangeBatch[T]:
+        """
+        Recupera las entidades modificadas después de una marca, en orden
+        estable ``(updated_at, clave primaria)``.
 
+        La consulta recorre el índice ``ix_<tabla>_updated_at`` desde la marca,
+        sin ``OFFSET``, y la marca devuelta sirve para pedir la página siguiente.
+        ``updated_at`` lo asigna la aplicación al escribir, de modo que una
+        transacción larga puede confirmar filas con una fecha anterior a la de
+        otras ya leídas; ``settle`` excluye los cambios de los últimos segundos
+        para no saltarse esas filas. Las eliminaciones físicas no aparecen; los
+        borrados lógicos sí, porque actualizan ``deleted_at`` y ``updated_at``.
+
+        :param conditions: Condiciones adicionales para filtrar la consulta.
+        :param watermark: Marca devuelta por la llamada anterior (None lee desde
+            el principio).
+        :param limit: Número máximo de entidades por página.
+        :param settle: Segundos de cambios recientes que todavía no se entregan.
+        :return: Entidades modificadas, nueva marca (la anterior si no hubo
+            cambios) e indicador de si quedan más páginas.
+        :raises RepositoryError: Si el modelo no tiene ``updated_at`` o si ocurre
+            un error durante la consulta.
+
+        Ejemplos:
+            # Sincronizar una réplica de calificaciones de forma incremental
+            batch = repo.changes_since(watermark=saved_watermark)
+            while True:
+                replica.upsert(batch.items)
+                saved_watermark = batch.watermark
+                if not batch.has_more:
+                    break
+                batch = repo.changes_since(watermark=saved_watermark)
+        """
+        columns = self._change_feed_columns()
+        try:
+            stmt = select(self._model)
+            if conditions:
+                stmt = stmt.where(and_(*conditions))
+            if watermark is not None:
+                stmt = stmt.where(_after(columns, tuple(watermark)))
+            if settle > 0:
+                cutoff = datetime.utcnow() - timedelta(seconds=settle)
+                stmt = stmt.where(columns[0] <= cutoff)
+            stmt = stmt.order_by(*columns).limit(limit + 1)
+            result = self._session.execute(self._with_timeout(stmt, "changes_since"))
+            items = list(result.scalars().all())
+        except SQLAlchemyError as e:
+            raise _translate_error(
+                e, f"Error reading changes of {self._model.__name__}"
+            ) from e
+        has_more = len(items) > limit
+        del items[limit:]
+        if items:
+            mapper = inspect(self._model)
+            watermark = tuple(
+                getattr(items[-1], mapper.get_property_by_column(c).key)
+                for c in columns
+            )
+        return ChangeBatch(items, watermark, has_more)
+
+    @_resilient("add")
     def add(self, entity: T) -> T:
         """
         Añade una nueva entidad a la base de datos.
 
         :param entity: La entidad a añadir.
         :return: La entidad añadida con sus datos actualizados.
+        :raises VersionConflictError: Si la entidad ya existía y otra transacción
+            la modificó desde que se leyó.
         :raises RepositoryError: Si ocurre un error durante la inserción.
 
         Ejemplos:
@@ -79,19 +265,32 @@ class Repository(Generic[T]):
         try:
             self._session.add(entity)
             self._session.commit()
+            self._invalidate_cache()
             self._session.flush()
             self._session.refresh(entity)
             return entity
         except SQLAlchemyError as e:
-            raise RepositoryError(f"Error adding {self._model.__name__}") from e
+            raise _translate_error(e, f"Error adding {self._model.__name__}") from e
 
-    def update(self, *conditions: ColumnElement[bool], values: dict) -> Optional[T]:
+    @_resilient("update")
+    def update(
+        self,
+        *conditions: ColumnElement[bool],
+        values: dict,
+        expected_version: Optional[int] = None,
+    ) -> Optional[T]:
         """
         Actualiza las entidades que coincidan con las condiciones proporcionadas con los valores dados.
 
+        En los modelos con columna de versión (``version_id_col``) cada
+        actualización incrementa la versión; si se indica ``expected_version``,
+        la versión se compara en el propio WHERE, sin bloquear filas.
+
         :param conditions: Condiciones para filtrar las entidades a actualizar.
         :param values: Diccionario con los valores a actualizar.
+        :param expected_version: Versión que el llamador leyó de la entidad.
         :return: La entidad actualizada o None si no se encuentra ninguna.
+        :raises VersionConflictError: Si la entidad existe pero su versión cambió.
         :raises RepositoryError: Si ocurre un error durante la actualización.
 
         Ejemplos:
@@ -104,9 +303,26 @@ class Repository(Generic[T]):
                 User.is_active == True,
                 values={"status": "updated"}
             )
+
+            # Actualizar comprobando la versión leída
+            repo.update(
+                Grade.id == 1, values={"grade": 95}, expected_version=grade.version
+            )
         """
         try:
+            self._apply_lock_timeout("update")
             combined_conditions = and_(*conditions)
+            version_key = self._version_key()
+            if version_key is not None:
+                version = getattr(self._model, version_key)
+                values = {version_key: version + 1, **values}
+                if expected_version is not None:
+                    combined_conditions = and_(
+                        combined_conditions, version == expected_version
+                    )
+            parents = counters.affected_parents(
+                self._session, self._model, combined_conditions
+            )
             stmt = (
                 update(self._model)
                 .where(combined_conditions)
@@ -114,11 +330,27 @@ class Repository(Generic[T]):
                 .returning(self._model)
             )
             result = self._session.execute(stmt)
+            entity = result.scalar_one_or_none()
+            if entity is None and expected_version is not None:
+                found = self._session.execute(
+                    select(exists().where(and_(*conditions)))
+                ).scalar()
+                if found:
+                    self._session.rollback()
+                    raise VersionConflictError(
+                        f"{self._model.__name__} was modified by another transaction"
+                    )
+            for counter, parent_ids in parents.items():
+                if entity is not None:
+                    parent_ids.add(getattr(entity, counter.foreign_key))
+            counters.refresh_parents(self._session, parents)
             self._session.commit()
-            return result.scalar_one_or_none()
+            self._invalidate_cache()
+            return entity
         except SQLAlchemyError as e:
-            raise RepositoryError(f"Error updating {self._model.__name__}") from e
+            raise _translate_error(e, f"Error updating {self._model.__name__}") from e
 
+    @_resilient("delete")
     def delete(self, *conditions: ColumnElement[bool]) -> bool:
         """
         Elimina las entidades que coincidan con las condiciones proporcionadas.
@@ -135,15 +367,167 @@ class Repository(Generic[T]):
             repo.delete(User.email == "test@example.com", User.is_active == False)
         """
         try:
-            stmt = delete(self._model).where(and_(*conditions))
+            self._apply_lock_timeout("delete")
+            combined_conditions = and_(*conditions)
+            parents = counters.affected_parents(
+                self._session, self._model, combined_conditions
+            )
+            stmt = delete(self._model).where(combined_conditions)
             result = self._session.execute(stmt)
+            counters.refresh_parents(self._session, parents)
             self._session.commit()
+            self._invalidate_cache()
             return result.rowcount > 0
         except SQLAlchemyError as e:
-            raise RepositoryError(f"Error deleting {self._model.__name__}") from e
+            raise _translate_error(e, f"Error deleting {self._model.__name__}") from e
+
+    def _execute(self, stmt, cache_ttl: Optional[float]):
+        if self._cache is None:
+            return self._session.execute(stmt)
+        return self._cache.execute(self._session, stmt, cache_ttl)
+
+    def _invalidate_cache(self) -> None:
+        if self._cache is None:
+            return
+        # Los contadores desnormalizados también cambian las tablas padre.
+        tables = {self._model.__table__.name}
+        tables.update(
+            c.parent.__table__.name for c in counters.counters_for(self._model)
+        )
+        self._cache.invalidate(tables)
+
+    def _with_timeout(self, stmt, operation: str):
+        seconds = self._timeouts.get(operation)
+        if seconds is None:
+            return stmt
+        return stmt.prefix_with(
+            f"/*+ MAX_EXECUTION_TIME({int(seconds * 1000)}) */", dialect="mysql"
+        )
+
+    def _apply_lock_timeout(self, operation: str) -> None:
+        seconds = self._timeouts.get(operation)
+        if seconds is None or self._session.get_bind().dialect.name != "mysql":
+            return
+        # La variable es de la conexión, no de la transacción: se restablece al
+        # devolverla al pool (``_reset_lock_timeout``).
+        connection = self._session.connection()
+        connection.info[_LOCK_TIMEOUT_KEY] = True
+        connection.execute(
+            text("SET SESSION innodb_lock_wait_timeout = :seconds"),
+            {"seconds": max(1, math.ceil(seconds))},
+        )
+
+    def _rollback_quietly(self) -> None:
+        try:
+            self._session.rollback()
+        except SQLAlchemyError:
+            pass
+
+    def _change_feed_columns(self) -> list:
+        table = self._model.__table__
+        if "updated_at" not in table.c:
+            raise RepositoryError(
+                f"{self._model.__name__} has no updated_at column to read changes"
+            )
+        return [table.c.updated_at, *table.primary_key.columns]
+
+    def _version_key(self) -> Optional[str]:
+        mapper = inspect(self._model)
+        if mapper.version_id_col is None:
+            return None
+        return mapper.get_property_by_column(mapper.version_id_col).key
+
+
+def _after(columns: list, watermark: Watermark) -> ColumnElement[bool]:
+    """Condición ``(c1, c2, ...) > (v1, v2, ...)`` escrita con OR/AND para usar el índice."""
+    first, *rest = columns
+    if not rest:
+        return first > watermark[0]
+    return or_(
+        first > watermark[0],
+        and_(first == watermark[0], _after(rest, watermark[1:])),
+    )
+
+
+@event.listens_for(Pool, "checkin")
+def _reset_lock_timeout(dbapi_connection, connection_record) -> None:
+    if not connection_record.info.pop(_LOCK_TIMEOUT_KEY, False):
+        return
+    if dbapi_connection is None:
+        return
+    try:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SET SESSION innodb_lock_wait_timeout = DEFAULT")
+        finally:
+            cursor.close()
+    except Exception as e:
+        # Mejor descartar la conexión que reutilizarla con la espera modificada.
+        connection_record.invalidate(e)
+
+
+def _translate_error(error: SQLAlchemyError, message: str) -> "RepositoryError":
+    if isinstance(error, StaleDataError):
+        # El flush de una entidad con ``version_id_col`` encontró otra versión.
+        return VersionConflictError(f"{message}: modified by another transaction")
+    kind = classify(error)
+    error_class = _ERROR_CLASSES.get(kind, RepositoryError)
+    return error_class(f"{message}: {kind}", kind=kind)
 
 
 class RepositoryError(Exception):
     """Excepción base para errores del repositorio"""
 
+    def __init__(self, message: str = "", kind: Optional[str] = None):
+        super().__init__(message)
+        self.kind = kind
+
+
+class VersionConflictError(RepositoryError):
+    """Excepción para actualizaciones sobre una versión desactualizada de la entidad"""
+
+    pass
+
+
+class TransientError(RepositoryError):
+    """Excepción para errores transitorios que pueden reintentarse"""
+
+    pass
+
+
+class DeadlockError(TransientError):
+    """Excepción para bloqueos mutuos"""
+
+    pass
+
+
+class ConnectionLostError(TransientError):
+    """Excepción para conexiones perdidas o un servidor inaccesible"""
+
+    pass
+
+
+class StatementTimeoutError(RepositoryError):
+    """Excepción para sentencias que exceden su tiempo máximo o su espera de bloqueo"""
+
     pass
+
+
+class IntegrityViolationError(RepositoryError):
+    """Excepción para violaciones de restricciones de integridad"""
+
+    pass
+
+
+class CircuitOpenError(RepositoryError):
+    """Excepción para llamadas rechazadas mientras el circuito está abierto"""
+
+    pass
+
+
+_ERROR_CLASSES = {
+    DEADLOCK: DeadlockError,
+    CONNECTION: ConnectionLostError,
+    TIMEOUT: StatementTimeoutError,
+    INTEGRITY: IntegrityViolationError,
+}
@@ -0,0 +1,151 @@
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from sqlalchemy.exc import DBAPIError, IntegrityError, SQLAlchemyError
+
+# Códigos de error de MySQL agrupados por causa: bloqueo mutuo; servidor
+# inaccesible o conexión perdida; espera de bloqueo agotada, consulta
+# interrumpida o MAX_EXECUTION_TIME excedido.
+DEADLOCK_CODES = frozenset({1213})
+CONNECTION_CODES = frozenset({2003, 2006, 2013, 2055})
+TIMEOUT_CODES = frozenset({1205, 1317, 3024})
+
+DEADLOCK = "deadlock"
+CONNECTION = "connection"
+TIMEOUT = "timeout"
+INTEGRITY = "integrity"
+OTHER = "other"
+
+
+def classify(error: SQLAlchemyError) -> str:
+    """
+    Clasifica un error de SQLAlchemy según su causa.
+
+    :param error: Error lanzado por SQLAlchemy.
+    :return: ``deadlock``, ``connection``, ``timeout``, ``integrity`` u ``other``.
+    """
+    if isinstance(error, IntegrityError):
+        return INTEGRITY
+    if isinstance(error, DBAPIError):
+        if error.connection_invalidated:
+            return CONNECTION
+        code = _error_code(error.orig)
+        if code in DEADLOCK_CODES:
+            return DEADLOCK
+        if code in CONNECTION_CODES:
+            return CONNECTION
+        if code in TIMEOUT_CODES:
+            return TIMEOUT
+    return OTHER
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Reintentos con espera exponencial y variación aleatoria por operación.
+
+    ``retry_on`` indica, por operación del repositorio, qué causas de error se
+    reintentan. Las lecturas pueden repetirse ante bloqueos mutuos y conexiones
+    perdidas; las escrituras sólo ante bloqueos mutuos (1213), porque InnoDB ya
+    revirtió la transacción, mientras que una conexión perdida deja su
+    resultado incierto. Una espera de bloqueo agotada (1205) sólo revierte la
+    sentencia, no la transacción, y se trata como tiempo agotado: no se
+    reintenta. ``add`` no se reintenta.
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.05
+    max_delay: float = 1.0
+    retry_on: Dict[str, frozenset] = field(
+        default_factory=lambda: {
+            "get": frozenset({DEADLOCK, CONNECTION}),
+            "get_all": frozenset({DEADLOCK, CONNECTION}),
+            "changes_since": frozenset({DEADLOCK, CONNECTION}),
+            "update": frozenset({DEADLOCK}),
+            "delete": frozenset({DEADLOCK}),
+        }
+    )
+
+    def should_retry(self, operation: str, kind: str, attempt: int) -> bool:
+        """Indica si el intento ``attempt`` (desde 1) puede repetirse."""
+        return attempt < self.max_attempts and kind in self.retry_on.get(operation, ())
+
+    def delay(self, attempt: int) -> float:
+        """Segundos de espera antes del siguiente intento."""
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(backoff / 2, backoff)
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Corta las llamadas a la base de datos cuando falla de forma repetida.
+
+        Tras ``failure_threshold`` fallos de conexión o de tiempo consecutivos
+        el circuito se abre y las llamadas fallan de inmediato; pasados
+        ``reset_timeout`` segundos se permite una llamada de prueba, que lo
+        cierra si tiene éxito o lo vuelve a abrir si falla.
+
+        :param failure_threshold: Fallos consecutivos para abrir el circuito.
+        :param reset_timeout: Segundos antes de permitir una llamada de prueba.
+        """
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """``closed``, ``open`` o ``half_open``."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self._reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Indica si se puede intentar una llamada."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self._reset_timeout:
+                return False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._failures >= self._failure_threshold or self._opened_at is not None:
+                self._opened_at = time.monotonic()
+
+
+# Circuito compartido por los repositorios del proceso.
+default_breaker = CircuitBreaker()
+
+
+def _error_code(orig: Optional[BaseException]) -> Optional[int]:
+    if orig is None:
+        return None
+    code = getattr(orig, "errno", None)
+    if code is None and orig.args and isinstance(orig.args[0], int):
+        code = orig.args[0]
+    return code
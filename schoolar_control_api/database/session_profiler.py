@@ -0,0 +1,326 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_PROFILE_KEY = "session_profile"
+_STARTED_KEY = "session_profile_statement_started"
+_SKIPPED_FILES = (
+    os.path.normcase(os.path.dirname(__file__) + os.sep + "connection.py"),
+    os.path.normcase(os.path.dirname(os.__file__) + os.sep + "contextlib.py"),
+)
+
+
+@dataclass
+class SessionProfile:
+    """Mediciones de una sesión, de su apertura a su cierre (tiempos en segundos)."""
+
+    origin: str
+    opened_at: float
+    duration: float = 0.0
+    hold_time: float = 0.0
+    max_hold: float = 0.0
+    db_time: float = 0.0
+    transactions: int = 0
+    statements: int = 0
+    identity_map: int = 0
+    warnings: List[str] = field(default_factory=list)
+    _hold_started: Optional[float] = None
+    _connection_infos: List[Dict[Any, Any]] = field(default_factory=list, repr=False)
+
+    @property
+    def idle_hold(self) -> float:
+        """Tiempo con la conexión tomada sin ejecutar sentencias."""
+        return max(self.hold_time - self.db_time, 0.0)
+
+
+@dataclass
+class OriginSummary:
+    """Acumulado de las sesiones abiertas desde un mismo punto del código."""
+
+    sessions: int = 0
+    total_duration: float = 0.0
+    max_duration: float = 0.0
+    total_hold: float = 0.0
+    max_hold: float = 0.0
+    statements: int = 0
+    max_identity_map: int = 0
+    warnings: int = 0
+
+
+class SessionProfiler:
+    def __init__(
+        self,
+        max_duration: float = 5.0,
+        max_hold: float = 1.0,
+        max_statements: int = 200,
+        max_identity_map: int = 5000,
+        keep: int = 1000,
+    ):
+        """
+        Perfila el ciclo de vida de las sesiones abiertas con ``get_session``.
+
+        Por sesión mide la duración, el tiempo con una conexión tomada (total y
+        de la transacción más larga), el tiempo en la base de datos, las
+        sentencias ejecutadas y los objetos en el mapa de identidad al cerrar,
+        y registra una advertencia cuando alguno supera su umbral. Las sesiones
+        se agrupan por el archivo y la línea desde donde se abrieron.
+
+        Se activa con ``connection.enable_profiling``; mientras está apagado,
+        ``get_session`` no hace ningún trabajo adicional.
+
+        :param max_duration: Segundos máximos de vida de una sesión.
+        :param max_hold: Segundos máximos con la conexión tomada por transacción.
+        :param max_statements: Sentencias máximas por sesión.
+        :param max_identity_map: Objetos máximos en el mapa de identidad al cerrar.
+        :param keep: Perfiles individuales que se conservan para el reporte.
+
+        Ejemplos:
+            profiler = connection.enable_profiling(max_hold=0.5)
+            ...
+            print(profiler.report())
+        """
+        self.max_duration = max_duration
+        self.max_hold = max_hold
+        self.max_statements = max_statements
+        self.max_identity_map = max_identity_map
+        self._profiles: Deque[SessionProfile] = deque(maxlen=keep)
+        self._origins: Dict[str, OriginSummary] = {}
+        self._open: Dict[int, SessionProfile] = {}
+        self._lock = threading.Lock()
+        self._installed = False
+
+    def install(self) -> None:
+        """
+        Registra los eventos de todas las sesiones y motores; sólo actúan sobre
+        las sesiones abiertas con ``session_opened``.
+        """
+        if self._installed:
+            return
+        for target, name, fn in _LISTENERS:
+            event.listen(target, name, fn)
+        self._installed = True
+
+    def uninstall(self) -> None:
+        if not self._installed:
+            return
+        for target, name, fn in _LISTENERS:
+            event.remove(target, name, fn)
+        self._installed = False
+
+    def session_opened(self, session: Session) -> SessionProfile:
+        """Empieza a perfilar una sesión recién creada."""
+        profile = SessionProfile(origin=_caller(), opened_at=time.perf_counter())
+        session.info[_PROFILE_KEY] = profile
+        with self._lock:
+            self._open[id(session)] = profile
+        return profile
+
+    def session_closed(self, session: Session, profile: SessionProfile) -> None:
+        """Termina el perfil de una sesión justo antes de cerrarla."""
+        profile.identity_map = len(session.identity_map)
+        _end_hold(profile, time.perf_counter())
+        profile.duration = time.perf_counter() - profile.opened_at
+        session.info.pop(_PROFILE_KEY, None)
+        self._check(profile)
+        with self._lock:
+            self._open.pop(id(session), None)
+            self._profiles.append(profile)
+            summary = self._origins.setdefault(profile.origin, OriginSummary())
+            summary.sessions += 1
+            summary.total_duration += profile.duration
+            summary.max_duration = max(summary.max_duration, profile.duration)
+            summary.total_hold += profile.hold_time
+            summary.max_hold = max(summary.max_hold, profile.max_hold)
+            summary.statements += profile.statements
+            summary.max_identity_map = max(
+                summary.max_identity_map, profile.identity_map
+            )
+            summary.warnings += bool(profile.warnings)
+
+    def open_sessions(self, older_than: Optional[float] = None) -> List[SessionProfile]:
+        """
+        Sesiones todavía abiertas, posibles fugas.
+
+        :param older_than: Segundos mínimos de vida (por defecto, ``max_duration``).
+        """
+        older_than = self.max_duration if older_than is None else older_than
+        now = time.perf_counter()
+        with self._lock:
+            return [
+                profile
+                for profile in self._open.values()
+                if now - profile.opened_at >= older_than
+            ]
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Resumen de las sesiones cerradas.
+
+        :return: Totales, percentiles de los últimos ``keep`` perfiles,
+            acumulados por origen y sesiones abiertas por más de ``max_duration``.
+        """
+        with self._lock:
+            profiles = list(self._profiles)
+            origins = dict(self._origins)
+        metrics = {
+            "duration": [p.duration for p in profiles],
+            "hold_time": [p.hold_time for p in profiles],
+            "idle_hold": [p.idle_hold for p in profiles],
+            "statements": [p.statements for p in profiles],
+            "identity_map": [p.identity_map for p in profiles],
+        }
+        return {
+            "sessions": sum(o.sessions for o in origins.values()),
+            "with_warnings": sum(o.warnings for o in origins.values()),
+            "percentiles": {
+                name: _percentiles(values) for name, values in metrics.items()
+            },
+            "origins": origins,
+            "open": self.open_sessions(),
+        }
+
+    def report(self, top: int = 10) -> str:
+        """Resumen en texto, con los orígenes que más tiempo retienen conexiones."""
+        summary = self.summary()
+        lines = [
+            f"{summary['sessions']} sessions, "
+            f"{summary['with_warnings']} over thresholds, "
+            f"{len(summary['open'])} open longer than {self.max_duration:g}s",
+            f"{'metric':<14}{'p50':>10}{'p95':>10}{'max':>10}",
+        ]
+        for name, values in summary["percentiles"].items():
+            lines.append(
+                f"{name:<14}"
+                + "".join(f"{values.get(q, 0):>10.3f}" for q in (50, 95, 100))
+            )
+        lines.append(
+            f"{'origin':<48}{'sessions':>9}{'hold s':>9}{'max hold':>9}"
+            f"{'stmts':>7}{'max map':>8}"
+        )
+        origins = sorted(
+            summary["origins"].items(), key=lambda item: -item[1].total_hold
+        )
+        for origin, o in origins[:top]:
+            lines.append(
+                f"{origin[-48:]:<48}{o.sessions:>9}{o.total_hold:>9.3f}"
+                f"{o.max_hold:>9.3f}{o.statements:>7}{o.max_identity_map:>8}"
+            )
+        for profile in summary["open"]:
+            age = time.perf_counter() - profile.opened_at
+            lines.append(f"open {age:.1f}s: {profile.origin}")
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        """Descarta los perfiles y acumulados (no las sesiones abiertas)."""
+        with self._lock:
+            self._profiles.clear()
+            self._origins.clear()
+
+    def _check(self, profile: SessionProfile) -> None:
+        checks = (
+            ("duration", profile.duration, self.max_duration, "s"),
+            ("connection hold", profile.max_hold, self.max_hold, "s"),
+            ("statements", profile.statements, self.max_statements, ""),
+            ("identity map", profile.identity_map, self.max_identity_map, " objects"),
+        )
+        for name, value, limit, unit in checks:
+            if value > limit:
+                profile.warnings.append(f"{name} {value:g}{unit} > {limit:g}{unit}")
+        if profile.warnings:
+            logger.warning(
+                "Session opened at %s: %s (%d statements, %.3fs idle with a connection)",
+                profile.origin,
+                "; ".join(profile.warnings),
+                profile.statements,
+                profile.idle_hold,
+            )
+
+
+def _after_begin(session: Session, transaction, connection) -> None:
+    profile = session.info.get(_PROFILE_KEY)
+    if profile is None:
+        return
+    connection.info[_PROFILE_KEY] = profile
+    profile._connection_infos.append(connection.info)
+    if profile._hold_started is None:
+        profile._hold_started = time.perf_counter()
+        profile.transactions += 1
+
+
+def _after_transaction_end(session: Session, transaction) -> None:
+    # Sólo la transacción raíz devuelve la conexión al pool.
+    if transaction.parent is not None:
+        return
+    profile = session.info.get(_PROFILE_KEY)
+    if profile is not None:
+        _end_hold(profile, time.perf_counter())
+
+
+def _end_hold(profile: SessionProfile, now: float) -> None:
+    # ``Connection.info`` pertenece a la conexión del pool: se limpia antes de
+    # que otra sesión la reciba.
+    for info in profile._connection_infos:
+        info.pop(_PROFILE_KEY, None)
+        info.pop(_STARTED_KEY, None)
+    profile._connection_infos.clear()
+    if profile._hold_started is None:
+        return
+    hold = now - profile._hold_started
+    profile._hold_started = None
+    profile.hold_time += hold
+    profile.max_hold = max(profile.max_hold, hold)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _PROFILE_KEY in conn.info:
+        conn.info[_STARTED_KEY] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = conn.info.get(_PROFILE_KEY)
+    if profile is None:
+        return
+    started = conn.info.pop(_STARTED_KEY, None)
+    profile.statements += 1
+    if started is not None:
+        profile.db_time += time.perf_counter() - started
+
+
+_LISTENERS = (
+    (Session, "after_begin", _after_begin),
+    (Session, "after_transaction_end", _after_transaction_end),
+    (Engine, "before_cursor_execute", _before_cursor_execute),
+    (Engine, "after_cursor_execute", _after_cursor_execute),
+)
+
+
+def _caller() -> str:
+    frame = sys._getframe(2)
+    while frame is not None and (
+        os.path.normcase(frame.f_code.co_filename) in _SKIPPED_FILES
+    ):
+        frame = frame.f_back
+    if frame is None:
+        return "<unknown>"
+    return f"{frame.f_code.co_filename}:{frame.f_lineno} ({frame.f_code.co_name})"
+
+
+def _percentiles(values: List[float]) -> Dict[int, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    return {
+        q: ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))]
+        for q in (50, 95, 100)
+    }
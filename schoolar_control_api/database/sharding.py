@@ -0,0 +1,532 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Type,
+    TypeVar,
+    Union,
+)
+
+from sqlalchemy import create_engine, event, func, inspect, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import (
+    BinaryExpression,
+    BindParameter,
+    BooleanClauseList,
+    ColumnElement,
+)
+
+from schoolar_control_api.database.models import (
+    Attendance,
+    CourseEnrollment,
+    Grade,
+    Student,
+    TaskSubmission,
+)
+from schoolar_control_api.database.repository import Repository, RepositoryError
+from schoolar_control_api.database.resilience import CircuitBreaker
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+SHARD_KEY = "degree_id"
+
+# Modelos cuyas filas viven en el shard del grado de su estudiante. El resto
+# (grados, cursos, usuarios, catálogos) se replica en todos los shards.
+SHARDED_MODELS = (Student, CourseEnrollment, TaskSubmission, Grade, Attendance)
+
+# Sin ``degree_id``, las filas se dirigen por la entidad de la que dependen: el
+# estudiante (inscripciones, entregas, asistencias) o la entrega (calificaciones).
+PARENT_KEYS = (("student_id", Student), ("submission_id", TaskSubmission))
+
+
+class ShardingError(RepositoryError):
+    """Excepción para operaciones que no pueden dirigirse a un shard"""
+
+    pass
+
+
+class ShardMap:
+    def __init__(
+        self,
+        shards: Dict[str, Union[str, Engine]],
+        assignments: Optional[Dict[int, str]] = None,
+        primary: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        breaker_factory: Callable[[], CircuitBreaker] = CircuitBreaker,
+        **engine_options: Any,
+    ):
+        """
+        Asigna cada grado académico (``degree_id``) a una base de datos.
+
+        Los grados sin asignación explícita se reparten por ``degree_id``
+        módulo el número de shards; al agregar shards conviene fijar las
+        asignaciones existentes en ``assignments`` para no mover datos.
+
+        En MySQL cada shard genera ids autoincrementales intercalados
+        (``auto_increment_increment``/``auto_increment_offset``), de modo que
+        un id de estudiante o de entrega es único entre todos los shards. En
+        otros motores (SQLite en pruebas) ``ShardedRepository.add`` asigna el
+        id intercalado bajo un bloqueo por shard, válido dentro del proceso.
+
+        Cada shard tiene su propio circuito: la caída de uno no rechaza las
+        operaciones en los demás.
+
+        :param shards: URL o motor por id de shard.
+        :param assignments: Shard fijo por ``degree_id``.
+        :param primary: Shard del que se leen los datos replicados (por
+            defecto, el primero).
+        :param max_workers: Hilos para las consultas a todos los shards.
+        :param breaker_factory: Crea el circuito de cada shard.
+        :param engine_options: Argumentos para ``create_engine`` de las URL.
+
+        Ejemplos:
+            shards = ShardMap(
+                {"norte": "sqlite:///norte.db", "sur": "sqlite:///sur.db"},
+                assignments={1: "norte", 2: "sur"},
+            )
+        """
+        if not shards:
+            raise ValueError("At least one shard is required")
+        self.shard_ids: List[str] = list(shards)
+        self.primary = primary or self.shard_ids[0]
+        self._assignments = dict(assignments or {})
+        self._engines: Dict[str, Engine] = {}
+        for index, (shard_id, target) in enumerate(shards.items()):
+            engine = (
+                target
+                if isinstance(target, Engine)
+                else create_engine(target, **engine_options)
+            )
+            if engine.dialect.name == "mysql":
+                _interleave_ids(engine, len(shards), index + 1)
+            self._engines[shard_id] = engine
+        self._sessions = {
+            shard_id: sessionmaker(bind=engine, expire_on_commit=False)
+            for shard_id, engine in self._engines.items()
+        }
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or len(self.shard_ids),
+            thread_name_prefix="shard",
+        )
+        self._breakers = {shard_id: breaker_factory() for shard_id in self.shard_ids}
+        self._id_locks = {shard_id: threading.Lock() for shard_id in self.shard_ids}
+        self._located: Dict[type, Dict[int, str]] = {}
+        self._lock = threading.Lock()
+
+    def shard_for(self, degree_id: int) -> str:
+        """Devuelve el shard de un grado."""
+        shard_id = self._assignments.get(degree_id)
+        if shard_id is not None:
+            return shard_id
+        return self.shard_ids[degree_id % len(self.shard_ids)]
+
+    def engine(self, shard_id: str) -> Engine:
+        return self._engines[shard_id]
+
+    def breaker(self, shard_id: str) -> CircuitBreaker:
+        """Devuelve el circuito de un shard."""
+        return self._breakers[shard_id]
+
+    def id_lock(self, shard_id: str):
+        """
+        Bloqueo para asignar ids intercalados en un shard que no es MySQL.
+
+        En MySQL los ids los intercala el propio servidor y no hace falta.
+        """
+        if self._engines[shard_id].dialect.name == "mysql":
+            return nullcontext()
+        return self._id_locks[shard_id]
+
+    @contextmanager
+    def session(self, shard_id: str) -> Iterator[Session]:
+        """Abre una sesión sobre un shard."""
+        db = self._sessions[shard_id]()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def session_for(self, degree_id: int):
+        """Abre una sesión sobre el shard de un grado."""
+        return self.session(self.shard_for(degree_id))
+
+    def fan_out(
+        self, fn: Callable[[str], R], shard_ids: Optional[Sequence[str]] = None
+    ) -> Dict[str, R]:
+        """
+        Ejecuta ``fn(shard_id)`` en paralelo sobre varios shards.
+
+        :param fn: Función a ejecutar por shard.
+        :param shard_ids: Shards destino (por defecto, todos).
+        :return: Resultado por shard, en el orden de ``shard_ids``.
+        :raises Exception: El primer error lanzado por algún shard.
+        """
+        shard_ids = list(shard_ids or self.shard_ids)
+        if len(shard_ids) == 1:
+            return {shard_ids[0]: fn(shard_ids[0])}
+        futures = {
+            shard_id: self._executor.submit(fn, shard_id) for shard_id in shard_ids
+        }
+        return {shard_id: future.result() for shard_id, future in futures.items()}
+
+    def locate(self, model: type, entity_id: int) -> str:
+        """
+        Devuelve el shard de una entidad por su id, consultando todos los shards
+        la primera vez y recordándolo después.
+
+        :param model: Modelo fragmentado con clave primaria ``id``.
+        :param entity_id: Id de la entidad.
+        :raises ShardingError: Si la entidad no existe o aparece en varios shards.
+        """
+        with self._lock:
+            shard_id = self._located.get(model, {}).get(entity_id)
+        if shard_id is not None:
+            return shard_id
+
+        def find(shard: str) -> bool:
+            with self.session(shard) as db:
+                stmt = select(model.id).where(model.id == entity_id)
+                return db.execute(stmt).first() is not None
+
+        try:
+            found = [shard for shard, hit in self.fan_out(find).items() if hit]
+        except SQLAlchemyError as e:
+            raise ShardingError(f"Error locating {model.__name__}") from e
+        if len(found) != 1:
+            raise ShardingError(
+                f"{model.__name__} {entity_id} found in {len(found)} shards, "
+                "expected one"
+            )
+        self.remember(model, entity_id, found[0])
+        return found[0]
+
+    def locate_student(self, student_id: int) -> str:
+        """
+        Devuelve el shard de un estudiante.
+
+        :raises ShardingError: Si el estudiante no existe o aparece en varios shards.
+        """
+        return self.locate(Student, student_id)
+
+    def remember(self, model: type, entity_id: int, shard_id: str) -> None:
+        """Registra el shard de una entidad recién creada."""
+        with self._lock:
+            self._located.setdefault(model, {})[entity_id] = shard_id
+
+    def create_all(self, metadata) -> None:
+        """Crea el esquema en todos los shards (útil con SQLite en pruebas)."""
+        for engine in self._engines.values():
+            metadata.create_all(engine)
+
+    def dispose(self) -> None:
+        """Libera los hilos y las conexiones de todos los shards."""
+        self._executor.shutdown(wait=True)
+        for engine in self._engines.values():
+            engine.dispose()
+
+
+class ShardedRepository(Generic[T]):
+    def __init__(self, model: Type[T], shards: ShardMap, **repository_options: Any):
+        """
+        Repositorio que dirige cada operación al shard correspondiente.
+
+        Para los modelos de ``SHARDED_MODELS``, las consultas con
+        ``degree_id`` (como argumento o como condición ``degree_id == x`` o
+        ``degree_id.in_(...)``) van sólo a sus shards. Sin ``degree_id``, las
+        condiciones ``student_id == x`` (o ``IN``) se dirigen al shard de esos
+        estudiantes y ``submission_id == x`` al de esa entrega. Las demás se
+        ejecutan en paralelo en todos los shards y se combinan. Los modelos
+        replicados se leen del shard primario y se escriben en todos, sin
+        transacción distribuida.
+
+        Cada shard usa su propio circuito (``ShardMap.breaker``) y, si se pasa
+        ``cache``, su propio espacio en ella (``QueryCache.scoped``).
+
+        :param model: Clase del modelo de SQLAlchemy.
+        :param shards: Mapa de shards.
+        :param repository_options: Argumentos para cada ``Repository`` por shard
+            (``retry_policy``, ``timeouts``, ``cache``...).
+        :raises ValueError: Si se pasa ``breaker``; se configura en ``ShardMap``.
+        """
+        if "breaker" in repository_options:
+            raise ValueError(
+                "Circuit breakers are per shard, use ShardMap(breaker_factory=...)"
+            )
+        self._model = model
+        self._shards = shards
+        self._options = repository_options
+        self._sharded = model in SHARDED_MODELS
+
+    def get(
+        self, *conditions: ColumnElement[bool], degree_id: Optional[int] = None
+    ) -> Optional[T]:
+        """
+        Recupera una única entidad; sin shard, la busca en todos.
+
+        :raises RepositoryError: Si ocurre un error o hay coincidencias en varios shards.
+        """
+        results = [
+            entity
+            for entity in self._run(
+                lambda repo: repo.get(*conditions), conditions, degree_id
+            ).values()
+            if entity is not None
+        ]
+        if len(results) > 1:
+            raise ShardingError(
+                f"{self._model.__name__} matched in {len(results)} shards"
+            )
+        return results[0] if results else None
+
+    def get_all(
+        self,
+        *conditions: ColumnElement[bool],
+        degree_id: Optional[int] = None,
+        order_by: Optional[Callable[[T], Any]] = None,
+    ) -> List[T]:
+        """
+        Recupera todas las entidades que coincidan, combinando los shards.
+
+        :param conditions: Condiciones para filtrar la consulta.
+        :param degree_id: Grado que fija el shard (opcional).
+        :param order_by: Llave para ordenar el resultado combinado.
+        :return: Entidades de todos los shards consultados.
+        :raises RepositoryError: Si ocurre un error en algún shard.
+
+        Ejemplos:
+            repo = ShardedRepository(Student, shards)
+            repo.get_all(Student.degree_id == 3)  # un solo shard
+            repo.get_all(Student.key_registration.like("A%"))  # todos los shards
+        """
+        merged: List[T] = []
+        for entities in self._run(
+            lambda repo: repo.get_all(*conditions), conditions, degree_id
+        ).values():
+            merged.extend(entities)
+        if order_by is not None:
+            merged.sort(key=order_by)
+        return merged
+
+    def add(self, entity: T, degree_id: Optional[int] = None) -> T:
+        """
+        Añade una entidad en su shard (o en todos, si el modelo es replicado).
+
+        El shard se toma de ``degree_id``, del ``degree_id`` de la entidad o del
+        shard de su ``student_id`` o, para ``Grade``, de su ``submission_id``.
+
+        :raises ShardingError: Si no se puede determinar el shard.
+        :raises RepositoryError: Si ocurre un error durante la inserción.
+        """
+        if self._sharded:
+            shard_id = self._entity_shard(entity, degree_id)
+            with self._shards.session(shard_id) as db:
+                # El siguiente id se calcula con max(id): el bloqueo abarca hasta
+                # la confirmación para que dos inserciones no tomen el mismo.
+                with self._shards.id_lock(shard_id):
+                    self._assign_interleaved_id(db, shard_id, entity)
+                    added = self._repository(db, shard_id).add(entity)
+            if isinstance(added, (Student, TaskSubmission)):
+                self._shards.remember(type(added), added.id, shard_id)
+            return added
+        # Los datos replicados se insertan primero en el primario para fijar
+        # el id y después se copian con el mismo id en el resto.
+        primary = self._shards.primary
+        with self._shards.session(primary) as db:
+            added = self._repository(db, primary).add(entity)
+        others = [s for s in self._shards.shard_ids if s != primary]
+
+        def replicate(shard_id: str) -> None:
+            with self._shards.session(shard_id) as db:
+                try:
+                    db.merge(added)
+                    db.commit()
+                except SQLAlchemyError as e:
+                    db.rollback()
+                    raise ShardingError(
+                        f"Error replicating {self._model.__name__} to {shard_id}"
+                    ) from e
+
+        if others:
+            self._shards.fan_out(replicate, others)
+        return added
+
+    def update(
+        self,
+        *conditions: ColumnElement[bool],
+        values: dict,
+        degree_id: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Optional[T]:
+        """
+        Actualiza las entidades que coincidan en los shards correspondientes.
+
+        :return: La entidad actualizada (la del primario si es replicada).
+        :raises RepositoryError: Si ocurre un error en algún shard.
+        """
+        results = self._run(
+            lambda repo: repo.update(*conditions, values=values, **kwargs),
+            conditions,
+            degree_id,
+            write=True,
+        )
+        if not self._sharded:
+            return results.get(self._shards.primary)
+        return next((e for e in results.values() if e is not None), None)
+
+    def delete(
+        self, *conditions: ColumnElement[bool], degree_id: Optional[int] = None
+    ) -> bool:
+        """
+        Elimina las entidades que coincidan en los shards correspondientes.
+
+        :return: True si se eliminó al menos una entidad.
+        :raises RepositoryError: Si ocurre un error en algún shard.
+        """
+        results = self._run(
+            lambda repo: repo.delete(*conditions), conditions, degree_id, write=True
+        )
+        return any(results.values())
+
+    def _run(
+        self,
+        operation: Callable[[Repository], R],
+        conditions: Sequence[ColumnElement[bool]],
+        degree_id: Optional[int],
+        write: bool = False,
+    ) -> Dict[str, R]:
+        def call(shard_id: str) -> R:
+            with self._shards.session(shard_id) as db:
+                return operation(self._repository(db, shard_id))
+
+        return self._shards.fan_out(call, self._targets(conditions, degree_id, write))
+
+    def _repository(self, db: Session, shard_id: str) -> Repository:
+        options = dict(self._options, breaker=self._shards.breaker(shard_id))
+        cache = options.get("cache")
+        if cache is not None:
+            options["cache"] = cache.scoped(shard_id)
+        return Repository(self._model, db, **options)
+
+    def _targets(
+        self,
+        conditions: Sequence[ColumnElement[bool]],
+        degree_id: Optional[int],
+        write: bool,
+    ) -> List[str]:
+        if not self._sharded:
+            return self._shards.shard_ids if write else [self._shards.primary]
+        degree_ids = {degree_id} if degree_id is not None else shard_keys(conditions)
+        if degree_ids is not None:
+            targets = {self._shards.shard_for(d) for d in degree_ids}
+        else:
+            targets = self._parent_shards(conditions)
+            if targets is None:
+                return self._shards.shard_ids
+        return [s for s in self._shards.shard_ids if s in targets]
+
+    def _parent_shards(
+        self, conditions: Sequence[ColumnElement[bool]]
+    ) -> Optional[Set[str]]:
+        columns = inspect(self._model).columns
+        for key, parent in PARENT_KEYS:
+            if key not in columns:
+                continue
+            ids = shard_keys(conditions, key)
+            if ids is None:
+                continue
+            try:
+                return {self._shards.locate(parent, i) for i in ids}
+            except ShardingError:
+                # Un id inexistente no fija el shard: se consulta en todos.
+                return None
+        return None
+
+    def _entity_shard(self, entity: T, degree_id: Optional[int]) -> str:
+        degree_id = (
+            degree_id if degree_id is not None else getattr(entity, SHARD_KEY, None)
+        )
+        if degree_id is not None:
+            return self._shards.shard_for(degree_id)
+        for key, parent in PARENT_KEYS:
+            parent_id = getattr(entity, key, None)
+            if parent_id is not None:
+                return self._shards.locate(parent, parent_id)
+        raise ShardingError(
+            f"Cannot route {self._model.__name__} without degree_id, "
+            "student_id or submission_id"
+        )
+
+    def _assign_interleaved_id(self, db: Session, shard_id: str, entity: T) -> None:
+        # MySQL intercala los ids con variables de sesión; en otros motores
+        # (SQLite en pruebas) se asigna aquí el siguiente id del shard.
+        if db.get_bind().dialect.name == "mysql":
+            return
+        mapper = inspect(self._model)
+        if len(mapper.primary_key) != 1 or getattr(entity, mapper.primary_key[0].key):
+            return
+        column = mapper.primary_key[0]
+        count = len(self._shards.shard_ids)
+        offset = self._shards.shard_ids.index(shard_id) + 1
+        current = db.execute(select(func.max(column))).scalar() or 0
+        next_id = current + 1
+        next_id += (offset - next_id) % count
+        setattr(entity, column.key, next_id)
+
+
+def shard_keys(
+    conditions: Sequence[ColumnElement[bool]], key: str = SHARD_KEY
+) -> Optional[Set[int]]:
+    """
+    Extrae los valores de una columna fijados por condiciones ``==`` o ``IN``
+    unidas con AND.
+
+    :param conditions: Condiciones de la consulta.
+    :param key: Columna buscada (por defecto, ``degree_id``).
+    :return: Valores encontrados, o None si las condiciones no los fijan.
+    """
+    for condition in _conjuncts(conditions):
+        if not isinstance(condition, BinaryExpression):
+            continue
+        column, value = condition.left, condition.right
+        if getattr(column, "key", None) != key or not isinstance(value, BindParameter):
+            continue
+        if condition.operator is operators.eq:
+            return {value.value}
+        if condition.operator is operators.in_op:
+            return set(value.value)
+    return None
+
+
+def _conjuncts(conditions: Sequence[ColumnElement[bool]]) -> Iterator[ColumnElement]:
+    for condition in conditions:
+        if (
+            isinstance(condition, BooleanClauseList)
+            and condition.operator is operators.and_
+        ):
+            yield from _conjuncts(list(condition.clauses))
+        else:
+            yield condition
+
+
+def _interleave_ids(engine: Engine, increment: int, offset: int) -> None:
+    @event.listens_for(engine, "connect")
+    def set_increment(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(
+            f"SET SESSION auto_increment_increment = {increment}, "
+            f"auto_increment_offset = {offset}"
+        )
+        cursor.close()
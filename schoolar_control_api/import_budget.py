@@ -0,0 +1,114 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+PACKAGE = "schoolar_control_api"
+
+DEFAULT_MODULES = [
+    "schoolar_control_api.database.connection",
+    "schoolar_control_api.database.models",
+    "schoolar_control_api.database.repository",
+]
+
+# Variables que no deben ser necesarias para importar el paquete.
+DATABASE_VARIABLES = ("HOST", "USER_NAME", "PASSWORD", "DATABASE_NAME")
+
+_PROBE = (
+    "import {module}\n"
+    "from schoolar_control_api.database import connection\n"
+    "assert connection._engine is None, 'engine created at import time'\n"
+)
+
+
+def measure(module: str, runs: int = 5) -> Dict[str, float]:
+    """
+    Mide el tiempo de importación de un módulo en intérpretes nuevos.
+
+    Cada ejecución usa ``python -X importtime`` sin variables de conexión en el
+    entorno, y falla si importar el módulo crea el motor de la base de datos.
+
+    :param module: Nombre completo del módulo a importar.
+    :param runs: Número de ejecuciones; se reporta la mediana.
+    :return: Milisegundos totales y propios del paquete (mediana).
+    :raises RuntimeError: Si la importación falla.
+    """
+    env = {k: v for k, v in os.environ.items() if k not in DATABASE_VARIABLES}
+    totals: List[float] = []
+    own: List[float] = []
+    for _ in range(runs):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module)],
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+        if process.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{process.stderr}")
+        total, package = _parse(process.stderr, module)
+        totals.append(total)
+        own.append(package)
+    return {"total_ms": statistics.median(totals), "package_ms": statistics.median(own)}
+
+
+def check(
+    modules: List[str], budget_ms: float, package_budget_ms: float, runs: int = 5
+) -> bool:
+    """
+    Verifica que cada módulo se importe dentro del presupuesto de tiempo.
+
+    :param modules: Módulos a medir.
+    :param budget_ms: Presupuesto total por módulo, incluyendo dependencias.
+    :param package_budget_ms: Presupuesto para el código propio del paquete.
+    :param runs: Número de ejecuciones por módulo.
+    :return: True si todos los módulos cumplen el presupuesto.
+    """
+    ok = True
+    for module in modules:
+        result = measure(module, runs)
+        passed = (
+            result["total_ms"] <= budget_ms
+            and result["package_ms"] <= package_budget_ms
+        )
+        ok = ok and passed
+        print(
+            f"{'OK  ' if passed else 'FAIL'} {module}: "
+            f"{result['total_ms']:.1f} ms total, {result['package_ms']:.1f} ms package"
+        )
+    return ok
+
+
+def _parse(output: str, module: str):
+    total = 0.0
+    package = 0.0
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not own_us.strip().isdigit():
+            continue
+        name = name.strip()
+        if name == PACKAGE or name.startswith(PACKAGE + "."):
+            package += int(own_us) / 1000
+        if name == module:
+            total = int(cumulative_us) / 1000
+    return total, package
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Verifica el presupuesto de tiempo de importación del paquete."
+    )
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    parser.add_argument("--package-budget-ms", type=float, default=150.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+    ok = check(args.modules, args.budget_ms, args.package_budget_ms, args.runs)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,478 @@
+import argparse
+import math
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database.models import (
+    CourseEnrollment,
+    Grade,
+    Student,
+    Task,
+    TaskSubmission,
+    Unit,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy es opcional
+    np = None
+
+PASSING_GRADE = 70.0
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+
+# Pesos del puntaje de riesgo: déficit frente a la calificación aprobatoria,
+# proporción de tareas vencidas sin calificar y caída de las calificaciones
+# entre unidades.
+RISK_WEIGHTS = (0.5, 0.3, 0.2)
+# Caída por unidad (en puntos) que se considera máxima en el puntaje.
+MAX_DECLINE_PER_UNIT = 10.0
+
+
+@dataclass
+class ScoreColumns:
+    """
+    Calificaciones en columnas: una posición por (estudiante, tarea).
+
+    Con numpy cada columna es un ``ndarray``; sin numpy, una lista. Las tareas
+    vencidas sin calificación tienen ``grade`` NaN.
+    """
+
+    student_id: Any
+    course_id: Any
+    unit_id: Any
+    unit_order: Any
+    task_weight: Any
+    grade: Any
+
+    def __len__(self) -> int:
+        return len(self.grade)
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """Distribución de calificaciones: percentiles e histograma."""
+
+    count: int
+    mean: Optional[float]
+    percentiles: Dict[int, float]
+    counts: List[int]
+    edges: List[float]
+
+
+@dataclass(frozen=True)
+class UnitProgress:
+    """Avance de la cohorte en una unidad."""
+
+    unit_id: int
+    order_index: int
+    mean: Optional[float]
+    p25: Optional[float]
+    median: Optional[float]
+    p75: Optional[float]
+    completion: float
+    moving_mean: Optional[float]
+
+
+@dataclass(frozen=True)
+class RiskScore:
+    """Puntaje de riesgo de un estudiante (0 = sin riesgo, 1 = máximo)."""
+
+    student_id: int
+    average: Optional[float]
+    missing_rate: float
+    trend: float
+    score: float
+    at_risk: bool
+
+
+def load_scores(
+    session: Session,
+    course_id: Optional[int] = None,
+    unit_id: Optional[int] = None,
+    degree_id: Optional[int] = None,
+    as_of: Optional[datetime] = None,
+) -> ScoreColumns:
+    """
+    Obtiene en una sola consulta las calificaciones de una cohorte como columnas.
+
+    Se genera una fila por cada estudiante inscrito y cada tarea ya vencida (o
+    calificada) de sus cursos; las tareas sin calificación quedan como NaN para
+    que cuenten como faltantes.
+
+    :param session: Sesión de SQLAlchemy.
+    :param course_id: Restringe a un curso.
+    :param unit_id: Restringe a una unidad.
+    :param degree_id: Restringe a los estudiantes de un grado.
+    :param as_of: Fecha de corte para considerar una tarea vencida (por defecto, ahora).
+    :return: Columnas de calificaciones.
+    """
+    as_of = as_of or datetime.utcnow()
+    stmt = (
+        select(
+            CourseEnrollment.student_id,
+            Task.course_id,
+            Task.unit_id,
+            Unit.order_index,
+            Task.weight,
+            Grade.grade,
+        )
+        .join(Task, Task.course_id == CourseEnrollment.course_id)
+        .join(Unit, Unit.id == Task.unit_id)
+        .outerjoin(
+            TaskSubmission,
+            and_(
+                TaskSubmission.task_id == Task.id,
+                TaskSubmission.student_id == CourseEnrollment.student_id,
+            ),
+        )
+        .outerjoin(Grade, Grade.submission_id == TaskSubmission.id)
+        .where(
+            CourseEnrollment.status.in_(("active", "completed", "failed")),
+            or_(Task.due_date <= as_of, Grade.id.is_not(None)),
+        )
+    )
+    if course_id is not None:
+        stmt = stmt.where(CourseEnrollment.course_id == course_id)
+    if unit_id is not None:
+        stmt = stmt.where(Task.unit_id == unit_id)
+    if degree_id is not None:
+        stmt = stmt.join(Student, Student.id == CourseEnrollment.student_id).where(
+            Student.degree_id == degree_id
+        )
+    rows = session.execute(stmt).all()
+    columns = list(zip(*rows)) if rows else [()] * 6
+    ints = [_column(values, int) for values in columns[:4]]
+    weights = _column(columns[4], float)
+    grades = _column(columns[5], float)
+    return ScoreColumns(*ints, weights, grades)
+
+
+def percentiles(
+    values: Sequence[float], qs: Sequence[float] = DEFAULT_PERCENTILES
+) -> Dict[float, float]:
+    """
+    Percentiles con interpolación lineal (el método por defecto de numpy).
+    Se ignoran los NaN.
+    """
+    if np is not None:
+        data = np.asarray(values, dtype=float)
+        data = data[~np.isnan(data)]
+        if not data.size:
+            return {}
+        return dict(zip(qs, np.percentile(data, qs).tolist()))
+    data = sorted(v for v in values if v == v)
+    if not data:
+        return {}
+    result = {}
+    for q in qs:
+        position = (len(data) - 1) * q / 100
+        low = math.floor(position)
+        high = min(low + 1, len(data) - 1)
+        result[q] = data[low] + (data[high] - data[low]) * (position - low)
+    return result
+
+
+def histogram(
+    values: Sequence[float], bins: int = 10, bounds: Tuple[float, float] = (0, 100)
+) -> Tuple[List[int], List[float]]:
+    """
+    Histograma de ``bins`` intervalos iguales en ``bounds`` (el último incluye
+    su límite superior). Se ignoran los NaN.
+
+    :return: Conteos por intervalo y sus ``bins + 1`` bordes.
+    """
+    low, high = bounds
+    edges = [low + (high - low) * i / bins for i in range(bins + 1)]
+    if np is not None:
+        data = np.asarray(values, dtype=float)
+        counts, _ = np.histogram(data[~np.isnan(data)], bins=bins, range=bounds)
+        return counts.tolist(), edges
+    counts = [0] * bins
+    for value in values:
+        if value == value and low <= value <= high:
+            counts[min(bisect_right(edges, value) - 1, bins - 1)] += 1
+    return counts, edges
+
+
+def moving_average(values: Sequence[float], window: int = 3) -> List[float]:
+    """
+    Media móvil hacia atrás; los primeros valores promedian los disponibles.
+
+    :param values: Serie ordenada.
+    :param window: Número de puntos por promedio.
+    """
+    if np is not None:
+        data = np.asarray(values, dtype=float)
+        if not data.size:
+            return []
+        sums = np.cumsum(np.concatenate(([0.0], data)))
+        ends = np.arange(1, data.size + 1)
+        starts = np.maximum(ends - window, 0)
+        return ((sums[ends] - sums[starts]) / (ends - starts)).tolist()
+    result, total = [], 0.0
+    for i, value in enumerate(values):
+        total += value
+        if i >= window:
+            total -= values[i - window]
+        result.append(total / min(i + 1, window))
+    return result
+
+
+def distribution(
+    scores: ScoreColumns,
+    bins: int = 10,
+    qs: Sequence[float] = DEFAULT_PERCENTILES,
+) -> Distribution:
+    """Distribución de las calificaciones registradas (las faltantes no cuentan)."""
+    grades = _graded(scores.grade)
+    counts, edges = histogram(grades, bins)
+    mean = _mean(grades)
+    return Distribution(len(grades), mean, percentiles(grades, qs), counts, edges)
+
+
+def unit_progress(scores: ScoreColumns, window: int = 3) -> List[UnitProgress]:
+    """
+    Curva de avance por unidad: media, cuartiles y proporción de tareas
+    calificadas, en el orden de las unidades y con su media móvil.
+    """
+    keys, inverse = _group(_zip_keys(scores.unit_order, scores.unit_id))
+    if not keys:
+        return []
+    by_unit = _split(inverse, scores.grade, len(keys))
+    stats = []
+    for values in by_unit:
+        graded = _graded(values)
+        quartiles = percentiles(graded, (25, 50, 75))
+        mean = _mean(graded)
+        stats.append((mean, quartiles, len(graded) / len(values)))
+    means = [s[0] for s in stats]
+    smoothed = _moving_average_skipping_none(means, window)
+    return [
+        UnitProgress(
+            unit_id=unit_id,
+            order_index=order_index,
+            mean=mean,
+            p25=quartiles.get(25),
+            median=quartiles.get(50),
+            p75=quartiles.get(75),
+            completion=completion,
+            moving_mean=moving_mean,
+        )
+        for (order_index, unit_id), (mean, quartiles, completion), moving_mean in zip(
+            keys, stats, smoothed
+        )
+    ]
+
+
+def at_risk(
+    scores: ScoreColumns,
+    passing: float = PASSING_GRADE,
+    threshold: float = 0.5,
+) -> List[RiskScore]:
+    """
+    Calcula el puntaje de riesgo de cada estudiante, de mayor a menor.
+
+    El puntaje combina, con ``RISK_WEIGHTS``, el déficit del promedio ponderado
+    por ``Task.weight`` frente a ``passing``, la proporción de tareas vencidas
+    sin calificar y la pendiente negativa de sus calificaciones entre unidades
+    (mínimos cuadrados por estudiante, sin ciclos sobre las filas).
+
+    :param scores: Columnas de calificaciones.
+    :param passing: Calificación aprobatoria.
+    :param threshold: Puntaje a partir del cual se marca al estudiante.
+    """
+    students, inverse = _group(scores.student_id)
+    if not students:
+        return []
+    n = len(students)
+    if np is not None:
+        grade = scores.grade
+        graded = ~np.isnan(grade)
+        g = np.where(graded, grade, 0.0)
+        x = scores.unit_order.astype(float)
+        w = np.where(graded, scores.task_weight, 0.0)
+        total = np.bincount(inverse, minlength=n)
+        count = np.bincount(inverse, weights=graded, minlength=n)
+        weight_sum = np.bincount(inverse, weights=w, minlength=n)
+        weighted = np.bincount(inverse, weights=w * g, minlength=n)
+        sx = np.bincount(inverse, weights=np.where(graded, x, 0.0), minlength=n)
+        sxx = np.bincount(inverse, weights=np.where(graded, x * x, 0.0), minlength=n)
+        sy = np.bincount(inverse, weights=g, minlength=n)
+        sxy = np.bincount(inverse, weights=x * g, minlength=n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            average = np.where(weight_sum > 0, weighted / weight_sum, np.nan)
+            denominator = count * sxx - sx * sx
+            slope = np.where(
+                denominator > 0, (count * sxy - sx * sy) / denominator, 0.0
+            )
+        missing = 1.0 - count / total
+        deficit = np.where(
+            np.isnan(average), 1.0, np.clip((passing - average) / passing, 0, 1)
+        )
+        decline = np.clip(-slope / MAX_DECLINE_PER_UNIT, 0, 1)
+        score = (
+            RISK_WEIGHTS[0] * deficit
+            + RISK_WEIGHTS[1] * missing
+            + RISK_WEIGHTS[2] * decline
+        )
+        columns = zip(
+            students,
+            average.tolist(),
+            missing.tolist(),
+            slope.tolist(),
+            score.tolist(),
+        )
+    else:
+        sums = [[0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0] for _ in range(n)]
+        for i, grade, weight, order in zip(
+            inverse, scores.grade, scores.task_weight, scores.unit_order
+        ):
+            acc = sums[i]
+            acc[0] += 1
+            if grade == grade:
+                acc[1] += 1
+                acc[2] += weight
+                acc[3] += weight * grade
+                acc[4] += order
+                acc[5] += order * order
+                acc[6] += grade
+                acc[7] += order * grade
+        columns = []
+        for student_id, (total, count, ws, wg, sx, sxx, sy, sxy) in zip(students, sums):
+            average = wg / ws if ws else math.nan
+            denominator = count * sxx - sx * sx
+            slope = (count * sxy - sx * sy) / denominator if denominator > 0 else 0.0
+            missing = 1.0 - count / total
+            deficit = 1.0 if ws == 0 else min(max((passing - average) / passing, 0), 1)
+            decline = min(max(-slope / MAX_DECLINE_PER_UNIT, 0), 1)
+            score = (
+                RISK_WEIGHTS[0] * deficit
+                + RISK_WEIGHTS[1] * missing
+                + RISK_WEIGHTS[2] * decline
+            )
+            columns.append((student_id, average, missing, slope, score))
+    results = [
+        RiskScore(
+            student_id=int(student_id),
+            average=None if math.isnan(average) else average,
+            missing_rate=missing,
+            trend=slope,
+            score=score,
+            at_risk=score >= threshold,
+        )
+        for student_id, average, missing, slope, score in columns
+    ]
+    results.sort(key=lambda r: r.score, reverse=True)
+    return results
+
+
+def _column(values: Sequence, kind: type):
+    if np is not None:
+        if kind is int:
+            return np.fromiter(values, dtype=np.int64, count=len(values))
+        return np.array(
+            [math.nan if v is None else float(v) for v in values], dtype=float
+        )
+    if kind is int:
+        return list(values)
+    return [math.nan if v is None else float(v) for v in values]
+
+
+def _graded(values):
+    if np is not None:
+        data = np.asarray(values, dtype=float)
+        return data[~np.isnan(data)]
+    return [v for v in values if v == v]
+
+
+def _mean(values) -> Optional[float]:
+    if not len(values):
+        return None
+    if np is not None:
+        return float(np.mean(values))
+    return sum(values) / len(values)
+
+
+def _zip_keys(first, second):
+    if np is not None:
+        return np.rec.fromarrays([first, second])
+    return list(zip(first, second))
+
+
+def _group(keys) -> Tuple[List, Any]:
+    """Claves únicas ordenadas y, por fila, el índice de su grupo."""
+    if np is not None:
+        unique, inverse = np.unique(keys, return_inverse=True)
+        return [k.item() if hasattr(k, "item") else k for k in unique], inverse
+    unique = sorted(set(keys))
+    position = {key: i for i, key in enumerate(unique)}
+    return unique, [position[key] for key in keys]
+
+
+def _split(inverse, values, groups: int) -> List:
+    """Parte ``values`` por grupo según ``inverse``."""
+    if np is not None:
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.cumsum(np.bincount(inverse, minlength=groups))[:-1]
+        return np.split(values[order], bounds)
+    parts: List[List[float]] = [[] for _ in range(groups)]
+    for i, value in zip(inverse, values):
+        parts[i].append(value)
+    return parts
+
+
+def _moving_average_skipping_none(
+    values: List[Optional[float]], window: int
+) -> List[Optional[float]]:
+    present = [v for v in values if v is not None]
+    smoothed = iter(moving_average(present, window))
+    return [None if v is None else next(smoothed) for v in values]
+
+
+if __name__ == "__main__":
+    from schoolar_control_api.database.connection import get_session
+
+    parser = argparse.ArgumentParser(
+        description="Analítica de avance de estudiantes por curso o grado."
+    )
+    scope = parser.add_mutually_exclusive_group(required=True)
+    scope.add_argument("--course-id", type=int)
+    scope.add_argument("--degree-id", type=int)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    args = parser.parse_args()
+    with get_session() as session:
+        start = time.perf_counter()
+        scores = load_scores(
+            session, course_id=args.course_id, degree_id=args.degree_id
+        )
+        loaded = time.perf_counter()
+    dist = distribution(scores)
+    units = unit_progress(scores)
+    risks = at_risk(scores, threshold=args.threshold)
+    done = time.perf_counter()
+    backend = "numpy" if np is not None else "python"
+    print(
+        f"rows: {len(scores)}  load: {(loaded - start) * 1000:.1f} ms  "
+        f"compute ({backend}): {(done - loaded) * 1000:.1f} ms"
+    )
+    print(f"grades: {dist.count}  mean: {dist.mean}  percentiles: {dist.percentiles}")
+    print(f"histogram: {dist.counts}")
+    for unit in units:
+        print(
+            f"unit {unit.order_index:>2} (id {unit.unit_id}): mean {unit.mean} "
+            f"median {unit.median} completion {unit.completion:.0%}"
+        )
+    flagged = [r for r in risks if r.at_risk]
+    print(f"at risk: {len(flagged)} of {len(risks)} students")
+    for risk in flagged[:20]:
+        print(
+            f"  student {risk.student_id}: score {risk.score:.2f} "
+            f"average {risk.average} missing {risk.missing_rate:.0%} "
+            f"trend {risk.trend:+.2f}"
+        )
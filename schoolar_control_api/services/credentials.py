@@ -0,0 +1,532 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database.connection import get_session
+from schoolar_control_api.database.models import User
+from schoolar_control_api.database.repository import RepositoryError
+
+ALGORITHM = "scrypt"
+MIN_PASSWORD_LENGTH = 7
+MAX_ENCODED_LENGTH = User.__table__.c.password.type.length
+
+_executor: Optional[ThreadPoolExecutor] = None
+_slots: Optional[threading.BoundedSemaphore] = None
+_max_workers: Optional[int] = None
+_max_pending: Optional[int] = None
+_dummy_hashes: Dict["HashingParameters", str] = {}
+_lock = threading.Lock()
+
+
+class CredentialError(Exception):
+    """Excepción para errores en el manejo de credenciales."""
+
+    pass
+
+
+@dataclass(frozen=True)
+class HashingParameters:
+    """
+    Parámetros de costo de scrypt.
+
+    ``n`` controla el costo de CPU y memoria (128 * n * r bytes por hash), ``r``
+    el tamaño de bloque y ``p`` el paralelismo.
+
+    :raises ValueError: Si el hash resultante no cabe en ``User.password``.
+    """
+
+    n: int = 2**14
+    r: int = 8
+    p: int = 1
+    salt_size: int = 16
+    key_length: int = 32
+
+    def __post_init__(self):
+        if self.encoded_length > MAX_ENCODED_LENGTH:
+            raise ValueError(
+                f"Hash length {self.encoded_length} exceeds the "
+                f"{MAX_ENCODED_LENGTH} characters of User.password"
+            )
+
+    @property
+    def maxmem(self) -> int:
+        return 128 * self.n * self.r * self.p + 1024 * 1024
+
+    @property
+    def encoded_length(self) -> int:
+        """Caracteres del hash codificado con estos parámetros."""
+        fields = [ALGORITHM, str(self.n), str(self.r), str(self.p)]
+        encoded = sum(-(-size * 4 // 3) for size in (self.salt_size, self.key_length))
+        return sum(map(len, fields)) + encoded + 5
+
+
+DEFAULT_PARAMETERS = HashingParameters()
+
+
+def hash_password(
+    password: str, parameters: HashingParameters = DEFAULT_PARAMETERS
+) -> str:
+    """
+    Calcula el hash de una contraseña.
+
+    :param password: Contraseña en texto plano.
+    :param parameters: Parámetros de costo.
+    :return: Hash con formato ``scrypt$n$r$p$sal$hash``.
+    :raises CredentialError: Si la contraseña es demasiado corta.
+    """
+    if len(password) < MIN_PASSWORD_LENGTH:
+        raise CredentialError(
+            f"Password must have at least {MIN_PASSWORD_LENGTH} characters"
+        )
+    salt = secrets.token_bytes(parameters.salt_size)
+    key = _derive(password, salt, parameters)
+    return "$".join(
+        [
+            ALGORITHM,
+            str(parameters.n),
+            str(parameters.r),
+            str(parameters.p),
+            _encode(salt),
+            _encode(key),
+        ]
+    )
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    """
+    Verifica una contraseña contra su hash en tiempo constante.
+
+    :param password: Contraseña en texto plano.
+    :param encoded: Hash almacenado.
+    :return: True si la contraseña coincide.
+    """
+    parsed = _parse(encoded)
+    if parsed is None:
+        return False
+    parameters, salt, key = parsed
+    try:
+        candidate = _derive(password, salt, parameters)
+    except ValueError:
+        # scrypt rechaza los parámetros almacenados (``n`` no es potencia de dos).
+        return False
+    return hmac.compare_digest(candidate, key)
+
+
+def is_hashed(value: str) -> bool:
+    """Indica si el valor ya es un hash con el formato de este módulo."""
+    return _parse(value) is not None
+
+
+def needs_rehash(
+    encoded: str, parameters: HashingParameters = DEFAULT_PARAMETERS
+) -> bool:
+    """Indica si el hash fue calculado con parámetros distintos a los actuales."""
+    parsed = _parse(encoded)
+    if parsed is None:
+        return True
+    current, salt, key = parsed
+    return (current.n, current.r, current.p, len(key)) != (
+        parameters.n,
+        parameters.r,
+        parameters.p,
+        parameters.key_length,
+    )
+
+
+def configure_pool(
+    max_workers: Optional[int] = None, max_pending: Optional[int] = None
+) -> None:
+    """
+    Configura el pool de hilos que comparten todas las instancias de
+    ``CredentialService`` del proceso.
+
+    Si ya existía un pool, se esperan sus operaciones pendientes y se creará uno
+    nuevo con la nueva configuración en el siguiente uso.
+
+    :param max_workers: Hilos del pool (por defecto, número de núcleos).
+    :param max_pending: Operaciones admitidas a la vez, en curso o en cola
+        (por defecto, cuatro por hilo).
+
+    Ejemplos:
+        configure_pool(max_workers=4, max_pending=32)
+    """
+    global _max_workers, _max_pending
+    with _lock:
+        _shutdown_pool()
+        _max_workers = max_workers
+        _max_pending = max_pending
+
+
+def shutdown_pool() -> None:
+    """Espera las operaciones pendientes y libera los hilos del pool."""
+    with _lock:
+        _shutdown_pool()
+
+
+class CredentialService:
+    def __init__(
+        self,
+        session: Session,
+        parameters: HashingParameters = DEFAULT_PARAMETERS,
+        queue_timeout: Optional[float] = 5.0,
+    ):
+        """
+        Servicio de credenciales que calcula los hashes en un pool acotado de hilos.
+
+        ``hashlib.scrypt`` libera el GIL, por lo que los hilos del pool usan
+        varios núcleos sin bloquear el hilo que atiende la petición. El pool, su
+        límite de operaciones pendientes y el hash ficticio son del proceso (ver
+        ``configure_pool``), de modo que crear un servicio por petición es barato.
+
+        :param session: Sesión de SQLAlchemy.
+        :param parameters: Parámetros de costo del hash.
+        :param queue_timeout: Segundos a esperar un lugar libre antes de fallar;
+            None espera indefinidamente.
+        """
+        self._session = session
+        self._parameters = parameters
+        self._queue_timeout = queue_timeout
+
+    def submit_hash(self, password: str) -> "Future[str]":
+        """Calcula el hash de una contraseña en el pool."""
+        return self._submit(hash_password, password, self._parameters)
+
+    def submit_verify(self, password: str, encoded: str) -> "Future[bool]":
+        """Verifica una contraseña en el pool."""
+        return self._submit(verify_password, password, encoded)
+
+    def set_password(self, user: User, password: str) -> User:
+        """
+        Asigna a un usuario el hash de la contraseña indicada.
+
+        La entidad queda modificada en la sesión; confirmar la transacción le
+        corresponde al llamador (por ejemplo, mediante ``Repository.add``).
+
+        :param user: Usuario a modificar.
+        :param password: Nueva contraseña en texto plano.
+        :return: El mismo usuario.
+        """
+        user.password = self.submit_hash(password).result()
+        return user
+
+    def authenticate(self, login: str, password: str) -> Optional[User]:
+        """
+        Verifica las credenciales de un usuario por nombre de usuario o correo.
+
+        Si el hash almacenado usa parámetros anteriores, se recalcula y guarda.
+        Las contraseñas heredadas en texto plano se comparan en tiempo constante
+        y, si coinciden, se reemplazan por su hash. Para usuarios inexistentes y
+        contraseñas heredadas se verifica además un hash ficticio, de modo que el
+        tiempo de respuesta no revela qué cuentas existen.
+
+        :param login: Nombre de usuario o correo electrónico.
+        :param password: Contraseña en texto plano.
+        :return: El usuario autenticado o None si las credenciales no son válidas.
+        :raises RepositoryError: Si ocurre un error al consultar o guardar.
+        """
+        user = self._find_user(login)
+        verified = self._submit(
+            _verify_stored, password, self._stored_hash(user), self._parameters
+        ).result()
+        user = self._authenticated(user, password, verified)
+        if user is not None and needs_rehash(user.password, self._parameters):
+            self._save_password(user, self.submit_hash(password).result())
+        return user
+
+    async def authenticate_async(self, login: str, password: str) -> Optional[User]:
+        """
+        Versión asíncrona de ``authenticate``.
+
+        La sesión se usa en el hilo del bucle; la espera de un lugar libre en el
+        pool y todos los hashes, incluido el ficticio, se resuelven fuera de él.
+        """
+        user = self._find_user(login)
+        verified = await self._submit_async(
+            _verify_stored, password, self._stored_hash(user), self._parameters
+        )
+        user = self._authenticated(user, password, verified)
+        if user is not None and needs_rehash(user.password, self._parameters):
+            encoded = await self._submit_async(
+                hash_password, password, self._parameters
+            )
+            self._save_password(user, encoded)
+        return user
+
+    def _submit(self, fn, *args) -> Future:
+        executor, slots = _get_pool()
+        if not slots.acquire(timeout=self._queue_timeout):
+            raise CredentialError("Credential pool is saturated")
+        return _dispatch(executor, slots, fn, *args)
+
+    async def _submit_async(self, fn, *args):
+        executor, slots = _get_pool()
+        if not slots.acquire(blocking=False):
+            loop = asyncio.get_running_loop()
+            waiting = loop.run_in_executor(
+                None, slots.acquire, True, self._queue_timeout
+            )
+            try:
+                acquired = await asyncio.shield(waiting)
+            except asyncio.CancelledError:
+                # El lugar puede obtenerse después de cancelar; se devuelve.
+                waiting.add_done_callback(
+                    lambda f: f.cancelled() or not f.result() or slots.release()
+                )
+                raise
+            if not acquired:
+                raise CredentialError("Credential pool is saturated")
+        return await asyncio.wrap_future(_dispatch(executor, slots, fn, *args))
+
+    def _stored_hash(self, user: Optional[User]) -> Optional[str]:
+        # None indica que se verifique el hash ficticio, que se calcula en el pool.
+        if user is None or not is_hashed(user.password):
+            return None
+        return user.password
+
+    def _authenticated(
+        self, user: Optional[User], password: str, verified: bool
+    ) -> Optional[User]:
+        if user is None:
+            return None
+        if not is_hashed(user.password):
+            verified = _legacy_matches(password, user.password)
+        return user if verified else None
+
+    def _find_user(self, login: str) -> Optional[User]:
+        try:
+            stmt = select(User).where(or_(User.username == login, User.email == login))
+            return self._session.execute(stmt).scalar_one_or_none()
+        except SQLAlchemyError as e:
+            raise RepositoryError("Error retrieving User") from e
+
+    def _save_password(self, user: User, encoded: str) -> None:
+        try:
+            user.password = encoded
+            self._session.commit()
+        except SQLAlchemyError as e:
+            self._session.rollback()
+            raise RepositoryError("Error updating User") from e
+
+
+@event.listens_for(User, "before_insert")
+@event.listens_for(User, "before_update")
+def _hash_plain_password(mapper, connection, target: User) -> None:
+    # Red de seguridad: nunca se escribe una contraseña nueva en texto plano. Lo
+    # recomendable es usar CredentialService.set_password para no calcular el
+    # hash en el hilo que hace el flush. Las contraseñas heredadas sólo cambian
+    # al autenticarse o con ``hash_plaintext_passwords``, no al modificar otra
+    # columna del usuario.
+    if not inspect(target).attrs.password.history.has_changes():
+        return
+    if target.password is not None and not is_hashed(target.password):
+        target.password = hash_password(target.password)
+
+
+def hash_plaintext_passwords(
+    session: Session,
+    parameters: HashingParameters = DEFAULT_PARAMETERS,
+    batch_size: int = 100,
+) -> int:
+    """
+    Reemplaza por su hash las contraseñas heredadas en texto plano.
+
+    Migración de una sola vez; cada lote se confirma por separado. Las cuentas
+    que no se migren siguen pudiendo autenticarse (ver
+    ``CredentialService.authenticate``).
+
+    :param session: Sesión de SQLAlchemy.
+    :param parameters: Parámetros de costo del hash.
+    :param batch_size: Usuarios por transacción.
+    :return: Número de contraseñas reemplazadas.
+    :raises RepositoryError: Si ocurre un error al consultar o guardar.
+    """
+    migrated = 0
+    last_id = 0
+    try:
+        while True:
+            users = (
+                session.execute(
+                    select(User)
+                    .where(User.id > last_id, User.password.not_like(f"{ALGORITHM}$%"))
+                    .order_by(User.id)
+                    .limit(batch_size)
+                )
+                .scalars()
+                .all()
+            )
+            if not users:
+                return migrated
+            for user in users:
+                if not is_hashed(user.password):
+                    user.password = hash_password(user.password, parameters)
+                    migrated += 1
+            session.commit()
+            last_id = users[-1].id
+    except SQLAlchemyError as e:
+        session.rollback()
+        raise RepositoryError("Error updating User") from e
+
+
+def benchmark(
+    workers: int,
+    logins: int = 200,
+    parameters: HashingParameters = DEFAULT_PARAMETERS,
+) -> float:
+    """
+    Mide verificaciones de contraseña por segundo con un pool de ``workers`` hilos.
+
+    :param workers: Número de hilos del pool.
+    :param logins: Número de verificaciones a ejecutar.
+    :param parameters: Parámetros de costo del hash.
+    :return: Verificaciones por segundo.
+    """
+    encoded = hash_password("benchmark-password", parameters)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        start = time.perf_counter()
+        results = list(
+            executor.map(
+                verify_password, ["benchmark-password"] * logins, [encoded] * logins
+            )
+        )
+        elapsed = time.perf_counter() - start
+    if not all(results):
+        raise CredentialError("Benchmark verification failed")
+    return logins / elapsed
+
+
+def _get_pool() -> Tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    global _executor, _slots
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = _max_workers or os.cpu_count() or 1
+                _slots = threading.BoundedSemaphore(_max_pending or workers * 4)
+                _executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="credentials"
+                )
+    return _executor, _slots
+
+
+def _dispatch(
+    executor: ThreadPoolExecutor, slots: threading.BoundedSemaphore, fn, *args
+) -> Future:
+    # El lugar ya fue adquirido; se libera al terminar la operación.
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def _shutdown_pool() -> None:
+    global _executor, _slots
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+    _executor = _slots = None
+
+
+def _dummy_hash(parameters: HashingParameters) -> str:
+    # Se calcula una vez por proceso y conjunto de parámetros.
+    encoded = _dummy_hashes.get(parameters)
+    if encoded is None:
+        encoded = hash_password(secrets.token_urlsafe(16), parameters)
+        _dummy_hashes.setdefault(parameters, encoded)
+    return _dummy_hashes[parameters]
+
+
+def _verify_stored(
+    password: str, encoded: Optional[str], parameters: HashingParameters
+) -> bool:
+    # Se ejecuta en el pool: el hash ficticio también se calcula fuera del hilo
+    # que atiende la petición.
+    return verify_password(password, encoded or _dummy_hash(parameters))
+
+
+def _legacy_matches(password: str, stored: str) -> bool:
+    # Se comparan los resúmenes para no revelar la longitud de la contraseña.
+    return hmac.compare_digest(
+        hashlib.sha256(password.encode("utf-8")).digest(),
+        hashlib.sha256(stored.encode("utf-8")).digest(),
+    )
+
+
+def _derive(password: str, salt: bytes, parameters: HashingParameters) -> bytes:
+    return hashlib.scrypt(
+        password.encode("utf-8"),
+        salt=salt,
+        n=parameters.n,
+        r=parameters.r,
+        p=parameters.p,
+        maxmem=parameters.maxmem,
+        dklen=parameters.key_length,
+    )
+
+
+def _parse(encoded: str):
+    parts = encoded.split("$")
+    if len(parts) != 6 or parts[0] != ALGORITHM:
+        return None
+    try:
+        salt = _decode(parts[4])
+        key = _decode(parts[5])
+        parameters = HashingParameters(
+            n=int(parts[1]),
+            r=int(parts[2]),
+            p=int(parts[3]),
+            salt_size=len(salt),
+            key_length=len(key),
+        )
+    except ValueError:
+        return None
+    return parameters, salt, key
+
+
+def _encode(value: bytes) -> str:
+    return base64.b64encode(value).decode("ascii").rstrip("=")
+
+
+def _decode(value: str) -> bytes:
+    return base64.b64decode(value + "=" * (-len(value) % 4), validate=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mide verificaciones de contraseña por segundo y por núcleo."
+    )
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--n", type=int, default=DEFAULT_PARAMETERS.n)
+    parser.add_argument("--r", type=int, default=DEFAULT_PARAMETERS.r)
+    parser.add_argument("--p", type=int, default=DEFAULT_PARAMETERS.p)
+    parser.add_argument(
+        "--hash-plaintext",
+        action="store_true",
+        help="Reemplaza por su hash las contraseñas heredadas en texto plano.",
+    )
+    args = parser.parse_args()
+    params = HashingParameters(n=args.n, r=args.r, p=args.p)
+    if args.hash_plaintext:
+        with get_session() as session:
+            print(f"{hash_plaintext_passwords(session, params)} passwords hashed")
+        sys.exit(0)
+    cores = os.cpu_count() or 1
+    for count in sorted({1, max(cores // 2, 1), cores}):
+        rate = benchmark(count, args.logins, params)
+        print(
+            f"{count} workers: {rate:.1f} logins/s, {rate / count:.1f} logins/s per core"
+        )
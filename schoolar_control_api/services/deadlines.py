@@ -0,0 +1,175 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, exists, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database.models import CourseEnrollment, Task, TaskSubmission
+from schoolar_control_api.database.repository import RepositoryError
+
+
+@dataclass(frozen=True)
+class Reminder:
+    """Recordatorio para un estudiante que aún no entrega una tarea próxima a vencer."""
+
+    task_id: int
+    student_id: int
+    due_date: datetime
+
+
+@dataclass
+class DeadlineRunResult:
+    """Resultado de una ejecución del programador de vencimientos."""
+
+    late_submissions: int = 0
+    overdue_tasks: int = 0
+    chunks: int = 0
+    reminders: List[Reminder] = field(default_factory=list)
+
+
+class DeadlineScheduler:
+    def __init__(
+        self,
+        session: Session,
+        chunk_size: int = 500,
+        lookback: timedelta = timedelta(days=7),
+        horizon: timedelta = timedelta(hours=24),
+    ):
+        """
+        Inicializa el programador de vencimientos de tareas.
+
+        Las tareas se recorren por rangos de ``Task.due_date`` (índice
+        ``ix_tasks_due_date``) en bloques de ``chunk_size`` y cada bloque se
+        confirma por separado, de modo que ningún bloqueo dura más que un bloque.
+
+        :param session: Sesión de SQLAlchemy.
+        :param chunk_size: Número máximo de tareas procesadas por transacción.
+        :param lookback: Ventana hacia atrás en la que se buscan entregas tardías.
+        :param horizon: Ventana hacia adelante para generar recordatorios.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be greater than zero")
+        self._session = session
+        self._chunk_size = chunk_size
+        self._lookback = lookback
+        self._horizon = horizon
+
+    def mark_late_submissions(
+        self, now: Optional[datetime] = None
+    ) -> Tuple[int, int, int]:
+        """
+        Cambia a ``late`` las entregas ``submitted`` realizadas después del
+        vencimiento de tareas vencidas dentro de la ventana ``lookback``.
+
+        :param now: Instante de referencia (por defecto ``datetime.utcnow()``).
+        :return: Tupla (entregas marcadas, tareas vencidas revisadas, bloques).
+        :raises RepositoryError: Si ocurre un error durante la actualización.
+        """
+        now = now or datetime.utcnow()
+        due_date = (
+            select(Task.due_date)
+            .where(Task.id == TaskSubmission.task_id)
+            .scalar_subquery()
+        )
+        marked = overdue = chunks = 0
+        try:
+            for task_ids in self._iter_task_chunks(now - self._lookback, now):
+                stmt = (
+                    update(TaskSubmission)
+                    .where(
+                        TaskSubmission.task_id.in_(task_ids),
+                        TaskSubmission.status == "submitted",
+                        TaskSubmission.submitted_at > due_date,
+                    )
+                    .values(status="late")
+                    .execution_options(synchronize_session=False)
+                )
+                result = self._session.execute(stmt)
+                self._session.commit()
+                marked += result.rowcount
+                overdue += len(task_ids)
+                chunks += 1
+        except SQLAlchemyError as e:
+            self._session.rollback()
+            raise RepositoryError("Error marking late TaskSubmission") from e
+        return marked, overdue, chunks
+
+    def pending_reminders(self, now: Optional[datetime] = None) -> List[Reminder]:
+        """
+        Obtiene los estudiantes con inscripción activa que no han entregado
+        tareas que vencen dentro de la ventana ``horizon``.
+
+        :param now: Instante de referencia (por defecto ``datetime.utcnow()``).
+        :return: Lista de recordatorios ordenada por vencimiento y tarea.
+        :raises RepositoryError: Si ocurre un error durante la consulta.
+        """
+        now = now or datetime.utcnow()
+        reminders: List[Reminder] = []
+        try:
+            for task_ids in self._iter_task_chunks(now, now + self._horizon):
+                submitted = exists().where(
+                    TaskSubmission.task_id == Task.id,
+                    TaskSubmission.student_id == CourseEnrollment.student_id,
+                )
+                stmt = (
+                    select(Task.id, CourseEnrollment.student_id, Task.due_date)
+                    .join(
+                        CourseEnrollment, CourseEnrollment.course_id == Task.course_id
+                    )
+                    .where(
+                        Task.id.in_(task_ids),
+                        CourseEnrollment.status == "active",
+                        ~submitted,
+                    )
+                    .order_by(Task.due_date, Task.id, CourseEnrollment.student_id)
+                )
+                reminders.extend(
+                    Reminder(task_id, student_id, due)
+                    for task_id, student_id, due in self._session.execute(stmt)
+                )
+        except SQLAlchemyError as e:
+            raise RepositoryError("Error retrieving Task reminders") from e
+        return reminders
+
+    def run(self, now: Optional[datetime] = None) -> DeadlineRunResult:
+        """
+        Ejecuta una pasada completa: marca entregas tardías y genera recordatorios.
+
+        Pensado para ejecutarse periódicamente (por ejemplo, cada minuto).
+
+        :param now: Instante de referencia (por defecto ``datetime.utcnow()``).
+        :return: Resumen de la ejecución.
+        """
+        now = now or datetime.utcnow()
+        marked, overdue, chunks = self.mark_late_submissions(now)
+        return DeadlineRunResult(
+            late_submissions=marked,
+            overdue_tasks=overdue,
+            chunks=chunks,
+            reminders=self.pending_reminders(now),
+        )
+
+    def _iter_task_chunks(self, start: datetime, end: datetime) -> Iterator[List[int]]:
+        """Recorre los ids de tareas con ``start <= due_date < end`` por paginación de clave."""
+        last: Optional[Tuple[datetime, int]] = None
+        while True:
+            stmt = select(Task.id, Task.due_date).where(
+                Task.due_date >= start, Task.due_date < end
+            )
+            if last is not None:
+                stmt = stmt.where(
+                    or_(
+                        Task.due_date > last[0],
+                        and_(Task.due_date == last[0], Task.id > last[1]),
+                    )
+                )
+            stmt = stmt.order_by(Task.due_date, Task.id).limit(self._chunk_size)
+            rows = self._session.execute(stmt).all()
+            if not rows:
+                return
+            yield [row.id for row in rows]
+            if len(rows) < self._chunk_size:
+                return
+            last = (rows[-1].due_date, rows[-1].id)
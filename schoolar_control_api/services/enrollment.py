@@ -0,0 +1,398 @@
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database.connection import get_session
+from schoolar_control_api.database.models import Course, CourseEnrollment
+from schoolar_control_api.database.repository import RepositoryError
+
+ACTIVE = "active"
+WAITLISTED = "waitlisted"
+DROPPED = "dropped"
+FULL = "full"
+
+_courses = Course.__table__
+_enrollments = CourseEnrollment.__table__
+
+
+class EnrollmentService:
+    def __init__(self, session: Session):
+        """
+        Inscribe estudiantes respetando el cupo de cada curso.
+
+        El cupo se reserva con un único UPDATE condicional sobre
+        ``Course.enrolled_count`` (``enrolled_count < capacity``), de modo que
+        las inscripciones concurrentes al mismo curso sólo compiten por el
+        bloqueo de esa fila durante una sentencia, sin ``COUNT`` previo ni
+        bloqueos de tabla. Las inscripciones se escriben con sentencias del
+        núcleo para que los eventos de ``counters`` no cuenten el lugar dos veces.
+
+        :param session: Sesión de SQLAlchemy.
+        """
+        self._session = session
+
+    def enroll(self, student_id: int, course_id: int, waitlist: bool = True) -> str:
+        """
+        Inscribe a un estudiante en un curso y confirma la transacción.
+
+        Si el curso no tiene lugares, el estudiante queda en lista de espera
+        (o no se inscribe si ``waitlist`` es False); antes de confirmar se
+        vuelve a promover la lista por si una baja simultánea liberó un lugar.
+        Repetir la llamada para un estudiante ya inscrito o en espera devuelve
+        su estado actual.
+
+        :param student_id: Id del estudiante.
+        :param course_id: Id del curso.
+        :param waitlist: Si se permite quedar en lista de espera.
+        :return: ``active``, ``waitlisted`` o ``full``.
+        :raises RepositoryError: Si ocurre un error durante la inscripción.
+        """
+        try:
+            current = self._current_status(student_id, course_id)
+            if current is not None and current != DROPPED:
+                self._session.rollback()
+                return current
+            if self._claim_seat(course_id):
+                status = ACTIVE
+            elif waitlist:
+                status = WAITLISTED
+            else:
+                self._session.rollback()
+                return FULL
+            self._place(student_id, course_id, status, exists=current is not None)
+            if status == WAITLISTED:
+                # Una baja concurrente pudo liberar un lugar después del UPDATE
+                # fallido, sin ver todavía esta fila en espera: con la fila del
+                # curso bloqueada se vuelve a intentar la promoción.
+                self._lock_course(course_id)
+                if student_id in self._promote(course_id):
+                    status = ACTIVE
+            self._session.commit()
+            return status
+        except SQLAlchemyError as e:
+            self._session.rollback()
+            raise RepositoryError("Error enrolling CourseEnrollment") from e
+
+    def drop(self, student_id: int, course_id: int) -> List[int]:
+        """
+        Da de baja a un estudiante de un curso o de su lista de espera y, si
+        libera un lugar, promueve a los siguientes estudiantes en espera.
+
+        :param student_id: Id del estudiante.
+        :param course_id: Id del curso.
+        :return: Ids de los estudiantes promovidos.
+        :raises RepositoryError: Si ocurre un error durante la baja.
+        """
+        try:
+            current = self._current_status(student_id, course_id, lock=True)
+            if current not in (ACTIVE, WAITLISTED):
+                self._session.rollback()
+                return []
+            self._set_status(student_id, course_id, DROPPED, current)
+            promoted = []
+            if current == ACTIVE:
+                self._release_seat(course_id)
+                promoted = self._promote(course_id)
+            self._session.commit()
+            return promoted
+        except SQLAlchemyError as e:
+            self._session.rollback()
+            raise RepositoryError("Error dropping CourseEnrollment") from e
+
+    def promote(self, course_id: int) -> List[int]:
+        """
+        Promueve estudiantes de la lista de espera mientras haya lugares, por
+        ejemplo tras aumentar el cupo del curso.
+
+        :param course_id: Id del curso.
+        :return: Ids de los estudiantes promovidos, en orden de espera.
+        :raises RepositoryError: Si ocurre un error durante la promoción.
+        """
+        try:
+            promoted = self._promote(course_id)
+            self._session.commit()
+            return promoted
+        except SQLAlchemyError as e:
+            self._session.rollback()
+            raise RepositoryError("Error promoting CourseEnrollment") from e
+
+    def waitlist(self, course_id: int) -> List[int]:
+        """Devuelve los ids de los estudiantes en espera, en orden de llegada."""
+        try:
+            stmt = (
+                select(CourseEnrollment.student_id)
+                .where(
+                    CourseEnrollment.course_id == course_id,
+                    CourseEnrollment.status == WAITLISTED,
+                )
+                .order_by(CourseEnrollment.enrollment_date, CourseEnrollment.student_id)
+            )
+            return list(self._session.execute(stmt).scalars())
+        except SQLAlchemyError as e:
+            raise RepositoryError("Error retrieving CourseEnrollment") from e
+
+    def _current_status(
+        self, student_id: int, course_id: int, lock: bool = False
+    ) -> Optional[str]:
+        stmt = select(_enrollments.c.status).where(
+            _enrollments.c.student_id == student_id,
+            _enrollments.c.course_id == course_id,
+        )
+        if lock:
+            stmt = stmt.with_for_update()
+        return self._session.execute(stmt).scalar_one_or_none()
+
+    def _lock_course(self, course_id: int) -> None:
+        self._session.execute(
+            select(_courses.c.id).where(_courses.c.id == course_id).with_for_update()
+        )
+
+    def _claim_seat(self, course_id: int) -> bool:
+        stmt = (
+            update(_courses)
+            .where(
+                _courses.c.id == course_id,
+                _courses.c.deleted_at.is_(None),
+                or_(
+                    _courses.c.capacity.is_(None),
+                    _courses.c.enrolled_count < _courses.c.capacity,
+                ),
+            )
+            .values(
+                {
+                    "enrolled_count": _courses.c.enrolled_count + 1,
+                    "updated_at": _courses.c.updated_at,
+                }
+            )
+        )
+        if self._session.execute(stmt).rowcount == 1:
+            return True
+        found = self._session.execute(
+            select(_courses.c.id).where(
+                _courses.c.id == course_id, _courses.c.deleted_at.is_(None)
+            )
+        ).first()
+        if found is None:
+            self._session.rollback()
+            raise RepositoryError(f"Course {course_id} not found")
+        return False
+
+    def _release_seat(self, course_id: int) -> None:
+        self._session.execute(
+            update(_courses)
+            .where(_courses.c.id == course_id, _courses.c.enrolled_count > 0)
+            .values(
+                {
+                    "enrolled_count": _courses.c.enrolled_count - 1,
+                    "updated_at": _courses.c.updated_at,
+                }
+            )
+        )
+
+    def _place(
+        self, student_id: int, course_id: int, status: str, exists: bool
+    ) -> None:
+        if not exists:
+            self._session.execute(
+                insert(_enrollments).values(
+                    student_id=student_id, course_id=course_id, status=status
+                )
+            )
+            return
+        # Reinscripción tras una baja: vuelve a la cola con la fecha actual.
+        self._session.execute(
+            update(_enrollments)
+            .where(
+                _enrollments.c.student_id == student_id,
+                _enrollments.c.course_id == course_id,
+            )
+            .values(
+                status=status,
+                enrollment_date=datetime.utcnow(),
+                version=_enrollments.c.version + 1,
+            )
+        )
+
+    def _set_status(
+        self, student_id: int, course_id: int, status: str, current: str
+    ) -> int:
+        return self._session.execute(
+            update(_enrollments)
+            .where(
+                _enrollments.c.student_id == student_id,
+                _enrollments.c.course_id == course_id,
+                _enrollments.c.status == current,
+            )
+            .values(status=status, version=_enrollments.c.version + 1)
+        ).rowcount
+
+    def _promote(self, course_id: int) -> List[int]:
+        promoted = []
+        while True:
+            # SKIP LOCKED permite que dos bajas simultáneas promuevan a
+            # estudiantes distintos en lugar de esperar por el mismo.
+            candidate = self._session.execute(
+                select(_enrollments.c.student_id)
+                .where(
+                    _enrollments.c.course_id == course_id,
+                    _enrollments.c.status == WAITLISTED,
+                )
+                .order_by(_enrollments.c.enrollment_date, _enrollments.c.student_id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).scalar_one_or_none()
+            if candidate is None or not self._claim_seat(course_id):
+                return promoted
+            if self._set_status(candidate, course_id, ACTIVE, WAITLISTED):
+                promoted.append(candidate)
+            else:
+                self._release_seat(course_id)
+
+
+@dataclass
+class StressReport:
+    """Resultado de una prueba de inscripción concurrente."""
+
+    workers: int
+    elapsed: float
+    outcomes: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+    capacity: Optional[int] = None
+    enrolled_count: int = 0
+    active_rows: int = 0
+    waitlisted_rows: int = 0
+
+    @property
+    def consistent(self) -> bool:
+        """El contador coincide con las filas activas y nunca supera el cupo."""
+        within_capacity = self.capacity is None or self.active_rows <= self.capacity
+        no_idle_waitlist = (
+            self.capacity is None
+            or self.waitlisted_rows == 0
+            or self.active_rows == self.capacity
+        )
+        return (
+            self.enrolled_count == self.active_rows
+            and within_capacity
+            and no_idle_waitlist
+        )
+
+
+def stress_test(
+    course_id: int,
+    student_ids: Sequence[int],
+    workers: int = 32,
+    drop_ratio: float = 0.2,
+    session_factory: Callable = get_session,
+    seed: Optional[int] = None,
+) -> StressReport:
+    """
+    Inscribe a muchos estudiantes en el mismo curso desde varios hilos y
+    verifica que el contador, el cupo y la lista de espera quedaron consistentes.
+
+    Una fracción ``drop_ratio`` de los estudiantes se da de baja inmediatamente
+    después de inscribirse, para ejercitar la promoción desde la lista de espera.
+    Escribe en la base de datos configurada: úsese con datos de prueba.
+
+    :param course_id: Curso en el que se inscribe a todos.
+    :param student_ids: Estudiantes a inscribir (no inscritos previamente).
+    :param workers: Número de hilos concurrentes.
+    :param drop_ratio: Fracción de estudiantes que se dan de baja.
+    :param session_factory: Función que abre una sesión como context manager.
+    :param seed: Semilla para elegir a quién se da de baja.
+    :return: Reporte con los resultados y las comprobaciones de consistencia.
+    """
+    rng = random.Random(seed)
+    dropping = set(rng.sample(list(student_ids), int(len(student_ids) * drop_ratio)))
+    outcomes: Counter = Counter()
+    errors = 0
+    lock = threading.Lock()
+
+    def register(student_id: int) -> None:
+        nonlocal errors
+        try:
+            with session_factory() as session:
+                service = EnrollmentService(session)
+                result = service.enroll(student_id, course_id)
+                if student_id in dropping:
+                    service.drop(student_id, course_id)
+                    result = DROPPED
+        except RepositoryError:
+            with lock:
+                errors += 1
+            return
+        with lock:
+            outcomes[result] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(register, student_ids))
+    elapsed = time.perf_counter() - start
+
+    with session_factory() as session:
+        capacity, enrolled_count = session.execute(
+            select(Course.capacity, Course.enrolled_count).where(Course.id == course_id)
+        ).one()
+        rows = dict(
+            session.execute(
+                select(CourseEnrollment.status, func.count())
+                .where(CourseEnrollment.course_id == course_id)
+                .group_by(CourseEnrollment.status)
+            ).all()
+        )
+    return StressReport(
+        workers=workers,
+        elapsed=elapsed,
+        outcomes=dict(outcomes),
+        errors=errors,
+        capacity=capacity,
+        enrolled_count=enrolled_count,
+        active_rows=rows.get(ACTIVE, 0),
+        waitlisted_rows=rows.get(WAITLISTED, 0),
+    )
+
+
+if __name__ == "__main__":
+    from schoolar_control_api.database.models import Student
+
+    parser = argparse.ArgumentParser(
+        description=(
+            "Prueba de inscripción concurrente sobre un curso. "
+            "Escribe en la base de datos configurada."
+        )
+    )
+    parser.add_argument("--course-id", type=int, required=True)
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--drop-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+    with get_session() as session:
+        enrolled = select(CourseEnrollment.student_id).where(
+            CourseEnrollment.course_id == args.course_id
+        )
+        ids = list(
+            session.execute(
+                select(Student.id)
+                .where(Student.id.not_in(enrolled))
+                .order_by(Student.id)
+                .limit(args.students)
+            ).scalars()
+        )
+    report = stress_test(args.course_id, ids, args.workers, args.drop_ratio)
+    print(f"students:   {len(ids)} in {report.elapsed:.2f}s ({report.workers} workers)")
+    print(f"outcomes:   {report.outcomes}, errors: {report.errors}")
+    print(
+        f"capacity:   {report.capacity}, enrolled_count: {report.enrolled_count}, "
+        f"active: {report.active_rows}, waitlisted: {report.waitlisted_rows}"
+    )
+    print(f"consistent: {report.consistent}")
@@ -0,0 +1,550 @@
+import argparse
+import asyncio
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database import connection
+from schoolar_control_api.database.connection import get_session
+from schoolar_control_api.database.models import (
+    AcademicPeriod,
+    Attendance,
+    Base,
+    Course,
+    CourseEnrollment,
+    Degree,
+    EvaluationComponent,
+    Grade,
+    Student,
+    Task,
+    TaskSubmission,
+    Teacher,
+    Unit,
+    User,
+)
+from schoolar_control_api.database.repository import Repository, RepositoryError
+from schoolar_control_api.services.analytics import percentiles
+from schoolar_control_api.services.enrollment import EnrollmentService
+
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+
+# Proporción de cada operación en la mezcla de tráfico.
+TERM_MIX = {
+    "roster_read": 0.55,
+    "roll_call": 0.2,
+    "grade_entry": 0.2,
+    "registration": 0.05,
+}
+REGISTRATION_MIX = {
+    "roster_read": 0.3,
+    "roll_call": 0.0,
+    "grade_entry": 0.05,
+    "registration": 0.65,
+}
+MIXES = {"term": TERM_MIX, "registration": REGISTRATION_MIX}
+
+
+@dataclass(frozen=True)
+class Fixture:
+    """Ids de los datos sintéticos sobre los que opera la carga."""
+
+    course_ids: List[int]
+    student_ids: List[int]
+    submission_ids: List[int]
+    grader_id: int
+
+
+def prepare(
+    session: Session,
+    courses: int = 10,
+    students: int = 500,
+    courses_per_student: int = 3,
+    tasks_per_course: int = 2,
+    capacity: int = 200,
+    seed: Optional[int] = None,
+) -> Fixture:
+    """
+    Crea un grado, un periodo, cursos, estudiantes inscritos y entregas
+    sintéticas para la prueba de carga. Los nombres llevan un prefijo aleatorio,
+    de modo que puede ejecutarse varias veces sobre la misma base de datos.
+
+    :param session: Sesión de SQLAlchemy.
+    :param courses: Número de cursos.
+    :param students: Número de estudiantes.
+    :param courses_per_student: Cursos en los que se inscribe a cada estudiante.
+    :param tasks_per_course: Tareas por curso, con una entrega por inscrito.
+    :param capacity: Cupo de cada curso.
+    :param seed: Semilla para repartir las inscripciones.
+    :return: Ids de los datos creados.
+    """
+    rng = random.Random(seed)
+    tag = uuid.uuid4().hex[:6]
+    now = datetime.utcnow()
+    users = [
+        User(
+            fullname=f"Load test {tag} {i}",
+            username=f"lt{tag}{i}",
+            email=f"lt{tag}{i}@loadtest.local",
+            password="loadtest-password",
+        )
+        for i in range(students + 1)
+    ]
+    session.add_all(users)
+    degree = Degree(name=f"Load test {tag}", description="Datos de prueba de carga")
+    period = AcademicPeriod(
+        name=f"LT-{tag}",
+        start_date=date.today(),
+        end_date=date.today() + timedelta(days=120),
+    )
+    session.add_all([degree, period])
+    session.flush()
+    teacher = Teacher(user_id=users[0].id, specialization="Load testing")
+    session.add(teacher)
+    session.flush()
+    course_rows = [
+        Course(
+            name=f"Load test course {i}",
+            code=f"LT-{tag}-{i}",
+            teacher_id=teacher.id,
+            period_id=period.id,
+            capacity=capacity,
+        )
+        for i in range(courses)
+    ]
+    student_rows = [
+        Student(
+            user_id=user.id,
+            degree_id=degree.id,
+            key_registration=f"LT{tag}{i:06d}",
+        )
+        for i, user in enumerate(users[1:])
+    ]
+    session.add_all(course_rows + student_rows)
+    session.flush()
+    rosters: Dict[int, List[int]] = defaultdict(list)
+    for student in student_rows:
+        for course in rng.sample(course_rows, min(courses_per_student, courses)):
+            if len(rosters[course.id]) < capacity:
+                rosters[course.id].append(student.id)
+    session.add_all(
+        CourseEnrollment(student_id=student_id, course_id=course_id)
+        for course_id, roster in rosters.items()
+        for student_id in roster
+    )
+    submissions = []
+    for course in course_rows:
+        unit = Unit(course_id=course.id, name="Unidad 1", order_index=1)
+        component = EvaluationComponent(course_id=course.id, name="Tareas", weight=50)
+        session.add_all([unit, component])
+        session.flush()
+        for i in range(tasks_per_course):
+            task = Task(
+                course_id=course.id,
+                unit_id=unit.id,
+                component_id=component.id,
+                name=f"Tarea {i + 1}",
+                due_date=now + timedelta(days=7 * (i + 1)),
+            )
+            session.add(task)
+            session.flush()
+            submissions.extend(
+                TaskSubmission(task_id=task.id, student_id=student_id)
+                for student_id in rosters[course.id]
+            )
+    session.add_all(submissions)
+    session.commit()
+    return Fixture(
+        course_ids=[course.id for course in course_rows],
+        student_ids=[student.id for student in student_rows],
+        submission_ids=[submission.id for submission in submissions],
+        grader_id=users[0].id,
+    )
+
+
+def roster_read(session: Session, fixture: Fixture, rng: random.Random) -> None:
+    """Lista de alumnos activos de un curso con sus datos."""
+    course_id = rng.choice(fixture.course_ids)
+    enrollments = Repository(CourseEnrollment, session).get_all(
+        CourseEnrollment.course_id == course_id,
+        CourseEnrollment.status == "active",
+    )
+    student_ids = [enrollment.student_id for enrollment in enrollments]
+    if student_ids:
+        Repository(Student, session).get_all(Student.id.in_(student_ids))
+
+
+def roll_call(session: Session, fixture: Fixture, rng: random.Random) -> None:
+    """Pase de lista: una asistencia por alumno activo, en una transacción."""
+    course_id = rng.choice(fixture.course_ids)
+    student_ids = session.execute(
+        select(CourseEnrollment.student_id).where(
+            CourseEnrollment.course_id == course_id,
+            CourseEnrollment.status == "active",
+        )
+    ).scalars()
+    now = datetime.utcnow()
+    session.add_all(
+        Attendance(
+            course_id=course_id,
+            student_id=student_id,
+            date=now,
+            status=rng.choices(("present", "absent", "late"), (0.85, 0.1, 0.05))[0],
+        )
+        for student_id in student_ids
+    )
+    session.commit()
+
+
+def grade_entry(session: Session, fixture: Fixture, rng: random.Random) -> None:
+    """Captura o corrección de la calificación de una entrega."""
+    submission_id = rng.choice(fixture.submission_ids)
+    score = Decimal(rng.randint(40, 100))
+    repo = Repository(Grade, session)
+    if repo.get(Grade.submission_id == submission_id) is None:
+        repo.add(
+            Grade(
+                submission_id=submission_id,
+                grade=score,
+                graded_by=fixture.grader_id,
+            )
+        )
+    else:
+        repo.update(Grade.submission_id == submission_id, values={"grade": score})
+
+
+def registration(session: Session, fixture: Fixture, rng: random.Random) -> None:
+    """Alta en un curso (o baja, si el alumno ya estaba inscrito)."""
+    service = EnrollmentService(session)
+    student_id = rng.choice(fixture.student_ids)
+    course_id = rng.choice(fixture.course_ids)
+    if service.enroll(student_id, course_id) != "active" or rng.random() < 0.3:
+        service.drop(student_id, course_id)
+
+
+OPERATIONS: Dict[str, Callable[[Session, Fixture, random.Random], None]] = {
+    "roster_read": roster_read,
+    "roll_call": roll_call,
+    "grade_entry": grade_entry,
+    "registration": registration,
+}
+
+
+@dataclass
+class OperationStats:
+    """Resultados de un tipo de operación. Las latencias están en milisegundos."""
+
+    count: int
+    errors: int
+    latency: Dict[float, float]
+    pool_wait: Dict[float, float]
+
+
+@dataclass
+class LoadReport:
+    """Resultado de una prueba de carga."""
+
+    mode: str
+    concurrency: int
+    elapsed: float
+    operations: Dict[str, OperationStats] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    pool: str = ""
+
+    @property
+    def total(self) -> int:
+        return sum(stats.count for stats in self.operations.values())
+
+    @property
+    def throughput(self) -> float:
+        """Operaciones completadas por segundo."""
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        failed = sum(stats.errors for stats in self.operations.values())
+        return failed / self.total if self.total else 0.0
+
+    def format(self) -> str:
+        header = "".join(f"{'p' + str(q):>9}" for q in LATENCY_PERCENTILES)
+        lines = [
+            f"{self.mode}, concurrency {self.concurrency}, {self.elapsed:.1f}s: "
+            f"{self.total} ops, {self.throughput:.1f} ops/s, "
+            f"error rate {self.error_rate:.2%}",
+            f"{'operation':<14}{'count':>7}{'errors':>7}  latency ms{header}"
+            f"  pool wait ms p50/p99",
+        ]
+        for name, stats in sorted(self.operations.items()):
+            latency = "".join(
+                f"{stats.latency.get(q, 0.0):>9.1f}" for q in LATENCY_PERCENTILES
+            )
+            lines.append(
+                f"{name:<14}{stats.count:>7}{stats.errors:>7}  {'':<10}{latency}"
+                f"  {stats.pool_wait.get(50, 0.0):.1f}/{stats.pool_wait.get(99, 0.0):.1f}"
+            )
+        for error, count in sorted(self.errors.items()):
+            lines.append(f"error {error}: {count}")
+        if self.pool:
+            lines.append(f"pool: {self.pool}")
+        return "\n".join(lines)
+
+
+class _Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.pool_wait: Dict[str, List[float]] = defaultdict(list)
+        self.failed: Counter = Counter()
+        self.errors: Counter = Counter()
+
+    def record(
+        self, name: str, latency: float, wait: Optional[float], error: Optional[str]
+    ) -> None:
+        with self._lock:
+            self.latency[name].append(latency * 1000)
+            if wait is not None:
+                self.pool_wait[name].append(wait * 1000)
+            if error is not None:
+                self.failed[name] += 1
+                self.errors[f"{name}: {error}"] += 1
+
+    def report(self, mode: str, concurrency: int, elapsed: float) -> LoadReport:
+        operations = {
+            name: OperationStats(
+                count=len(latencies),
+                errors=self.failed[name],
+                latency=percentiles(latencies, LATENCY_PERCENTILES),
+                pool_wait=percentiles(self.pool_wait[name], LATENCY_PERCENTILES),
+            )
+            for name, latencies in self.latency.items()
+        }
+        return LoadReport(mode, concurrency, elapsed, operations, dict(self.errors))
+
+
+def _execute(
+    name: str,
+    fixture: Fixture,
+    rng: random.Random,
+    session_factory: Callable,
+    recorder: _Recorder,
+    started: float,
+) -> None:
+    # ``started`` es el momento en que se pidió la operación, no en que empezó:
+    # en el modo asíncrono la latencia incluye la espera por un hilo libre.
+    wait = None
+    error = None
+    try:
+        with session_factory() as session:
+            before = time.perf_counter()
+            session.connection()
+            wait = time.perf_counter() - before
+            OPERATIONS[name](session, fixture, rng)
+    except RepositoryError as e:
+        error = e.kind or type(e).__name__
+    except SQLAlchemyError as e:
+        error = type(e).__name__
+    except Exception as e:
+        # Un fallo inesperado en una operación se cuenta; no detiene la prueba.
+        error = type(e).__name__
+    recorder.record(name, time.perf_counter() - started, wait, error)
+
+
+def _chooser(mix: Dict[str, float], rng: random.Random) -> Callable[[], str]:
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    return lambda: rng.choices(names, weights)[0]
+
+
+def run_threads(
+    fixture: Fixture,
+    users: int = 50,
+    duration: float = 30.0,
+    mix: Dict[str, float] = TERM_MIX,
+    think_time: float = 0.0,
+    session_factory: Callable = get_session,
+    seed: Optional[int] = None,
+) -> LoadReport:
+    """
+    Carga de lazo cerrado: ``users`` hilos repiten operaciones de la mezcla,
+    cada uno esperando su respuesta (y ``think_time`` segundos) antes de la
+    siguiente.
+
+    :param fixture: Datos sobre los que se opera (ver ``prepare``).
+    :param users: Hilos concurrentes.
+    :param duration: Segundos de prueba.
+    :param mix: Proporción de cada operación (ver ``TERM_MIX``).
+    :param think_time: Pausa media entre operaciones de un mismo usuario.
+    :param session_factory: Función que abre una sesión como context manager.
+    :param seed: Semilla de la mezcla.
+    :return: Reporte de la prueba.
+    """
+    recorder = _Recorder()
+    deadline = time.perf_counter() + duration
+
+    def user(index: int) -> None:
+        rng = random.Random(None if seed is None else seed + index)
+        choose = _chooser(mix, rng)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            _execute(choose(), fixture, rng, session_factory, recorder, started)
+            if think_time:
+                time.sleep(rng.expovariate(1 / think_time))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        list(executor.map(user, range(users)))
+    return recorder.report("threads", users, time.perf_counter() - start)
+
+
+def run_async(
+    fixture: Fixture,
+    rate: float = 100.0,
+    duration: float = 30.0,
+    concurrency: int = 100,
+    mix: Dict[str, float] = TERM_MIX,
+    session_factory: Callable = get_session,
+    seed: Optional[int] = None,
+) -> LoadReport:
+    """
+    Carga de lazo abierto con asyncio: las peticiones llegan a ``rate`` por
+    segundo (llegadas de Poisson) sin esperar a las anteriores, y se atienden
+    con hasta ``concurrency`` hilos. Si la base de datos no da abasto, la cola
+    crece y la latencia lo refleja, como con usuarios reales.
+
+    :param fixture: Datos sobre los que se opera (ver ``prepare``).
+    :param rate: Peticiones por segundo.
+    :param duration: Segundos durante los que llegan peticiones.
+    :param concurrency: Operaciones ejecutándose a la vez como máximo.
+    :param mix: Proporción de cada operación (ver ``TERM_MIX``).
+    :param session_factory: Función que abre una sesión como context manager.
+    :param seed: Semilla de la mezcla y de las llegadas.
+    :return: Reporte de la prueba.
+    """
+    recorder = _Recorder()
+    rng = random.Random(seed)
+    choose = _chooser(mix, rng)
+
+    async def main() -> float:
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        pending = set()
+        start = time.perf_counter()
+        deadline = start + duration
+        arrival = start
+        try:
+            while arrival < deadline:
+                delay = arrival - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                request_rng = random.Random(rng.random())
+                pending.add(
+                    loop.run_in_executor(
+                        executor,
+                        _execute,
+                        choose(),
+                        fixture,
+                        request_rng,
+                        session_factory,
+                        recorder,
+                        arrival,
+                    )
+                )
+                arrival += rng.expovariate(rate)
+            await asyncio.gather(*pending)
+        finally:
+            executor.shutdown(wait=True)
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(main())
+    return recorder.report("asyncio", concurrency, elapsed)
+
+
+def _local_engine_options(url: str, pool_size: int, max_overflow: int) -> dict:
+    options = {"pool_size": pool_size, "max_overflow": max_overflow}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False, "timeout": 30}
+    return options
+
+
+def _sqlite_setup(engine: Engine) -> None:
+    # SQLite no implementa REGEXP (lo usa la restricción del correo) y sin WAL
+    # los lectores esperarían a cada escritor.
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.create_function(
+            "REGEXP",
+            2,
+            lambda pattern, value: value is not None
+            and bool(re.search(pattern, value)),
+        )
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=(
+            "Prueba de carga del repositorio con tráfico de periodo escolar. "
+            "Crea datos sintéticos en la base de datos indicada."
+        )
+    )
+    parser.add_argument("--url", default="sqlite:///loadtest.db")
+    parser.add_argument("--mode", choices=("threads", "asyncio"), default="threads")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="term")
+    parser.add_argument("--users", type=int, default=50, help="Hilos (threads).")
+    parser.add_argument(
+        "--rate", type=float, default=100.0, help="Peticiones/s (asyncio)."
+    )
+    parser.add_argument("--concurrency", type=int, default=100, help="(asyncio)")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--max-overflow", type=int, default=20)
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--courses", type=int, default=10)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    connection.configure(
+        args.url, **_local_engine_options(args.url, args.pool_size, args.max_overflow)
+    )
+    engine = connection.get_engine()
+    if engine.dialect.name == "sqlite":
+        _sqlite_setup(engine)
+    if not inspect(engine).has_table(Course.__tablename__):
+        Base.metadata.create_all(engine)
+    with get_session() as session:
+        fixture = prepare(
+            session, courses=args.courses, students=args.students, seed=args.seed
+        )
+    if args.mode == "threads":
+        report = run_threads(
+            fixture,
+            args.users,
+            args.duration,
+            MIXES[args.mix],
+            args.think_time,
+            seed=args.seed,
+        )
+    else:
+        report = run_async(
+            fixture,
+            args.rate,
+            args.duration,
+            args.concurrency,
+            MIXES[args.mix],
+            seed=args.seed,
+        )
+    report.pool = engine.pool.status()
+    print(report.format())
@@ -0,0 +1,301 @@
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Set, Union
+
+from sqlalchemy import and_, event, inspect, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+
+from schoolar_control_api.database.connection import SessionLocal, get_session
+from schoolar_control_api.database.models import (
+    Role,
+    Student,
+    Teacher,
+    User,
+    roles_users,
+)
+from schoolar_control_api.database.repository import RepositoryError
+
+_CHANGED_KEY = "permissions_changed_users"
+_ALL = 0
+
+# Columna que identifica al usuario afectado por las sentencias masivas o Core
+# sobre cada tabla.
+_USER_COLUMNS = {
+    roles_users.name: roles_users.c.user_id,
+    User.__tablename__: User.__table__.c.id,
+    Teacher.__tablename__: Teacher.__table__.c.user_id,
+    Student.__tablename__: Student.__table__.c.user_id,
+}
+_MULTI_VALUES = re.compile(r"_m\d+$")
+
+_resolvers: "weakref.WeakSet[PermissionResolver]" = weakref.WeakSet()
+
+
+@dataclass(frozen=True)
+class UserPermissions:
+    """Roles e identidades de un usuario, resueltos una sola vez."""
+
+    user_id: int
+    roles: FrozenSet[str]
+    teacher_id: Optional[int] = None
+    student_id: Optional[int] = None
+
+    @property
+    def is_teacher(self) -> bool:
+        return self.teacher_id is not None
+
+    @property
+    def is_student(self) -> bool:
+        return self.student_id is not None
+
+    def has_role(self, *names: str) -> bool:
+        """Indica si el usuario tiene al menos uno de los roles indicados."""
+        return not self.roles.isdisjoint(names)
+
+
+class PermissionResolver:
+    def __init__(
+        self,
+        session_factory: Callable = get_session,
+        ttl: float = 300.0,
+        max_entries: int = 10000,
+    ):
+        """
+        Resuelve y almacena en caché los roles e identidades de los usuarios.
+
+        Las entradas expiran tras ``ttl`` segundos y se invalidan cuando una
+        sesión confirma cambios en los roles de un usuario, en un rol o en sus
+        registros de ``Teacher``/``Student``, ya sea con el ORM, con
+        actualizaciones y borrados masivos o con sentencias Core. Cada
+        invalidación incrementa una generación por usuario, de modo que una
+        consulta que empezó antes no guarda en caché permisos ya obsoletos.
+
+        Las sesiones sólo invalidan la caché si se registraron con ``install``.
+
+        :param session_factory: Función que abre una sesión como context manager.
+        :param ttl: Segundos de vida de cada entrada.
+        :param max_entries: Número máximo de usuarios en caché (LRU) y de
+            generaciones por usuario.
+
+        Ejemplos:
+            install()  # sesiones de ``connection.get_session``
+            resolver = PermissionResolver()
+            if resolver.resolve(user_id).has_role("admin"):
+                ...
+        """
+        self._session_factory = session_factory
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._generation = 0
+        self._user_generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        _resolvers.add(self)
+
+    def resolve(self, user_id: int) -> Optional[UserPermissions]:
+        """
+        Obtiene los permisos de un usuario.
+
+        :param user_id: Id del usuario.
+        :return: Permisos del usuario o None si no existe.
+        :raises RepositoryError: Si ocurre un error durante la consulta.
+        """
+        return self.resolve_many([user_id]).get(user_id)
+
+    def resolve_many(self, user_ids: Iterable[int]) -> Dict[int, UserPermissions]:
+        """
+        Obtiene los permisos de varios usuarios con una sola consulta para los
+        que no estén en caché.
+
+        :param user_ids: Ids de los usuarios.
+        :return: Permisos por id de usuario; los inexistentes se omiten.
+        :raises RepositoryError: Si ocurre un error durante la consulta.
+        """
+        found: Dict[int, UserPermissions] = {}
+        missing: Set[int] = set()
+        now = time.monotonic()
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._entries.get(user_id)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(user_id)
+                    found[user_id] = entry[1]
+                    self.hits += 1
+                else:
+                    missing.add(user_id)
+                    self.misses += 1
+            generation = self._generation
+            seen = {
+                user_id: self._user_generations.get(user_id, 0) for user_id in missing
+            }
+        if missing:
+            loaded = self._load(missing)
+            expires = time.monotonic() + self._ttl
+            with self._lock:
+                for user_id, permissions in loaded.items():
+                    # Una invalidación durante la consulta deja el resultado fuera.
+                    if (
+                        self._generation != generation
+                        or self._user_generations.get(user_id, 0) != seen[user_id]
+                    ):
+                        continue
+                    self._entries[user_id] = (expires, permissions)
+                    self._entries.move_to_end(user_id)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+            found.update(loaded)
+        return found
+
+    def invalidate(self, user_id: int) -> None:
+        """Descarta la entrada en caché de un usuario."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+            if len(self._user_generations) >= self._max_entries:
+                # Subir la generación global también descarta las consultas en
+                # curso, así que las generaciones por usuario pueden olvidarse.
+                self._user_generations.clear()
+                self._generation += 1
+            self._user_generations[user_id] = self._user_generations.get(user_id, 0) + 1
+
+    def invalidate_all(self) -> None:
+        """Descarta todas las entradas en caché."""
+        with self._lock:
+            self._entries.clear()
+            self._user_generations.clear()
+            self._generation += 1
+
+    def _load(self, user_ids: Set[int]) -> Dict[int, UserPermissions]:
+        stmt = (
+            select(User.id, Teacher.id, Student.id, Role.name)
+            .outerjoin(
+                Teacher, and_(Teacher.user_id == User.id, Teacher.deleted_at.is_(None))
+            )
+            .outerjoin(
+                Student, and_(Student.user_id == User.id, Student.deleted_at.is_(None))
+            )
+            .outerjoin(roles_users, roles_users.c.user_id == User.id)
+            .outerjoin(Role, Role.id == roles_users.c.role_id)
+            .where(User.id.in_(user_ids))
+        )
+        identities: Dict[int, tuple] = {}
+        roles: Dict[int, Set[str]] = {}
+        try:
+            with self._session_factory() as session:
+                for user_id, teacher_id, student_id, role in session.execute(stmt):
+                    identities[user_id] = (teacher_id, student_id)
+                    names = roles.setdefault(user_id, set())
+                    if role is not None:
+                        names.add(role)
+        except SQLAlchemyError as e:
+            raise RepositoryError("Error retrieving User permissions") from e
+        return {
+            user_id: UserPermissions(
+                user_id, frozenset(roles[user_id]), teacher_id, student_id
+            )
+            for user_id, (teacher_id, student_id) in identities.items()
+        }
+
+
+def install(target: Union[Session, sessionmaker] = SessionLocal) -> None:
+    """
+    Registra en ``target`` los eventos que invalidan la caché de permisos cuando
+    sus sesiones confirman cambios de roles o identidades.
+
+    Llamarlo de nuevo con el mismo destino no tiene efecto.
+
+    :param target: ``sessionmaker`` o sesión (por defecto, la de
+        ``connection.get_session``).
+    """
+    for name, fn in _LISTENERS:
+        if not event.contains(target, name, fn):
+            event.listen(target, name, fn)
+
+
+def uninstall(target: Union[Session, sessionmaker] = SessionLocal) -> None:
+    """Quita los eventos registrados con ``install``."""
+    for name, fn in _LISTENERS:
+        if event.contains(target, name, fn):
+            event.remove(target, name, fn)
+
+
+def _collect_changes(session: Session, flush_context) -> None:
+    changed = session.info.setdefault(_CHANGED_KEY, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Role):
+            changed.add(_ALL)
+        elif isinstance(obj, User):
+            if obj in session.deleted or inspect(obj).attrs.roles.history.has_changes():
+                changed.add(obj.id)
+        elif isinstance(obj, (Teacher, Student)):
+            history = inspect(obj).attrs.user_id.history
+            changed.update(v for v in (*history.deleted, obj.user_id) if v is not None)
+
+
+def _collect_statement_changes(state) -> None:
+    # Las sentencias masivas y Core no pasan por el flush: los usuarios afectados
+    # se leen antes de ejecutarlas con la misma condición.
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    name = getattr(getattr(state.statement, "table", None), "name", None)
+    if name == Role.__tablename__:
+        state.session.info.setdefault(_CHANGED_KEY, set()).add(_ALL)
+        return
+    column = _USER_COLUMNS.get(name)
+    if column is None or (name == User.__tablename__ and not state.is_delete):
+        return
+    changed = state.session.info.setdefault(_CHANGED_KEY, set())
+    if state.is_insert:
+        changed.update(_statement_user_ids(state, column.name) or {_ALL})
+        return
+    if state.statement.whereclause is None:
+        changed.add(_ALL)
+        return
+    if state.is_update:
+        changed.update(_statement_user_ids(state, column.name))
+    lookup = select(column).where(state.statement.whereclause)
+    changed.update(v for v in state.session.execute(lookup).scalars() if v is not None)
+
+
+def _statement_user_ids(state, name: str) -> Set[int]:
+    rows = state.parameters
+    if isinstance(rows, dict):
+        rows = [rows]
+    values = [row.get(name) for row in rows or ()]
+    values.extend(
+        value
+        for key, value in state.statement.compile().params.items()
+        if key == name
+        or (key.startswith(name) and _MULTI_VALUES.match(key[len(name) :]))
+    )
+    return {value for value in values if value is not None}
+
+
+def _invalidate_changes(session: Session) -> None:
+    changed = session.info.pop(_CHANGED_KEY, None)
+    if not changed:
+        return
+    for resolver in list(_resolvers):
+        if _ALL in changed:
+            resolver.invalidate_all()
+        else:
+            for user_id in changed:
+                resolver.invalidate(user_id)
+
+
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
+
+
+_LISTENERS = (
+    ("after_flush", _collect_changes),
+    ("do_orm_execute", _collect_statement_changes),
+    ("after_commit", _invalidate_changes),
+    ("after_rollback", _discard_changes),
+)
@@ -0,0 +1,432 @@
+import asyncio
+import http.client
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database.models import (
+    Course,
+    Grade,
+    Platform,
+    Student,
+    Task,
+    TaskSubmission,
+    Teacher,
+)
+from schoolar_control_api.database.repository import RepositoryError
+
+DEFAULT_RESULTS_PATH = "/tasks/{external_id}/results"
+
+
+class PlatformSyncError(Exception):
+    """Excepción para errores al comunicarse con una plataforma externa."""
+
+    pass
+
+
+@dataclass(frozen=True)
+class ExternalResult:
+    """Resultado de una tarea obtenido de una plataforma externa."""
+
+    task_id: int
+    key_registration: str
+    submitted_at: Optional[datetime] = None
+    score: Optional[Decimal] = None
+    submission_url: Optional[str] = None
+    submission_text: Optional[str] = None
+    feedback: Optional[str] = None
+
+
+@dataclass
+class SyncReport:
+    """Resumen de una sincronización con las plataformas externas."""
+
+    tasks: int = 0
+    results: int = 0
+    submissions_created: int = 0
+    submissions_updated: int = 0
+    grades_written: int = 0
+    skipped: int = 0
+    errors: Dict[int, str] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class _TaskRef:
+    id: int
+    platform_id: int
+    external_id: str
+    max_score: Decimal
+    due_date: datetime
+    grader_id: int
+
+
+class _RateLimiter:
+    """Cubeta de fichas asíncrona: ``rate`` peticiones por segundo con ráfaga ``burst``."""
+
+    def __init__(self, rate: float, burst: int):
+        self._rate = rate
+        self._capacity = float(max(burst, 1))
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self._rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class PlatformClient:
+    def __init__(self, platform: Platform):
+        """
+        Cliente HTTP de una plataforma que reutiliza conexiones persistentes.
+
+        Las opciones se leen de ``Platform.api_config``:
+
+        - ``results_path``: ruta de resultados, con ``{external_id}``.
+        - ``headers``: cabeceras adicionales (por ejemplo, autenticación).
+        - ``rate_limit``: peticiones por segundo (0 desactiva el límite).
+        - ``max_concurrency``: conexiones simultáneas hacia la plataforma.
+        - ``timeout``: tiempo máximo por petición en segundos.
+
+        :param platform: Plataforma con ``base_url`` configurada.
+        """
+        if not platform.base_url:
+            raise PlatformSyncError(f"Platform {platform.name!r} has no base_url")
+        config = platform.api_config or {}
+        url = urlsplit(platform.base_url)
+        self.platform_id = platform.id
+        self._scheme = url.scheme or "http"
+        self._netloc = url.netloc
+        self._prefix = url.path.rstrip("/")
+        self._results_path = config.get("results_path", DEFAULT_RESULTS_PATH)
+        self._headers = {"Accept": "application/json", **config.get("headers", {})}
+        self._timeout = float(config.get("timeout", 10))
+        concurrency = int(config.get("max_concurrency", 4))
+        self._limiter = _RateLimiter(float(config.get("rate_limit", 0)), concurrency)
+        self._connections: asyncio.Queue = asyncio.Queue()
+        for _ in range(concurrency):
+            self._connections.put_nowait(None)
+
+    async def fetch_results(self, external_id: str) -> List[Dict[str, Any]]:
+        """
+        Obtiene los resultados de una tarea externa.
+
+        :param external_id: Identificador de la tarea en la plataforma.
+        :return: Lista de resultados en formato JSON.
+        :raises PlatformSyncError: Si la plataforma responde con error.
+        """
+        path = self._prefix + self._results_path.format(external_id=external_id)
+        await self._limiter.acquire()
+        connection = await self._connections.get()
+        try:
+            connection, status, body = await asyncio.to_thread(
+                self._request, connection, path
+            )
+        finally:
+            self._connections.put_nowait(connection)
+        if status != 200:
+            raise PlatformSyncError(f"GET {path} returned HTTP {status}")
+        payload = json.loads(body)
+        return payload.get("results", []) if isinstance(payload, dict) else payload
+
+    def close(self) -> None:
+        """Cierra todas las conexiones abiertas hacia la plataforma."""
+        while not self._connections.empty():
+            connection = self._connections.get_nowait()
+            if connection is not None:
+                connection.close()
+
+    def _request(self, connection, path):
+        for attempt in range(2):
+            if connection is None:
+                connection = self._connect()
+            try:
+                connection.request("GET", path, headers=self._headers)
+                response = connection.getresponse()
+                return connection, response.status, response.read()
+            except (http.client.HTTPException, ConnectionError) as e:
+                # El servidor pudo cerrar la conexión persistente; se reintenta una vez.
+                connection.close()
+                connection = None
+                if attempt:
+                    raise PlatformSyncError(f"GET {path} failed") from e
+            except OSError as e:
+                connection.close()
+                raise PlatformSyncError(f"GET {path} failed") from e
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._scheme == "https":
+            return http.client.HTTPSConnection(self._netloc, timeout=self._timeout)
+        return http.client.HTTPConnection(self._netloc, timeout=self._timeout)
+
+
+class PlatformSyncWorker:
+    def __init__(self, session: Session, batch_size: int = 200):
+        """
+        Inicializa el sincronizador de resultados de plataformas externas.
+
+        Las descargas se hacen de forma concurrente por plataforma, mientras que
+        la escritura en base de datos se hace por lotes desde un único consumidor,
+        por lo que la sesión nunca se usa desde dos hilos a la vez.
+
+        :param session: Sesión de SQLAlchemy.
+        :param batch_size: Número de resultados por lote de escritura.
+        """
+        self._session = session
+        self._batch_size = batch_size
+
+    def sync(self, platform_ids: Optional[List[int]] = None) -> SyncReport:
+        """
+        Ejecuta la sincronización de forma bloqueante.
+
+        :param platform_ids: Plataformas a sincronizar (por defecto, todas las activas).
+        :return: Resumen de la sincronización.
+        """
+        return asyncio.run(self.sync_async(platform_ids))
+
+    async def sync_async(self, platform_ids: Optional[List[int]] = None) -> SyncReport:
+        """
+        Descarga los resultados de todas las tareas externas y los guarda por lotes.
+
+        :param platform_ids: Plataformas a sincronizar (por defecto, todas las activas).
+        :return: Resumen de la sincronización.
+        :raises RepositoryError: Si ocurre un error al guardar los resultados.
+        """
+        report = SyncReport()
+        platforms, tasks = self._load_tasks(platform_ids)
+        report.tasks = len(tasks)
+        clients = {p.id: PlatformClient(p) for p in platforms}
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._batch_size * 4)
+        writer = asyncio.create_task(self._write_results(queue, tasks, report))
+        fetchers = asyncio.gather(
+            *(
+                self._fetch_task(clients[t.platform_id], t, queue, report)
+                for t in tasks.values()
+            )
+        )
+        try:
+            # Si el escritor falla, nadie vacía la cola y las descargas se
+            # bloquearían en ``queue.put``: se esperan ambos y se cancela el resto.
+            await asyncio.wait((fetchers, writer), return_when=asyncio.FIRST_COMPLETED)
+            if not writer.done():
+                await fetchers
+                end = asyncio.ensure_future(queue.put(None))
+                await asyncio.wait((end, writer), return_when=asyncio.FIRST_COMPLETED)
+                end.cancel()
+            await writer
+        finally:
+            for future in (fetchers, writer):
+                future.cancel()
+            await asyncio.gather(fetchers, writer, return_exceptions=True)
+            for client in clients.values():
+                client.close()
+        return report
+
+    def _load_tasks(self, platform_ids):
+        try:
+            stmt = select(Platform).where(
+                Platform.is_active.is_(True), Platform.base_url.is_not(None)
+            )
+            if platform_ids:
+                stmt = stmt.where(Platform.id.in_(platform_ids))
+            platforms = list(self._session.execute(stmt).scalars())
+            stmt = (
+                select(
+                    Task.id,
+                    Task.platform_id,
+                    Task.external_id,
+                    Task.max_score,
+                    Task.due_date,
+                    Teacher.user_id,
+                )
+                .join(Course, Course.id == Task.course_id)
+                .join(Teacher, Teacher.id == Course.teacher_id)
+                .where(
+                    Task.platform_id.in_([p.id for p in platforms]),
+                    Task.external_id.is_not(None),
+                )
+            )
+            tasks = {row[0]: _TaskRef(*row) for row in self._session.execute(stmt)}
+        except SQLAlchemyError as e:
+            raise RepositoryError("Error retrieving external Task") from e
+        return platforms, tasks
+
+    async def _fetch_task(self, client, task, queue, report):
+        try:
+            payload = await client.fetch_results(task.external_id)
+        except (PlatformSyncError, ValueError) as e:
+            report.errors[task.id] = str(e)
+            return
+        for item in payload:
+            try:
+                result = _parse_result(task.id, item)
+            except (ValueError, TypeError, AttributeError, ArithmeticError) as e:
+                # Un resultado mal formado no detiene la sincronización.
+                report.errors.setdefault(task.id, f"Invalid result {item!r}: {e}")
+                result = None
+            if result is None:
+                report.skipped += 1
+            else:
+                await queue.put(result)
+
+    async def _write_results(self, queue, tasks, report):
+        batch: List[ExternalResult] = []
+        while True:
+            result = await queue.get()
+            if result is not None:
+                batch.append(result)
+            if batch and (result is None or len(batch) >= self._batch_size):
+                await asyncio.to_thread(self._upsert, batch, tasks, report)
+                batch = []
+            if result is None:
+                return
+
+    def _upsert(self, batch, tasks, report):
+        session = self._session
+        try:
+            keys = {r.key_registration for r in batch}
+            students = dict(
+                session.execute(
+                    select(Student.key_registration, Student.id).where(
+                        Student.key_registration.in_(keys)
+                    )
+                ).all()
+            )
+            pairs = {
+                (r.task_id, students[r.key_registration])
+                for r in batch
+                if r.key_registration in students
+            }
+            existing = (
+                {
+                    (s.task_id, s.student_id): s
+                    for s in session.execute(
+                        select(TaskSubmission).where(
+                            tuple_(
+                                TaskSubmission.task_id, TaskSubmission.student_id
+                            ).in_(pairs)
+                        )
+                    ).scalars()
+                }
+                if pairs
+                else {}
+            )
+            graded = []
+            for result in batch:
+                student_id = students.get(result.key_registration)
+                if student_id is None:
+                    report.skipped += 1
+                    continue
+                task = tasks[result.task_id]
+                submission = existing.get((result.task_id, student_id))
+                if submission is None:
+                    submission = TaskSubmission(
+                        task_id=result.task_id, student_id=student_id
+                    )
+                    session.add(submission)
+                    existing[(result.task_id, student_id)] = submission
+                    report.submissions_created += 1
+                else:
+                    report.submissions_updated += 1
+                _apply_result(submission, result, task)
+                if result.score is not None:
+                    graded.append((submission, result, task))
+            session.flush()
+            grades = (
+                {
+                    g.submission_id: g
+                    for g in session.execute(
+                        select(Grade).where(
+                            Grade.submission_id.in_([s.id for s, _, _ in graded])
+                        )
+                    ).scalars()
+                }
+                if graded
+                else {}
+            )
+            for submission, result, task in graded:
+                grade = grades.get(submission.id)
+                if grade is None:
+                    grade = Grade(submission_id=submission.id, graded_by=task.grader_id)
+                    session.add(grade)
+                    grades[submission.id] = grade
+                grade.grade = _to_percentage(result.score, task.max_score)
+                if result.feedback is not None:
+                    grade.feedback = result.feedback
+                report.grades_written += 1
+            session.commit()
+            report.results += len(batch)
+        except SQLAlchemyError as e:
+            session.rollback()
+            raise RepositoryError("Error saving external TaskSubmission") from e
+
+
+def _parse_result(task_id: int, item: Dict[str, Any]) -> Optional[ExternalResult]:
+    key = item.get("student") or item.get("key_registration")
+    if not key:
+        return None
+    submitted_at = item.get("submitted_at")
+    score = item.get("score")
+    if score is not None:
+        score = Decimal(str(score))
+        if not score.is_finite():
+            raise ValueError(f"invalid score {score}")
+    return ExternalResult(
+        task_id=task_id,
+        key_registration=str(key),
+        submitted_at=_parse_timestamp(submitted_at) if submitted_at else None,
+        score=score,
+        submission_url=item.get("url"),
+        submission_text=item.get("text"),
+        feedback=item.get("feedback"),
+    )
+
+
+def _parse_timestamp(value: str) -> datetime:
+    # Las fechas de la base son UTC sin zona; ``Z`` o un desfase se convierten a
+    # UTC para poder compararlas con ``Task.due_date``.
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _apply_result(
+    submission: TaskSubmission, result: ExternalResult, task: _TaskRef
+) -> None:
+    if result.submitted_at is not None:
+        submission.submitted_at = result.submitted_at
+    if result.submission_url is not None:
+        submission.submission_url = result.submission_url
+    if result.submission_text is not None:
+        submission.submission_text = result.submission_text
+    if result.score is not None:
+        submission.status = "graded"
+    elif (
+        submission.submitted_at is not None and submission.submitted_at > task.due_date
+    ):
+        submission.status = "late"
+
+
+def _to_percentage(score: Decimal, max_score: Decimal) -> Decimal:
+    value = score * 100 / Decimal(max_score)
+    return min(max(value, Decimal(0)), Decimal(100)).quantize(Decimal("0.01"))
@@ -0,0 +1,321 @@
+import argparse
+import logging
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from schoolar_control_api.database.connection import get_session
+from schoolar_control_api.database.models import Course, Degree, Student
+from schoolar_control_api.database.repository import (
+    Repository,
+    RepositoryError,
+    Watermark,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Lookup:
+    """Correspondencia ``columna única -> id`` de un modelo."""
+
+    name: str
+    model: type
+    key: str
+
+
+REFERENCE_LOOKUPS = (
+    Lookup("course_code", Course, "code"),
+    Lookup("key_registration", Student, "key_registration"),
+    Lookup("degree_name", Degree, "name"),
+)
+
+
+class CompactIndex:
+    __slots__ = ("_keys", "_ids")
+
+    def __init__(self, pairs: Iterable[Tuple[str, int]] = ()):
+        """
+        Índice inmutable ``clave -> id`` en dos arreglos paralelos ordenados.
+
+        Las claves se internan y los ids se guardan en un ``array`` de enteros
+        de 64 bits, en lugar de un objeto ``int`` y una entrada de ``dict`` por
+        fila; las búsquedas son binarias.
+
+        :param pairs: Pares ``(clave, id)`` con claves únicas.
+        """
+        items = sorted(pairs)
+        self._keys = tuple(sys.intern(key) for key, _ in items)
+        self._ids = array("q", (id_ for _, id_ in items))
+
+    def get(self, key: str) -> Optional[int]:
+        """Devuelve el id de una clave o None si no existe."""
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            return self._ids[index]
+        return None
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        return zip(self._keys, self._ids)
+
+    def merged(self, changes: Dict[int, Optional[str]]) -> "CompactIndex":
+        """
+        Devuelve un índice nuevo con los cambios aplicados.
+
+        :param changes: Clave actual por id (None si el registro se eliminó).
+        """
+        by_id = {id_: key for key, id_ in self.items()}
+        for id_, key in changes.items():
+            if key is None:
+                by_id.pop(id_, None)
+            else:
+                by_id[id_] = key
+        return CompactIndex((key, id_) for id_, key in by_id.items())
+
+    def nbytes(self) -> int:
+        """Memoria aproximada del índice, incluidas las cadenas."""
+        return (
+            sys.getsizeof(self._keys)
+            + sys.getsizeof(self._ids)
+            + sum(sys.getsizeof(key) for key in self._keys)
+        )
+
+
+class ReferenceSnapshot:
+    def __init__(
+        self,
+        session_factory: Callable[[], Any] = get_session,
+        lookups: Iterable[Lookup] = REFERENCE_LOOKUPS,
+        refresh_interval: float = 30.0,
+        full_reload_interval: float = 3600.0,
+        settle: float = 2.0,
+    ):
+        """
+        Copia en memoria de las correspondencias de datos de referencia.
+
+        ``load`` lee todas las correspondencias; ``refresh`` sólo las filas
+        modificadas desde la última lectura (``Repository.changes_since``) y
+        publica los índices nuevos de una vez, de modo que las búsquedas nunca
+        consultan la base de datos ni ven un estado a medias. Las eliminaciones
+        lógicas (``deleted_at``) se aplican en cada actualización; las físicas,
+        en la recarga completa periódica.
+
+        :param session_factory: Función que abre una sesión como context manager.
+        :param lookups: Correspondencias a mantener.
+        :param refresh_interval: Segundos entre actualizaciones en segundo plano.
+        :param full_reload_interval: Segundos entre recargas completas.
+        :param settle: Segundos de cambios recientes que se dejan para la
+            siguiente actualización (ver ``Repository.changes_since``).
+
+        Ejemplos:
+            snapshot = ReferenceSnapshot()
+            snapshot.load()
+            snapshot.start()
+            course_id = snapshot.course_id("MAT-101")
+        """
+        self._session_factory = session_factory
+        self._lookups = {lookup.name: lookup for lookup in lookups}
+        self._refresh_interval = refresh_interval
+        self._full_reload_interval = full_reload_interval
+        self._settle = settle
+        self._indexes: Dict[str, CompactIndex] = {}
+        self._watermarks: Dict[str, Optional[Watermark]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.refreshes = 0
+        self.changes = 0
+        self.errors = 0
+
+    def get(self, lookup: str, key: str) -> Optional[int]:
+        """
+        Busca el id de una clave en una correspondencia.
+
+        :raises KeyError: Si la correspondencia no existe o no se ha cargado.
+        """
+        return self._indexes[lookup].get(key)
+
+    def course_id(self, code: str) -> Optional[int]:
+        return self.get("course_code", code)
+
+    def student_id(self, key_registration: str) -> Optional[int]:
+        return self.get("key_registration", key_registration)
+
+    def degree_id(self, name: str) -> Optional[int]:
+        return self.get("degree_name", name)
+
+    def load(self) -> None:
+        """
+        Lee todas las correspondencias y reemplaza los índices.
+
+        :raises RepositoryError: Si ocurre un error durante la consulta.
+        """
+        with self._lock:
+            cutoff = datetime.utcnow() - timedelta(seconds=self._settle)
+            indexes: Dict[str, CompactIndex] = {}
+            watermarks: Dict[str, Optional[Watermark]] = {}
+            try:
+                with self._session_factory() as session:
+                    for name, lookup in self._lookups.items():
+                        indexes[name], watermarks[name] = self._read_all(
+                            session, lookup, cutoff
+                        )
+            except SQLAlchemyError as e:
+                raise RepositoryError("Error loading reference data") from e
+            self._indexes = indexes
+            self._watermarks = watermarks
+            self._loaded_at = time.monotonic()
+
+    def refresh(self) -> int:
+        """
+        Aplica los cambios desde la última lectura (o recarga todo si venció
+        ``full_reload_interval``).
+
+        :return: Número de filas modificadas aplicadas.
+        :raises RepositoryError: Si ocurre un error durante la consulta.
+        """
+        if (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at >= self._full_reload_interval
+        ):
+            self.load()
+            return 0
+        with self._lock:
+            indexes = dict(self._indexes)
+            watermarks = dict(self._watermarks)
+            applied = 0
+            with self._session_factory() as session:
+                for name, lookup in self._lookups.items():
+                    changes, watermarks[name] = self._read_changes(
+                        session, lookup, watermarks[name]
+                    )
+                    if changes:
+                        indexes[name] = indexes[name].merged(changes)
+                        applied += len(changes)
+            self._indexes = indexes
+            self._watermarks = watermarks
+            self.refreshes += 1
+            self.changes += applied
+        return applied
+
+    def start(self) -> None:
+        """Actualiza la copia en un hilo en segundo plano hasta llamar a ``stop``."""
+        if self._thread is not None:
+            return
+        if self._loaded_at is None:
+            self.load()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="reference-snapshot", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Detiene el hilo de actualización."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def memory_footprint(self) -> Dict[str, int]:
+        """Bytes aproximados por correspondencia y en total."""
+        footprint = {name: index.nbytes() for name, index in self._indexes.items()}
+        footprint["total"] = sum(footprint.values())
+        return footprint
+
+    def stats(self) -> Dict[str, Any]:
+        """Tamaño de cada correspondencia y contadores de actualización."""
+        return {
+            "sizes": {name: len(index) for name, index in self._indexes.items()},
+            "refreshes": self.refreshes,
+            "changes": self.changes,
+            "errors": self.errors,
+            "bytes": self.memory_footprint()["total"],
+        }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._refresh_interval):
+            try:
+                self.refresh()
+            except RepositoryError:
+                self.errors += 1
+                logger.exception("Error refreshing reference data")
+
+    def _read_all(
+        self, session, lookup: Lookup, cutoff: datetime
+    ) -> Tuple[CompactIndex, Optional[Watermark]]:
+        model = lookup.model
+        deleted_at = getattr(model, "deleted_at", None)
+        stmt = select(getattr(model, lookup.key), model.id, model.updated_at)
+        if deleted_at is not None:
+            stmt = stmt.where(deleted_at.is_(None))
+        rows = session.execute(stmt).all()
+        # La marca se queda antes de ``settle`` para volver a leer las filas
+        # recientes en la siguiente actualización; aplicarlas dos veces no cambia nada.
+        settled = [
+            (updated_at, id_) for _, id_, updated_at in rows if updated_at <= cutoff
+        ]
+        watermark = max(settled) if settled else None
+        return CompactIndex((key, id_) for key, id_, _ in rows), watermark
+
+    def _read_changes(
+        self, session, lookup: Lookup, watermark: Optional[Watermark]
+    ) -> Tuple[Dict[int, Optional[str]], Optional[Watermark]]:
+        repo = Repository(lookup.model, session)
+        changes: Dict[int, Optional[str]] = {}
+        while True:
+            batch = repo.changes_since(watermark=watermark, settle=self._settle)
+            for entity in batch.items:
+                deleted = getattr(entity, "deleted_at", None) is not None
+                changes[entity.id] = None if deleted else getattr(entity, lookup.key)
+            watermark = batch.watermark
+            if not batch.has_more:
+                break
+        # Sólo se necesitan las claves: no se conservan las entidades leídas.
+        session.expunge_all()
+        return changes, watermark
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=(
+            "Carga los datos de referencia en memoria y muestra su tamaño y el "
+            "tiempo de búsqueda."
+        )
+    )
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+    snapshot = ReferenceSnapshot()
+    start = time.perf_counter()
+    snapshot.load()
+    print(f"loaded in {time.perf_counter() - start:.3f}s: {snapshot.stats()['sizes']}")
+    for name, index in snapshot._indexes.items():
+        as_dict = {key: id_ for key, id_ in index.items()}
+        dict_bytes = (
+            sys.getsizeof(as_dict)
+            + sum(sys.getsizeof(key) for key in as_dict)
+            + sum(sys.getsizeof(id_) for id_ in as_dict.values())
+        )
+        print(f"{name:<18} {index.nbytes():>12,} bytes (dict: {dict_bytes:,})")
+        keys = [key for key, _ in index.items()]
+        if keys:
+            start = time.perf_counter()
+            for i in range(args.lookups):
+                index.get(keys[i % len(keys)])
+            elapsed = time.perf_counter() - start
+            print(f"{'':<18} {elapsed / args.lookups * 1e9:>12.0f} ns per lookup")
@@ -0,0 +1,271 @@
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database import connection
+from schoolar_control_api.database.models import (
+    Attendance,
+    Course,
+    CourseEnrollment,
+    Degree,
+    EvaluationComponent,
+    Grade,
+    Student,
+    Task,
+    TaskSubmission,
+    User,
+)
+
+# (component_id, component_weight, task_weight, grade)
+GradeRow = Tuple[Optional[int], Optional[Decimal], Optional[Decimal], Optional[Decimal]]
+
+
+def final_grade(rows: Iterable[GradeRow]) -> Optional[float]:
+    """
+    Calcula la calificación final de un estudiante en un curso.
+
+    Dentro de cada componente de evaluación se promedian las tareas calificadas
+    ponderando por ``Task.weight``; después se combinan los componentes según
+    ``EvaluationComponent.weight``. Las tareas sin calificación no se cuentan.
+
+    :param rows: Filas (componente, peso del componente, peso de la tarea, calificación).
+    :return: Calificación final entre 0 y 100, o None si no hay calificaciones.
+    """
+    components: Dict[int, List[float]] = {}
+    for component_id, component_weight, task_weight, grade in rows:
+        if grade is None or component_id is None:
+            continue
+        totals = components.setdefault(
+            component_id, [float(component_weight), 0.0, 0.0]
+        )
+        totals[1] += float(grade) * float(task_weight)
+        totals[2] += float(task_weight)
+    weighted = weights = 0.0
+    for component_weight, grade_sum, task_weights in components.values():
+        if task_weights:
+            weighted += component_weight * grade_sum / task_weights
+            weights += component_weight
+    return weighted / weights if weights else None
+
+
+def build_transcripts(session: Session, degree_id: int) -> Dict[int, str]:
+    """
+    Genera el historial académico de los estudiantes activos de un grado.
+
+    :param session: Sesión de SQLAlchemy.
+    :param degree_id: Grado académico.
+    :return: Historial en texto por id de estudiante.
+    """
+    stmt = (
+        select(
+            Student.id,
+            Student.key_registration,
+            User.fullname,
+            Course.id,
+            Course.code,
+            Course.name,
+            CourseEnrollment.status,
+            EvaluationComponent.id,
+            EvaluationComponent.weight,
+            Task.weight,
+            Grade.grade,
+        )
+        .join(User, User.id == Student.user_id)
+        .join(CourseEnrollment, CourseEnrollment.student_id == Student.id)
+        .join(Course, Course.id == CourseEnrollment.course_id)
+        .outerjoin(Task, Task.course_id == Course.id)
+        .outerjoin(EvaluationComponent, EvaluationComponent.id == Task.component_id)
+        .outerjoin(
+            TaskSubmission,
+            and_(
+                TaskSubmission.task_id == Task.id,
+                TaskSubmission.student_id == Student.id,
+            ),
+        )
+        .outerjoin(Grade, Grade.submission_id == TaskSubmission.id)
+        .where(Student.degree_id == degree_id, Student.deleted_at.is_(None))
+        .order_by(Student.id, Course.code)
+    )
+    students: Dict[int, Tuple[str, str]] = {}
+    courses: Dict[int, Dict[Tuple[str, str, str], List[GradeRow]]] = defaultdict(dict)
+    for row in session.execute(stmt):
+        (student_id, key, fullname, _, code, name, status, *grade_row) = row
+        students[student_id] = (key, fullname)
+        courses[student_id].setdefault((code, name, status), []).append(
+            tuple(grade_row)
+        )
+    transcripts = {}
+    for student_id, (key, fullname) in students.items():
+        lines = [f"{key} - {fullname}"]
+        for (code, name, status), rows in courses[student_id].items():
+            lines.append(
+                f"  {code:<12} {name:<40} {status:<10} {_format(final_grade(rows))}"
+            )
+        transcripts[student_id] = "\n".join(lines)
+    return transcripts
+
+
+def build_course_report(session: Session, course_id: int) -> str:
+    """
+    Genera el reporte de un curso: calificación final y asistencia por estudiante.
+
+    :param session: Sesión de SQLAlchemy.
+    :param course_id: Curso a reportar.
+    :return: Reporte en texto.
+    """
+    course = session.get(Course, course_id)
+    stmt = (
+        select(
+            Student.id,
+            Student.key_registration,
+            User.fullname,
+            EvaluationComponent.id,
+            EvaluationComponent.weight,
+            Task.weight,
+            Grade.grade,
+        )
+        .join(User, User.id == Student.user_id)
+        .join(CourseEnrollment, CourseEnrollment.student_id == Student.id)
+        .outerjoin(Task, Task.course_id == CourseEnrollment.course_id)
+        .outerjoin(EvaluationComponent, EvaluationComponent.id == Task.component_id)
+        .outerjoin(
+            TaskSubmission,
+            and_(
+                TaskSubmission.task_id == Task.id,
+                TaskSubmission.student_id == Student.id,
+            ),
+        )
+        .outerjoin(Grade, Grade.submission_id == TaskSubmission.id)
+        .where(CourseEnrollment.course_id == course_id)
+        .order_by(Student.key_registration)
+    )
+    students: Dict[int, Tuple[str, str]] = {}
+    grades: Dict[int, List[GradeRow]] = defaultdict(list)
+    for student_id, key, fullname, *grade_row in session.execute(stmt):
+        students[student_id] = (key, fullname)
+        grades[student_id].append(tuple(grade_row))
+    attended = func.sum(case((Attendance.status.in_(("present", "late")), 1), else_=0))
+    attendance = {
+        student_id: (int(present or 0), total)
+        for student_id, present, total in session.execute(
+            select(Attendance.student_id, attended, func.count())
+            .where(Attendance.course_id == course_id)
+            .group_by(Attendance.student_id)
+        )
+    }
+    lines = [f"{course.code} - {course.name}"]
+    finals = []
+    for student_id, (key, fullname) in students.items():
+        final = final_grade(grades[student_id])
+        if final is not None:
+            finals.append(final)
+        present, total = attendance.get(student_id, (0, 0))
+        rate = f"{100 * present / total:.1f}%" if total else "-"
+        lines.append(f"  {key:<20} {fullname:<40} {_format(final)} {rate:>7}")
+    average = sum(finals) / len(finals) if finals else None
+    lines.append(f"  Estudiantes: {len(students)}  Promedio: {_format(average)}")
+    return "\n".join(lines)
+
+
+class ReportRunner:
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        database_url: Optional[str] = None,
+        **engine_options: Any,
+    ):
+        """
+        Ejecuta la generación de reportes repartida en un pool de procesos.
+
+        Cada proceso crea su propio motor y sesión a partir de ``connection``;
+        al iniciar descarta el pool de conexiones heredado por ``fork`` sin
+        cerrarlo, para no invalidar las conexiones del proceso padre.
+
+        :param processes: Número de procesos (por defecto, número de núcleos).
+        :param database_url: URL de conexión (por defecto, la configurada).
+        :param engine_options: Argumentos adicionales para ``create_engine``.
+        """
+        self._processes = processes or os.cpu_count() or 1
+        self._database_url = database_url or connection.get_database_url()
+        self._engine_options = engine_options
+
+    def transcripts(self, degree_ids: Optional[List[int]] = None) -> Dict[int, str]:
+        """
+        Genera los historiales académicos, un fragmento de trabajo por grado.
+
+        :param degree_ids: Grados a procesar (por defecto, todos los activos).
+        :return: Historiales por id de estudiante, ordenados por id.
+        """
+        if degree_ids is None:
+            degree_ids = self._ids(select(Degree.id).where(Degree.deleted_at.is_(None)))
+        merged: Dict[int, str] = {}
+        for shard in self._map(_transcripts_worker, degree_ids):
+            merged.update(shard)
+        return dict(sorted(merged.items()))
+
+    def course_reports(
+        self,
+        course_ids: Optional[List[int]] = None,
+        period_id: Optional[int] = None,
+    ) -> Dict[int, str]:
+        """
+        Genera los reportes de curso, un fragmento de trabajo por curso.
+
+        :param course_ids: Cursos a procesar (por defecto, todos los del periodo).
+        :param period_id: Periodo académico usado cuando no se indican cursos.
+        :return: Reportes por id de curso, en el orden solicitado.
+        """
+        if course_ids is None:
+            stmt = select(Course.id).where(Course.deleted_at.is_(None))
+            if period_id is not None:
+                stmt = stmt.where(Course.period_id == period_id)
+            course_ids = self._ids(stmt)
+        return dict(zip(course_ids, self._map(_course_worker, course_ids)))
+
+    @staticmethod
+    def write(reports: Dict[int, str], path: str) -> None:
+        """Escribe los reportes combinados en un único archivo de texto."""
+        with open(path, "w", encoding="utf-8") as output:
+            output.write("\n\n".join(reports.values()))
+            output.write("\n")
+
+    def _ids(self, stmt) -> List[int]:
+        with connection.get_session() as session:
+            return list(
+                session.execute(stmt.order_by(stmt.selected_columns[0])).scalars()
+            )
+
+    def _map(self, fn, items: List[int]) -> List:
+        if not items:
+            return []
+        workers = min(self._processes, len(items))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self._database_url, self._engine_options),
+        ) as executor:
+            return list(executor.map(fn, items))
+
+
+def _init_worker(database_url: str, engine_options: Dict[str, Any]) -> None:
+    connection.dispose_engine(close=False)
+    connection.configure(database_url, **engine_options)
+
+
+def _transcripts_worker(degree_id: int) -> Dict[int, str]:
+    with connection.get_session() as session:
+        return build_transcripts(session, degree_id)
+
+
+def _course_worker(course_id: int) -> str:
+    with connection.get_session() as session:
+        return build_course_report(session, course_id)
+
+
+def _format(value: Optional[float]) -> str:
+    return f"{value:6.2f}" if value is not None else "     -"
@@ -0,0 +1,291 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, time
+from typing import Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database.models import (
+    AcademicPeriod,
+    Course,
+    CourseEnrollment,
+    CourseSchedule,
+)
+from schoolar_control_api.database.repository import RepositoryError
+
+MINUTES_PER_DAY = 24 * 60
+
+V = TypeVar("V")
+
+
+class IntervalTree(Generic[V]):
+    def __init__(self, intervals: Iterable[Tuple[int, int, V]]):
+        """
+        Árbol de intervalos estático sobre intervalos semiabiertos ``[inicio, fin)``.
+
+        Se construye en O(n log n) como un árbol binario implícito sobre los
+        intervalos ordenados por inicio, guardando en cada nodo el mayor fin de
+        su subárbol; cada consulta cuesta O(log n + k) para k coincidencias.
+
+        :param intervals: Tuplas (inicio, fin, valor).
+        """
+        items = sorted(intervals, key=lambda item: (item[0], item[1]))
+        self._starts = [item[0] for item in items]
+        self._ends = [item[1] for item in items]
+        self._values = [item[2] for item in items]
+        self._max_end = list(self._ends)
+        self._build(0, len(items))
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def overlapping(self, start: int, end: int) -> List[V]:
+        """Devuelve los valores de los intervalos que se traslapan con ``[start, end)``."""
+        found: List[V] = []
+        self._query(0, len(self._values), start, end, found)
+        return found
+
+    def _build(self, lo: int, hi: int) -> int:
+        if lo >= hi:
+            return -1
+        mid = (lo + hi) // 2
+        for child in (self._build(lo, mid), self._build(mid + 1, hi)):
+            if child >= 0 and self._max_end[child] > self._max_end[mid]:
+                self._max_end[mid] = self._max_end[child]
+        return mid
+
+    def _query(self, lo: int, hi: int, start: int, end: int, found: List[V]) -> None:
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._max_end[mid] <= start:
+                return
+            self._query(lo, mid, start, end, found)
+            if self._starts[mid] >= end:
+                return
+            if self._ends[mid] > start:
+                found.append(self._values[mid])
+            lo = mid + 1
+
+
+@dataclass(frozen=True)
+class Slot:
+    """Sesión semanal de un curso expresada en minutos desde el lunes 00:00."""
+
+    schedule_id: Optional[int]
+    course_id: int
+    teacher_id: int
+    room_id: Optional[int]
+    start: int
+    end: int
+
+    @classmethod
+    def from_times(
+        cls,
+        schedule_id: Optional[int],
+        course_id: int,
+        teacher_id: int,
+        room_id: Optional[int],
+        weekday: int,
+        start_time: time,
+        end_time: time,
+    ) -> "Slot":
+        offset = weekday * MINUTES_PER_DAY
+        return cls(
+            schedule_id,
+            course_id,
+            teacher_id,
+            room_id,
+            offset + _minutes(start_time),
+            offset + _minutes(end_time),
+        )
+
+
+@dataclass(frozen=True)
+class Conflict:
+    """Traslape entre dos sesiones que comparten profesor, aula o estudiante."""
+
+    kind: str
+    resource_id: int
+    first: Slot
+    second: Slot
+
+
+class TimetableValidator:
+    def __init__(self, session: Session):
+        """
+        Detecta traslapes de horario por profesor, aula y estudiante.
+
+        :param session: Sesión de SQLAlchemy.
+        """
+        self._session = session
+
+    def validate_period(self, period_id: int) -> List[Conflict]:
+        """
+        Valida el horario completo de un periodo académico.
+
+        Las sesiones se agrupan por recurso (profesor, aula y cada estudiante
+        inscrito) y cada grupo se revisa con un árbol de intervalos, por lo que
+        el costo es O(n log n + k) en lugar de comparar todas las parejas.
+
+        :param period_id: Periodo académico a validar.
+        :return: Lista de traslapes encontrados.
+        :raises RepositoryError: Si ocurre un error durante la consulta.
+        """
+        slots = self._load_slots(period_id)
+        conflicts: List[Conflict] = []
+        for kind, groups in self._group(slots, period_id).items():
+            for resource_id, group in groups.items():
+                conflicts.extend(_overlaps(kind, resource_id, group))
+        return conflicts
+
+    def check_slot(
+        self,
+        course_id: int,
+        weekday: int,
+        start_time: time,
+        end_time: time,
+        room_id: Optional[int] = None,
+    ) -> List[Conflict]:
+        """
+        Verifica si una sesión nueva se traslapa con el horario del periodo del curso.
+
+        :param course_id: Curso de la nueva sesión.
+        :param weekday: Día de la semana (0 = lunes).
+        :param start_time: Hora de inicio.
+        :param end_time: Hora de fin.
+        :param room_id: Aula de la nueva sesión.
+        :return: Traslapes que produciría la nueva sesión.
+        :raises RepositoryError: Si ocurre un error durante la consulta.
+        """
+        try:
+            course = self._session.get(Course, course_id)
+        except SQLAlchemyError as e:
+            raise RepositoryError("Error retrieving Course") from e
+        if course is None:
+            raise RepositoryError(f"Course {course_id} not found")
+        candidate = Slot.from_times(
+            None, course_id, course.teacher_id, room_id, weekday, start_time, end_time
+        )
+        slots = self._load_slots(course.period_id)
+        groups = self._group(slots, course.period_id)
+        students = self._students_by_course(course.period_id).get(course_id, [])
+        resources = [("teacher", candidate.teacher_id)]
+        if room_id is not None:
+            resources.append(("room", room_id))
+        resources.extend(("student", student_id) for student_id in students)
+        conflicts = []
+        for kind, resource_id in resources:
+            tree = IntervalTree((s.start, s.end, s) for s in groups[kind][resource_id])
+            conflicts.extend(
+                Conflict(kind, resource_id, candidate, other)
+                for other in tree.overlapping(candidate.start, candidate.end)
+            )
+        return conflicts
+
+    def is_scheduled(self, course_id: int, when: datetime) -> bool:
+        """
+        Indica si un curso tiene sesión en la fecha y hora indicadas, dentro de
+        las fechas de su periodo académico (útil para validar asistencias).
+
+        :raises RepositoryError: Si ocurre un error durante la consulta.
+        """
+        minute = when.weekday() * MINUTES_PER_DAY + _minutes(when.time())
+        try:
+            stmt = (
+                select(
+                    CourseSchedule.weekday,
+                    CourseSchedule.start_time,
+                    CourseSchedule.end_time,
+                )
+                .join(Course, Course.id == CourseSchedule.course_id)
+                .join(AcademicPeriod, AcademicPeriod.id == Course.period_id)
+                .where(
+                    CourseSchedule.course_id == course_id,
+                    CourseSchedule.weekday == when.weekday(),
+                    AcademicPeriod.start_date <= when.date(),
+                    AcademicPeriod.end_date >= when.date(),
+                )
+            )
+            rows = self._session.execute(stmt).all()
+        except SQLAlchemyError as e:
+            raise RepositoryError("Error retrieving CourseSchedule") from e
+        for weekday, start_time, end_time in rows:
+            slot = Slot.from_times(
+                None, course_id, 0, None, weekday, start_time, end_time
+            )
+            if slot.start <= minute < slot.end:
+                return True
+        return False
+
+    def _load_slots(self, period_id: int) -> List[Slot]:
+        try:
+            stmt = (
+                select(
+                    CourseSchedule.id,
+                    CourseSchedule.course_id,
+                    Course.teacher_id,
+                    CourseSchedule.room_id,
+                    CourseSchedule.weekday,
+                    CourseSchedule.start_time,
+                    CourseSchedule.end_time,
+                )
+                .join(Course, Course.id == CourseSchedule.course_id)
+                .where(Course.period_id == period_id, Course.deleted_at.is_(None))
+            )
+            return [Slot.from_times(*row) for row in self._session.execute(stmt)]
+        except SQLAlchemyError as e:
+            raise RepositoryError("Error retrieving CourseSchedule") from e
+
+    def _students_by_course(self, period_id: int) -> Dict[int, List[int]]:
+        try:
+            stmt = (
+                select(CourseEnrollment.course_id, CourseEnrollment.student_id)
+                .join(Course, Course.id == CourseEnrollment.course_id)
+                .where(
+                    Course.period_id == period_id, CourseEnrollment.status == "active"
+                )
+            )
+            students: Dict[int, List[int]] = defaultdict(list)
+            for course_id, student_id in self._session.execute(stmt):
+                students[course_id].append(student_id)
+            return students
+        except SQLAlchemyError as e:
+            raise RepositoryError("Error retrieving CourseEnrollment") from e
+
+    def _group(
+        self, slots: List[Slot], period_id: int
+    ) -> Dict[str, Dict[int, List[Slot]]]:
+        groups: Dict[str, Dict[int, List[Slot]]] = {
+            "teacher": defaultdict(list),
+            "room": defaultdict(list),
+            "student": defaultdict(list),
+        }
+        by_course: Dict[int, List[Slot]] = defaultdict(list)
+        for slot in slots:
+            groups["teacher"][slot.teacher_id].append(slot)
+            if slot.room_id is not None:
+                groups["room"][slot.room_id].append(slot)
+            by_course[slot.course_id].append(slot)
+        for course_id, students in self._students_by_course(period_id).items():
+            for student_id in students:
+                groups["student"][student_id].extend(by_course.get(course_id, ()))
+        return groups
+
+
+def _overlaps(kind: str, resource_id: int, slots: List[Slot]) -> List[Conflict]:
+    if len(slots) < 2:
+        return []
+    tree = IntervalTree((slot.start, slot.end, slot) for slot in slots)
+    conflicts = []
+    for slot in slots:
+        for other in tree.overlapping(slot.start, slot.end):
+            # Cada pareja se reporta una sola vez, en orden de id.
+            if (other.schedule_id or 0) > (slot.schedule_id or 0):
+                conflicts.append(Conflict(kind, resource_id, slot, other))
+    return conflicts
+
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
@@ -0,0 +1,435 @@
+import argparse
+import hashlib
+import random
+import re
+import struct
+import time
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, aliased
+
+from schoolar_control_api.database.models import (
+    SubmissionLshBucket,
+    SubmissionSignature,
+    TaskSubmission,
+)
+from schoolar_control_api.database.repository import RepositoryError
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy es opcional
+    np = None
+
+NUM_PERM = 128
+BANDS = 32
+SHINGLE_SIZE = 5
+DEFAULT_THRESHOLD = 0.5
+
+# Las permutaciones se fijan con una semilla para que las firmas guardadas
+# sigan siendo comparables entre ejecuciones.
+_PERMUTATION_SEED = 20240917
+_MERSENNE_PRIME = (1 << 61) - 1
+_MASK_64 = (1 << 64) - 1
+_MASK_32 = (1 << 32) - 1
+_WORD = re.compile(r"\w+")
+
+Signature = Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class Match:
+    """Par de entregas de una misma tarea con textos casi iguales."""
+
+    submission_id: int
+    other_id: int
+    similarity: float
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    """
+    Hashes de las secuencias de ``size`` palabras consecutivas del texto, sin
+    distinguir mayúsculas ni acentos. Un texto más corto es un único fragmento.
+    """
+    normalized = text.lower()
+    if not normalized.isascii():
+        normalized = "".join(
+            c
+            for c in unicodedata.normalize("NFKD", normalized)
+            if not unicodedata.combining(c)
+        )
+    words = _WORD.findall(normalized)
+    if not words:
+        return set()
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode())}
+    return {
+        zlib.crc32(" ".join(words[i : i + size]).encode())
+        for i in range(len(words) - size + 1)
+    }
+
+
+@lru_cache(maxsize=None)
+def _permutations(num_perm: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    rng = random.Random(_PERMUTATION_SEED)
+    a = tuple(rng.randrange(1, _MERSENNE_PRIME) for _ in range(num_perm))
+    b = tuple(rng.randrange(0, _MERSENNE_PRIME) for _ in range(num_perm))
+    return a, b
+
+
+def minhash(hashes: Iterable[int], num_perm: int = NUM_PERM) -> Optional[Signature]:
+    """
+    Firma MinHash de un conjunto de hashes de 32 bits.
+
+    Cada permutación es ``(a * h + b) mod 2**64 mod (2**61 - 1)`` truncada a
+    32 bits; numpy y la versión en Python puro dan exactamente la misma firma.
+
+    :return: ``num_perm`` mínimos, o None si el conjunto está vacío.
+    """
+    a, b = _permutations(num_perm)
+    if np is not None:
+        values = np.fromiter(hashes, dtype=np.uint64)
+        if not values.size:
+            return None
+        with np.errstate(over="ignore"):
+            permuted = np.outer(values, np.array(a, dtype=np.uint64))
+            permuted += np.array(b, dtype=np.uint64)
+        permuted %= np.uint64(_MERSENNE_PRIME)
+        permuted &= np.uint64(_MASK_32)
+        return tuple(permuted.min(axis=0).tolist())
+    values = list(hashes)
+    if not values:
+        return None
+    return tuple(
+        min((((h * ai + bi) & _MASK_64) % _MERSENNE_PRIME) & _MASK_32 for h in values)
+        for ai, bi in zip(a, b)
+    )
+
+
+def similarity(first: Signature, second: Signature) -> float:
+    """Estimación del índice de Jaccard: proporción de mínimos iguales."""
+    return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+def band_buckets(signature: Signature, bands: int = BANDS) -> List[int]:
+    """
+    Cubeta de cada banda de la firma. Dos firmas comparten alguna cubeta con
+    probabilidad ``1 - (1 - s**r)**bands`` (``r`` filas por banda), de modo que
+    los pares parecidos casi siempre coinciden y los distintos casi nunca.
+    """
+    rows = len(signature) // bands
+    buckets = []
+    for band in range(bands):
+        chunk = struct.pack(f"<{rows}I", *signature[band * rows : (band + 1) * rows])
+        digest = hashlib.blake2b(chunk, digest_size=8).digest()
+        # Positivo para caber en un BIGINT con signo.
+        buckets.append(int.from_bytes(digest, "big") >> 1)
+    return buckets
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 del texto de una entrega, para saber si su firma sigue valiendo."""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def pack(signature: Signature) -> bytes:
+    return struct.pack(f"<{len(signature)}I", *signature)
+
+
+def unpack(data: bytes) -> Signature:
+    return struct.unpack(f"<{len(data) // 4}I", data)
+
+
+class SimilarityDetector:
+    def __init__(
+        self,
+        session: Session,
+        num_perm: int = NUM_PERM,
+        bands: int = BANDS,
+        threshold: float = DEFAULT_THRESHOLD,
+        shingle_size: int = SHINGLE_SIZE,
+    ):
+        """
+        Detecta entregas casi iguales dentro de cada tarea con MinHash y LSH.
+
+        Las firmas y sus cubetas se guardan en ``submission_signatures`` y
+        ``submission_lsh_buckets``; sólo se calculan para las entregas nuevas o
+        modificadas desde que se firmaron (cuyo ``updated_at`` ya no es el
+        guardado con la firma; si el texto no cambió sólo se actualiza esa
+        marca), y los candidatos se obtienen uniendo cubetas en la base de
+        datos, sin comparar todos los pares.
+
+        Con los valores por defecto (128 permutaciones, 32 bandas de 4 filas)
+        un par con similitud 0.5 es candidato con probabilidad ~0.87 y uno con
+        0.8, prácticamente siempre. Cambiar ``num_perm`` recalcula las firmas;
+        cambiar ``bands`` o ``shingle_size`` requiere ``index_task(reindex=True)``.
+
+        :param session: Sesión de SQLAlchemy.
+        :param num_perm: Permutaciones por firma.
+        :param bands: Bandas LSH (deben dividir ``num_perm``).
+        :param threshold: Similitud mínima para reportar un par.
+        :param shingle_size: Palabras por fragmento.
+        """
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self._session = session
+        self._num_perm = num_perm
+        self._bands = bands
+        self._threshold = threshold
+        self._shingle_size = shingle_size
+
+    def index_task(
+        self, task_id: int, reindex: bool = False, batch_size: int = 500
+    ) -> int:
+        """
+        Calcula las firmas que faltan o están desactualizadas en una tarea.
+
+        :param task_id: Id de la tarea.
+        :param reindex: Si es True, recalcula todas las firmas de la tarea.
+        :param batch_size: Entregas por transacción.
+        :return: Número de entregas procesadas.
+        :raises RepositoryError: Si ocurre un error en la base de datos.
+        """
+        stmt = (
+            select(TaskSubmission.id)
+            .outerjoin(
+                SubmissionSignature,
+                SubmissionSignature.submission_id == TaskSubmission.id,
+            )
+            .where(TaskSubmission.task_id == task_id)
+        )
+        if not reindex:
+            # Las entregas sin texto no tienen firma: sólo se procesan si
+            # conservan la de un texto anterior. Se compara con el
+            # ``updated_at`` guardado al firmar y no con la hora del cálculo,
+            # que puede venir de otro reloj o ser posterior a un cambio hecho
+            # mientras se firmaba.
+            stmt = stmt.where(
+                or_(
+                    and_(
+                        SubmissionSignature.submission_id.is_(None),
+                        TaskSubmission.submission_text.is_not(None),
+                        TaskSubmission.submission_text != "",
+                    ),
+                    and_(
+                        SubmissionSignature.submission_id.is_not(None),
+                        or_(
+                            SubmissionSignature.source_updated_at.is_(None),
+                            SubmissionSignature.source_updated_at
+                            != TaskSubmission.updated_at,
+                            SubmissionSignature.num_perm != self._num_perm,
+                        ),
+                    ),
+                )
+            )
+        try:
+            ids = list(
+                self._session.execute(stmt.order_by(TaskSubmission.id)).scalars()
+            )
+            for start in range(0, len(ids), batch_size):
+                self._index(task_id, ids[start : start + batch_size], reindex)
+                self._session.commit()
+        except SQLAlchemyError as e:
+            self._session.rollback()
+            raise RepositoryError("Error indexing submission signatures") from e
+        return len(ids)
+
+    def check(self, submission_id: int) -> List[Match]:
+        """
+        Busca entregas de la misma tarea parecidas a una entrega, calculando
+        antes las firmas pendientes de esa tarea.
+
+        :param submission_id: Id de la entrega.
+        :return: Coincidencias ordenadas de mayor a menor similitud.
+        :raises RepositoryError: Si ocurre un error en la base de datos.
+        """
+        try:
+            task_id = self._session.execute(
+                select(TaskSubmission.task_id).where(TaskSubmission.id == submission_id)
+            ).scalar_one_or_none()
+        except SQLAlchemyError as e:
+            raise RepositoryError("Error retrieving TaskSubmission") from e
+        if task_id is None:
+            return []
+        self.index_task(task_id)
+        mine = aliased(SubmissionLshBucket)
+        other = aliased(SubmissionLshBucket)
+        candidates = (
+            select(other.submission_id)
+            .join(
+                mine,
+                (mine.task_id == other.task_id)
+                & (mine.band == other.band)
+                & (mine.bucket == other.bucket),
+            )
+            .where(mine.submission_id == submission_id)
+            .where(other.submission_id != submission_id)
+            .distinct()
+        )
+        try:
+            candidate_ids = set(self._session.execute(candidates).scalars())
+            if not candidate_ids:
+                return []
+            signatures = self._signatures(candidate_ids | {submission_id})
+        except SQLAlchemyError as e:
+            raise RepositoryError("Error retrieving submission signatures") from e
+        pairs = [(submission_id, other_id) for other_id in candidate_ids]
+        return self._verify(pairs, signatures)
+
+    def find_duplicates(self, task_id: int) -> List[Match]:
+        """
+        Busca todos los pares de entregas casi iguales de una tarea.
+
+        :param task_id: Id de la tarea.
+        :return: Pares ordenados de mayor a menor similitud.
+        :raises RepositoryError: Si ocurre un error en la base de datos.
+        """
+        self.index_task(task_id)
+        first = aliased(SubmissionLshBucket)
+        second = aliased(SubmissionLshBucket)
+        pairs = (
+            select(first.submission_id, second.submission_id)
+            .join(
+                second,
+                (first.task_id == second.task_id)
+                & (first.band == second.band)
+                & (first.bucket == second.bucket)
+                & (first.submission_id < second.submission_id),
+            )
+            .where(first.task_id == task_id)
+            .distinct()
+        )
+        try:
+            candidates = [tuple(row) for row in self._session.execute(pairs)]
+            if not candidates:
+                return []
+            ids = {id_ for pair in candidates for id_ in pair}
+            signatures = self._signatures(ids)
+        except SQLAlchemyError as e:
+            raise RepositoryError("Error retrieving submission signatures") from e
+        return self._verify(candidates, signatures)
+
+    def _index(self, task_id: int, ids: Sequence[int], reindex: bool = False) -> None:
+        rows = self._session.execute(
+            select(
+                TaskSubmission.id,
+                TaskSubmission.submission_text,
+                TaskSubmission.updated_at,
+            ).where(TaskSubmission.id.in_(ids))
+        ).all()
+        hashes = {}
+        if not reindex:
+            hashes = dict(
+                self._session.execute(
+                    select(
+                        SubmissionSignature.submission_id, SubmissionSignature.text_hash
+                    ).where(
+                        SubmissionSignature.submission_id.in_(ids),
+                        SubmissionSignature.num_perm == self._num_perm,
+                    )
+                ).all()
+            )
+        touched = []
+        changed = []
+        for submission_id, text, updated_at in rows:
+            digest = text_hash(text) if text else None
+            if digest is not None and hashes.get(submission_id) == digest:
+                touched.append(
+                    {"submission_id": submission_id, "source_updated_at": updated_at}
+                )
+            else:
+                changed.append((submission_id, text, updated_at, digest))
+        if touched:
+            # Sólo cambiaron otras columnas (estado, URL): la firma sigue valiendo.
+            self._session.execute(update(SubmissionSignature), touched)
+        if not changed:
+            return
+        changed_ids = [row[0] for row in changed]
+        self._session.execute(
+            delete(SubmissionLshBucket).where(
+                SubmissionLshBucket.submission_id.in_(changed_ids)
+            )
+        )
+        self._session.execute(
+            delete(SubmissionSignature).where(
+                SubmissionSignature.submission_id.in_(changed_ids)
+            )
+        )
+        now = datetime.utcnow()
+        signatures = []
+        buckets = []
+        for submission_id, text, updated_at, digest in changed:
+            signature = minhash(
+                shingles(text or "", self._shingle_size), self._num_perm
+            )
+            if signature is None:
+                continue
+            signatures.append(
+                {
+                    "submission_id": submission_id,
+                    "task_id": task_id,
+                    "num_perm": self._num_perm,
+                    "signature": pack(signature),
+                    "computed_at": now,
+                    "source_updated_at": updated_at,
+                    "text_hash": digest,
+                }
+            )
+            buckets.extend(
+                {
+                    "task_id": task_id,
+                    "band": band,
+                    "bucket": bucket,
+                    "submission_id": submission_id,
+                }
+                for band, bucket in enumerate(band_buckets(signature, self._bands))
+            )
+        if signatures:
+            self._session.execute(insert(SubmissionSignature), signatures)
+            self._session.execute(insert(SubmissionLshBucket), buckets)
+
+    def _signatures(self, ids: Set[int]) -> Dict[int, Signature]:
+        rows = self._session.execute(
+            select(
+                SubmissionSignature.submission_id, SubmissionSignature.signature
+            ).where(SubmissionSignature.submission_id.in_(ids))
+        )
+        return {submission_id: unpack(data) for submission_id, data in rows}
+
+    def _verify(
+        self, pairs: Iterable[Tuple[int, int]], signatures: Dict[int, Signature]
+    ) -> List[Match]:
+        matches = []
+        for first, second in pairs:
+            score = similarity(signatures[first], signatures[second])
+            if score >= self._threshold:
+                matches.append(Match(first, second, score))
+        matches.sort(key=lambda m: (-m.similarity, m.submission_id, m.other_id))
+        return matches
+
+
+if __name__ == "__main__":
+    from schoolar_control_api.database.connection import get_session
+
+    parser = argparse.ArgumentParser(
+        description="Busca entregas casi iguales en una tarea (MinHash + LSH)."
+    )
+    parser.add_argument("--task-id", type=int, required=True)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--reindex", action="store_true")
+    args = parser.parse_args()
+    with get_session() as session:
+        detector = SimilarityDetector(session, threshold=args.threshold)
+        start = time.perf_counter()
+        indexed = detector.index_task(args.task_id, reindex=args.reindex)
+        matches = detector.find_duplicates(args.task_id)
+        elapsed = time.perf_counter() - start
+    for match in matches:
+        print(f"{match.submission_id:>8} {match.other_id:>8} {match.similarity:.2f}")
+    print(f"{len(matches)} pairs, {indexed} signatures computed in {elapsed:.2f}s")
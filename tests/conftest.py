@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database import connection
+from tests.factories import (
+    SQLITE_CONNECT_ARGS,
+    add_school,
+    make_engine,
+    register_sqlite_functions,
+)
+
+
+@pytest.fixture
+def database_url(tmp_path) -> str:
+    return f"sqlite:///{tmp_path / 'school.db'}"
+
+
+@pytest.fixture
+def engine(database_url):
+    engine = make_engine(database_url)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def school(session):
+    return add_school(session)
+
+
+@pytest.fixture
+def configured(engine, database_url):
+    """Apunta ``connection.get_session`` a la base de datos de la prueba."""
+    connection.configure(database_url, connect_args=SQLITE_CONNECT_ARGS)
+    register_sqlite_functions(connection.get_engine())
+    yield connection.get_engine()
+    connection.configure()
@@ -0,0 +1,143 @@
+"""Datos y motores de prueba compartidos por las pruebas."""
+
+import re
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database.models import (
+    AcademicPeriod,
+    Base,
+    Course,
+    CourseEnrollment,
+    Degree,
+    EvaluationComponent,
+    Student,
+    Task,
+    Teacher,
+    Unit,
+    User,
+)
+
+SQLITE_CONNECT_ARGS = {"check_same_thread": False, "timeout": 30}
+
+
+def register_sqlite_functions(engine: Engine) -> None:
+    """Registra REGEXP (lo usa la restricción del correo), que SQLite no implementa."""
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.create_function(
+            "REGEXP",
+            2,
+            lambda pattern, value: value is not None
+            and bool(re.search(pattern, value)),
+        )
+
+
+def serialize_sqlite_transactions(engine: Engine) -> None:
+    """
+    Abre cada transacción con ``BEGIN IMMEDIATE`` para que los hilos esperen el
+    bloqueo de escritura en lugar de fallar con ``database is locked`` al
+    pasar de lectura a escritura.
+    """
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def on_begin(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def make_engine(url: str, **engine_options) -> Engine:
+    """Motor SQLite de pruebas con el esquema de los modelos ya creado."""
+    engine_options.setdefault("connect_args", SQLITE_CONNECT_ARGS)
+    engine = create_engine(url, **engine_options)
+    register_sqlite_functions(engine)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def add_school(
+    session: Session,
+    students: int = 5,
+    tasks: int = 3,
+    degree: str = "Ingeniería",
+    code: str = "MAT-101",
+    now: Optional[datetime] = None,
+) -> SimpleNamespace:
+    """
+    Crea una carrera, un periodo, un docente, un curso con estudiantes inscritos
+    y tareas que vencen cada diez horas a partir de quince horas antes de ``now``.
+    """
+    now = now or datetime.utcnow()
+    suffix = code.lower().replace("-", "")
+    users = [
+        User(
+            fullname=f"Usuario {i}",
+            username=f"user{suffix}{i}",
+            email=f"user{suffix}{i}@school.edu",
+            password="secret-password",
+        )
+        for i in range(students + 1)
+    ]
+    session.add_all(users)
+    degree = Degree(name=degree, description="Carrera de prueba")
+    period = AcademicPeriod(
+        name="2026A", start_date=now.date(), end_date=(now + timedelta(days=120)).date()
+    )
+    session.add_all([degree, period])
+    session.flush()
+    teacher = Teacher(user_id=users[0].id, specialization="Matemáticas")
+    session.add(teacher)
+    session.flush()
+    course = Course(
+        name="Cálculo", code=code, teacher_id=teacher.id, period_id=period.id
+    )
+    session.add(course)
+    session.flush()
+    enrolled = [
+        Student(
+            user_id=user.id, degree_id=degree.id, key_registration=f"K{user.id:05d}"
+        )
+        for user in users[1:]
+    ]
+    session.add_all(enrolled)
+    session.flush()
+    session.add_all(
+        CourseEnrollment(student_id=student.id, course_id=course.id)
+        for student in enrolled
+    )
+    unit = Unit(course_id=course.id, name="Unidad 1", order_index=1)
+    component = EvaluationComponent(course_id=course.id, name="Tareas", weight=50)
+    session.add_all([unit, component])
+    session.flush()
+    course_tasks = [
+        Task(
+            course_id=course.id,
+            unit_id=unit.id,
+            component_id=component.id,
+            name=f"Tarea {i}",
+            due_date=now + timedelta(hours=i * 10 - 15),
+        )
+        for i in range(tasks)
+    ]
+    session.add_all(course_tasks)
+    session.commit()
+    return SimpleNamespace(
+        users=users,
+        degree=degree,
+        period=period,
+        teacher=teacher,
+        course=course,
+        students=enrolled,
+        unit=unit,
+        component=component,
+        tasks=course_tasks,
+    )
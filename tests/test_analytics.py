@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from schoolar_control_api.services import analytics
+from schoolar_control_api.services.analytics import (
+    ScoreColumns,
+    at_risk,
+    distribution,
+    unit_progress,
+)
+
+
+def columns(rows):
+    """Columnas con el backend activo, como las arma ``load_scores``."""
+    values = list(zip(*rows))
+    ints = [analytics._column(v, int) for v in values[:4]]
+    return ScoreColumns(
+        *ints, analytics._column(values[4], float), analytics._column(values[5], float)
+    )
+
+
+def cohort(seed=3, students=30, units=4, tasks=3):
+    rng = random.Random(seed)
+    rows = []
+    for student_id in range(1, students + 1):
+        for order in range(1, units + 1):
+            for _ in range(tasks):
+                grade = None if rng.random() < 0.2 else round(rng.uniform(30, 100), 2)
+                rows.append(
+                    (student_id, 7, 100 + order, order, rng.choice((1, 2)), grade)
+                )
+    return rows
+
+
+def compute(rows):
+    scores = columns(rows)
+    return distribution(scores), unit_progress(scores), at_risk(scores)
+
+
+def test_pure_python_backend_on_a_small_cohort(monkeypatch):
+    monkeypatch.setattr(analytics, "np", None)
+    rows = [
+        (1, 7, 11, 1, 1, 90.0),
+        (1, 7, 12, 2, 1, 70.0),
+        (2, 7, 11, 1, 1, 40.0),
+        (2, 7, 12, 2, 1, None),
+    ]
+
+    dist, units, risks = compute(rows)
+
+    assert (dist.count, dist.mean) == (3, pytest.approx(200 / 3))
+    assert dist.percentiles[50] == 70.0
+    assert [(u.unit_id, u.mean, u.completion) for u in units] == [
+        (11, 65.0, 1.0),
+        (12, 70.0, 0.5),
+    ]
+    assert [r.student_id for r in risks] == [2, 1]
+    assert risks[0].score == pytest.approx(0.5 * 30 / 70 + 0.3 * 0.5)
+    assert (risks[1].trend, risks[1].score) == (-20.0, pytest.approx(0.2))
+
+
+def test_numpy_and_pure_python_backends_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    rows = cohort()
+
+    fast_dist, fast_units, fast_risks = compute(rows)
+    monkeypatch.setattr(analytics, "np", None)
+    slow_dist, slow_units, slow_risks = compute(rows)
+
+    assert (fast_dist.count, fast_dist.counts) == (slow_dist.count, slow_dist.counts)
+    assert fast_dist.edges == pytest.approx(slow_dist.edges)
+    assert fast_dist.mean == pytest.approx(slow_dist.mean)
+    assert fast_dist.percentiles == pytest.approx(slow_dist.percentiles)
+    assert len(fast_units) == len(slow_units) == 4
+    for fast, slow in zip(fast_units, slow_units):
+        assert vars(fast) == pytest.approx(vars(slow))
+    # Puntajes casi iguales pueden ordenarse distinto: se comparan por estudiante.
+    fast_risks = sorted(fast_risks, key=lambda r: r.student_id)
+    slow_risks = sorted(slow_risks, key=lambda r: r.student_id)
+    assert len(fast_risks) == len(slow_risks) == 30
+    for fast, slow in zip(fast_risks, slow_risks):
+        assert vars(fast) == pytest.approx(vars(slow))
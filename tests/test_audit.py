@@ -0,0 +1,152 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import select
+
+from schoolar_control_api.database.audit import AuditBuffer, AuditTrail, set_actor
+from schoolar_control_api.database.models import (
+    AuditLog,
+    CourseEnrollment,
+    Grade,
+    TaskSubmission,
+)
+from schoolar_control_api.database.repository import Repository
+
+
+@pytest.fixture
+def buffer(engine):
+    buffer = AuditBuffer(engine, batch_size=3, flush_interval=0.05)
+    yield buffer
+    buffer.close(5)
+
+
+@pytest.fixture
+def audited(session, school, buffer):
+    AuditTrail(buffer).attach(session)
+    set_actor(session, school.teacher.user_id)
+    return session
+
+
+def add_grade(session, school, value=50):
+    submission = TaskSubmission(
+        task_id=school.tasks[0].id, student_id=school.students[0].id
+    )
+    session.add(submission)
+    session.flush()
+    grade = Grade(
+        submission_id=submission.id, grade=value, graded_by=school.teacher.user_id
+    )
+    session.add(grade)
+    session.commit()
+    return grade
+
+
+def audit_rows(session, buffer):
+    assert buffer.flush(5)
+    return session.execute(select(AuditLog).order_by(AuditLog.id)).scalars().all()
+
+
+def test_committed_orm_changes_are_written_in_batches(audited, school, buffer):
+    grade = add_grade(audited, school)
+    grade.feedback = "Bien"
+    audited.commit()
+    audited.delete(grade)
+    audited.commit()
+
+    rows = audit_rows(audited, buffer)
+
+    assert [(r.table_name, r.action) for r in rows] == [
+        ("grades", "insert"),
+        ("grades", "update"),
+        ("grades", "delete"),
+    ]
+    assert rows[1].changes == {"feedback": [None, "Bien"]}
+    assert {r.entity_id for r in rows} == {str(grade.id)}
+    assert {r.user_id for r in rows} == {school.teacher.user_id}
+    assert buffer.stats()["written"] == 3
+
+
+def test_rolled_back_changes_are_discarded(audited, school, buffer):
+    enrollment = audited.get(
+        CourseEnrollment, (school.students[0].id, school.course.id)
+    )
+    enrollment.status = "dropped"
+    audited.flush()
+    audited.rollback()
+
+    assert audit_rows(audited, buffer) == []
+
+
+def test_bulk_repository_writes_are_captured(audited, school, buffer):
+    first, *others = school.students
+    repository = Repository(CourseEnrollment, audited)
+    repository.update(
+        CourseEnrollment.student_id == first.id, values={"status": "dropped"}
+    )
+    repository.delete(CourseEnrollment.student_id.in_([s.id for s in others]))
+
+    rows = audit_rows(audited, buffer)
+
+    assert [r.action for r in rows] == ["update"] + ["delete"] * len(others)
+    assert rows[0].entity_id == f"{first.id},{school.course.id}"
+    assert rows[0].changes["status"] == ["active", "dropped"]
+    assert {r.changes["status"] for r in rows[1:]} == {"active"}
+
+
+def test_block_policy_waits_once_per_commit_not_per_row(engine, monkeypatch):
+    gate = threading.Event()
+    # Sin hilo escritor la cola nunca se vacía.
+    monkeypatch.setattr(AuditBuffer, "_run", lambda self: gate.wait())
+    buffer = AuditBuffer(engine, max_size=2, policy="block", put_timeout=0.2)
+
+    start = time.monotonic()
+    buffer.put_many({"row": i} for i in range(10))
+    elapsed = time.monotonic() - start
+
+    gate.set()
+    assert elapsed < 0.6
+    assert (buffer.enqueued, buffer.dropped) == (2, 8)
+
+
+def test_drop_policy_never_waits(engine, monkeypatch):
+    gate = threading.Event()
+    monkeypatch.setattr(AuditBuffer, "_run", lambda self: gate.wait())
+    buffer = AuditBuffer(engine, max_size=1, policy="drop", put_timeout=5)
+
+    start = time.monotonic()
+    buffer.put_many({"row": i} for i in range(3))
+
+    gate.set()
+    assert time.monotonic() - start < 0.5
+    assert (buffer.enqueued, buffer.dropped) == (1, 2)
+
+
+def test_flush_does_not_hang_on_a_full_queue_or_a_dead_writer(engine, monkeypatch):
+    gate = threading.Event()
+    monkeypatch.setattr(AuditBuffer, "_run", lambda self: gate.wait())
+    stuck = AuditBuffer(engine, max_size=1)
+    stuck.put_many([{"row": 0}])
+
+    start = time.monotonic()
+    assert not stuck.flush(0.2)
+    stuck.close(0.2)
+    assert time.monotonic() - start < 1
+    gate.set()
+
+    monkeypatch.setattr(AuditBuffer, "_run", lambda self: None)
+    dead = AuditBuffer(engine)
+    dead._thread.join()
+    dead.put_many([{"row": 0}])
+    assert not dead.flush()
+
+
+def test_close_is_idempotent_and_later_changes_are_dropped(engine):
+    buffer = AuditBuffer(engine)
+    buffer.close(5)
+    buffer.close(5)
+
+    buffer.put_many([{"row": 0}])
+
+    assert not buffer._thread.is_alive()
+    assert (buffer.enqueued, buffer.dropped) == (0, 1)
@@ -0,0 +1,130 @@
+from sqlalchemy import select, update
+
+from schoolar_control_api.database import counters
+from schoolar_control_api.database.models import (
+    Course,
+    CourseEnrollment,
+    Task,
+    TaskSubmission,
+)
+from schoolar_control_api.database.repository import Repository
+
+
+def add_course(session, school):
+    course = Course(
+        name="Física",
+        code="FIS-101",
+        teacher_id=school.teacher.id,
+        period_id=school.period.id,
+    )
+    session.add(course)
+    session.commit()
+    return course
+
+
+def enrolled(session, course):
+    return session.execute(
+        select(Course.enrolled_count).where(Course.id == course.id)
+    ).scalar_one()
+
+
+def submitted(session, task):
+    return session.execute(
+        select(Task.submission_count).where(Task.id == task.id)
+    ).scalar_one()
+
+
+def enrollment_of(session, school, index=0):
+    return session.execute(
+        select(CourseEnrollment).where(
+            CourseEnrollment.student_id == school.students[index].id
+        )
+    ).scalar_one()
+
+
+def test_enrollment_insert_and_delete_adjust_the_course(session, school):
+    other = add_course(session, school)
+    assert enrolled(session, school.course) == 5
+
+    enrollment = CourseEnrollment(student_id=school.students[0].id, course_id=other.id)
+    session.add(enrollment)
+    session.commit()
+    assert enrolled(session, other) == 1
+
+    session.delete(enrollment)
+    session.commit()
+    assert enrolled(session, other) == 0
+    assert enrolled(session, school.course) == 5
+
+
+def test_submission_insert_and_delete_adjust_the_task(session, school):
+    task = school.tasks[0]
+    submission = TaskSubmission(task_id=task.id, student_id=school.students[0].id)
+    session.add(submission)
+    session.commit()
+    assert submitted(session, task) == 1
+
+    session.delete(submission)
+    session.commit()
+    assert submitted(session, task) == 0
+
+
+def test_only_active_enrollments_are_counted(session, school):
+    enrollment = enrollment_of(session, school)
+
+    enrollment.status = "dropped"
+    session.commit()
+    assert enrolled(session, school.course) == 4
+
+    enrollment.status = "active"
+    session.commit()
+    assert enrolled(session, school.course) == 5
+
+
+def test_repository_update_moving_an_enrollment_refreshes_both_courses(session, school):
+    other = add_course(session, school)
+    enrollment = enrollment_of(session, school)
+
+    Repository(CourseEnrollment, session).update(
+        CourseEnrollment.student_id == enrollment.student_id,
+        CourseEnrollment.course_id == school.course.id,
+        values={"course_id": other.id},
+    )
+
+    assert enrolled(session, school.course) == 4
+    assert enrolled(session, other) == 1
+
+
+def test_moving_an_expired_enrollment_adjusts_both_courses(session, school):
+    other = add_course(session, school)
+    enrollment = enrollment_of(session, school)
+    session.expire(enrollment)
+
+    enrollment.course_id = other.id
+    session.commit()
+
+    assert (enrolled(session, school.course), enrolled(session, other)) == (4, 1)
+
+
+def test_repository_delete_refreshes_the_parents(session, school):
+    Repository(CourseEnrollment, session).delete(
+        CourseEnrollment.student_id.in_([s.id for s in school.students[:2]])
+    )
+
+    assert enrolled(session, school.course) == 3
+
+
+def test_reconcile_repairs_corrupted_counters(session, school):
+    session.add(
+        TaskSubmission(task_id=school.tasks[0].id, student_id=school.students[0].id)
+    )
+    session.commit()
+    session.execute(update(Course).values(enrolled_count=42))
+    session.execute(update(Task).values(submission_count=7))
+    session.commit()
+
+    summary = counters.reconcile(session)
+
+    assert summary == {"courses.enrolled_count": 1, "tasks.submission_count": 3}
+    assert enrolled(session, school.course) == 5
+    assert [submitted(session, t) for t in school.tasks] == [1, 0, 0]
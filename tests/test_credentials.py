@@ -0,0 +1,178 @@
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import insert, select
+
+from schoolar_control_api.database.models import User
+from schoolar_control_api.services import credentials
+from schoolar_control_api.services.credentials import (
+    CredentialService,
+    HashingParameters,
+    hash_password,
+    hash_plaintext_passwords,
+    is_hashed,
+    needs_rehash,
+    verify_password,
+)
+
+FAST = HashingParameters(n=2**10)
+
+
+def add_legacy_user(session, username, password):
+    # Inserción Core: no pasa por el evento que calcula el hash.
+    session.execute(
+        insert(User).values(
+            fullname="Usuario heredado",
+            username=username,
+            email=f"{username}@school.edu",
+            password=password,
+        )
+    )
+    session.commit()
+    return session.execute(select(User).where(User.username == username)).scalar_one()
+
+
+def test_hash_round_trip_and_rehash_detection():
+    encoded = hash_password("correct horse", FAST)
+
+    assert is_hashed(encoded) and len(encoded) <= 100
+    assert verify_password("correct horse", encoded)
+    assert not verify_password("wrong horse", encoded)
+    assert not needs_rehash(encoded, FAST)
+    assert needs_rehash(encoded, HashingParameters(n=2**11))
+    with pytest.raises(credentials.CredentialError):
+        hash_password("short", FAST)
+
+
+def test_malformed_stored_parameters_do_not_raise():
+    salt, key = hash_password("correct horse", FAST).split("$")[4:]
+
+    assert not verify_password("correct horse", f"scrypt$1000$8$1${salt}${key}")
+    assert not verify_password("correct horse", "scrypt$x$8$1$!!$??")
+    assert not verify_password("correct horse", "plain-text-password")
+
+
+def test_parameters_must_fit_the_password_column():
+    with pytest.raises(ValueError):
+        HashingParameters(salt_size=64, key_length=64)
+
+
+def test_services_share_the_process_pool_and_dummy_hash(session):
+    first, second = CredentialService(session, FAST), CredentialService(session, FAST)
+
+    assert first.submit_hash("correct horse").result()
+    assert second.submit_verify("x" * 8, hash_password("x" * 8, FAST)).result()
+    executor, slots = credentials._get_pool()
+    assert credentials._get_pool() == (executor, slots)
+    assert credentials._dummy_hash(FAST) is credentials._dummy_hash(FAST)
+
+
+def test_configure_pool_bounds_pending_operations(session):
+    credentials.configure_pool(max_workers=1, max_pending=1)
+    try:
+        service = CredentialService(session, FAST, queue_timeout=0.01)
+        gate = threading.Event()
+        busy = service._submit(gate.wait)
+        with pytest.raises(credentials.CredentialError):
+            CredentialService(session, FAST, queue_timeout=0.01).submit_hash("a" * 8)
+        gate.set()
+        assert busy.result()
+        assert service.submit_hash("a" * 8).result()
+    finally:
+        credentials.configure_pool()
+
+
+def test_authenticate_by_username_or_email(session):
+    user = User(
+        fullname="Ana", username="ana.m", email="ana@school.edu", password="x" * 8
+    )
+    service = CredentialService(session, FAST)
+    service.set_password(user, "correct horse")
+    session.add(user)
+    session.commit()
+
+    assert service.authenticate("ana.m", "correct horse") is user
+    assert service.authenticate("ana@school.edu", "correct horse") is user
+    assert service.authenticate("ana.m", "wrong horse") is None
+    assert service.authenticate("nobody", "correct horse") is None
+    assert asyncio.run(service.authenticate_async("ana.m", "correct horse")) is user
+
+
+def test_authenticate_async_keeps_the_event_loop_free(session, monkeypatch):
+    user = User(fullname="Ana", username="ana.m", email="ana@school.edu")
+    user.password = hash_password("correct horse", FAST)
+    session.add(user)
+    session.commit()
+    dummy_threads = []
+    dummy_hash = credentials._dummy_hash
+
+    def recording_dummy_hash(parameters):
+        dummy_threads.append(threading.current_thread())
+        return dummy_hash(parameters)
+
+    monkeypatch.setattr(credentials, "_dummy_hash", recording_dummy_hash)
+    credentials.configure_pool(max_workers=1, max_pending=1)
+    try:
+        gate = threading.Event()
+        stronger = HashingParameters(n=2**11)
+        service = CredentialService(session, stronger, queue_timeout=5)
+        busy = service._submit(gate.wait)
+
+        async def scenario():
+            # Si la espera del lugar bloqueara el bucle, la compuerta no se abriría.
+            asyncio.get_running_loop().call_later(0.05, gate.set)
+            found = await service.authenticate_async("ana.m", "correct horse")
+            missing = await service.authenticate_async("nobody", "correct horse")
+            return found, missing
+
+        assert asyncio.run(scenario()) == (user, None)
+        assert busy.result()
+    finally:
+        credentials.configure_pool()
+
+    assert not needs_rehash(user.password, stronger)
+    assert dummy_threads and threading.main_thread() not in dummy_threads
+
+
+def test_legacy_plaintext_password_is_verified_and_rehashed(session):
+    user = add_legacy_user(session, "legacy", "old-password")
+    service = CredentialService(session, FAST)
+
+    assert service.authenticate("legacy", "wrong-password") is None
+    assert user.password == "old-password"
+
+    assert service.authenticate("legacy", "old-password") is user
+    session.expire_all()
+    assert is_hashed(user.password)
+    assert verify_password("old-password", user.password)
+    assert service.authenticate("legacy", "old-password") is user
+
+
+def test_updating_other_columns_keeps_legacy_password(session):
+    user = add_legacy_user(session, "legacy", "old-password")
+
+    user.fullname = "Nombre nuevo"
+    session.commit()
+    session.expire_all()
+
+    assert user.password == "old-password"
+
+
+def test_hash_plaintext_passwords_backfills_in_batches(session):
+    for i in range(5):
+        add_legacy_user(session, f"legacy{i}", f"old-password-{i}")
+    hashed = User(
+        fullname="Ana", username="ana.m", email="ana@school.edu", password="x" * 8
+    )
+    session.add(hashed)
+    session.commit()
+    before = hashed.password
+
+    assert hash_plaintext_passwords(session, FAST, batch_size=2) == 5
+    assert hash_plaintext_passwords(session, FAST) == 0
+
+    users = {u.username: u for u in session.execute(select(User)).scalars()}
+    assert all(is_hashed(u.password) for u in users.values())
+    assert verify_password("old-password-3", users["legacy3"].password)
+    assert users["ana.m"].password == before
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from schoolar_control_api.database.models import CourseEnrollment, Task, TaskSubmission
+from schoolar_control_api.services.deadlines import DeadlineScheduler, Reminder
+from tests.factories import add_school
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+
+@pytest.fixture
+def school(session):
+    # Tareas que vencen a NOW - 15 h, NOW - 5 h y NOW + 5 h.
+    return add_school(session, now=NOW)
+
+
+def submit(session, task, student, delta):
+    submission = TaskSubmission(
+        task_id=task.id, student_id=student.id, submitted_at=task.due_date + delta
+    )
+    session.add(submission)
+    return submission
+
+
+def test_marks_only_late_submissions_of_recently_overdue_tasks(session, school):
+    first, second, upcoming = school.tasks
+    old = Task(
+        course_id=school.course.id,
+        unit_id=school.unit.id,
+        component_id=school.component.id,
+        name="Tarea antigua",
+        due_date=NOW - timedelta(days=30),
+    )
+    session.add(old)
+    session.flush()
+    late = [
+        submit(session, first, school.students[0], timedelta(hours=1)),
+        submit(session, second, school.students[0], timedelta(minutes=1)),
+    ]
+    on_time = submit(session, first, school.students[1], -timedelta(hours=1))
+    not_due = submit(session, upcoming, school.students[0], -timedelta(hours=1))
+    outside_lookback = submit(session, old, school.students[0], timedelta(hours=1))
+    session.commit()
+
+    scheduler = DeadlineScheduler(session, chunk_size=1)
+    assert scheduler.mark_late_submissions(NOW) == (2, 2, 2)
+
+    session.expire_all()
+    assert [s.status for s in late] == ["late", "late"]
+    assert on_time.status == not_due.status == outside_lookback.status == "submitted"
+    assert scheduler.mark_late_submissions(NOW) == (0, 2, 2)
+
+
+def test_reminders_skip_submitted_and_inactive_students(session, school):
+    upcoming = school.tasks[2]
+    submit(session, upcoming, school.students[0], -timedelta(hours=2))
+    dropped = session.get(CourseEnrollment, (school.students[1].id, school.course.id))
+    dropped.status = "dropped"
+    session.commit()
+
+    reminders = DeadlineScheduler(
+        session, horizon=timedelta(hours=6)
+    ).pending_reminders(NOW)
+
+    assert reminders == [
+        Reminder(upcoming.id, student.id, upcoming.due_date)
+        for student in school.students[2:]
+    ]
+
+
+def test_run_pages_through_tasks_sharing_a_due_date(session, school):
+    due = NOW + timedelta(hours=1)
+    session.add_all(
+        Task(
+            course_id=school.course.id,
+            unit_id=school.unit.id,
+            component_id=school.component.id,
+            name=f"Extra {i}",
+            due_date=due,
+        )
+        for i in range(5)
+    )
+    session.commit()
+
+    result = DeadlineScheduler(session, chunk_size=2, horizon=timedelta(hours=2)).run(
+        NOW
+    )
+
+    # Cinco tareas con el mismo vencimiento, en bloques de dos, sin repetir ni omitir.
+    assert len(result.reminders) == 5 * len(school.students)
+    assert len(set(result.reminders)) == len(result.reminders)
+    assert result.overdue_tasks == 2
+
+
+def test_rejects_empty_chunks(session):
+    with pytest.raises(ValueError):
+        DeadlineScheduler(session, chunk_size=0)
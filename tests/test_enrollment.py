@@ -0,0 +1,115 @@
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database.models import Course, CourseEnrollment
+from schoolar_control_api.services.enrollment import (
+    ACTIVE,
+    DROPPED,
+    FULL,
+    WAITLISTED,
+    EnrollmentService,
+    stress_test,
+)
+from tests.factories import add_school, make_engine, serialize_sqlite_transactions
+
+
+def add_course(session, school, capacity):
+    course = Course(
+        name="Física",
+        code="FIS-101",
+        teacher_id=school.teacher.id,
+        period_id=school.period.id,
+        capacity=capacity,
+    )
+    session.add(course)
+    session.commit()
+    return course
+
+
+def test_enroll_waitlist_and_promote_in_arrival_order(session, school):
+    course = add_course(session, school, capacity=2)
+    a, b, c, d = (s.id for s in school.students[:4])
+    service = EnrollmentService(session)
+
+    assert [service.enroll(s, course.id) for s in (a, b, c, d)] == [
+        ACTIVE,
+        ACTIVE,
+        WAITLISTED,
+        WAITLISTED,
+    ]
+    assert service.enroll(c, course.id) == WAITLISTED
+    assert service.enroll(school.students[4].id, course.id, waitlist=False) == FULL
+    assert service.waitlist(course.id) == [c, d]
+
+    assert service.drop(a, course.id) == [c]
+    assert service.drop(d, course.id) == []
+    assert service.waitlist(course.id) == []
+    session.expire_all()
+    assert session.get(Course, course.id).enrolled_count == 2
+    assert session.get(CourseEnrollment, (a, course.id)).status == DROPPED
+
+
+def test_waitlisted_enrollment_takes_a_seat_freed_concurrently(
+    session, school, monkeypatch
+):
+    course = add_course(session, school, capacity=1)
+    first, second = (s.id for s in school.students[:2])
+    service = EnrollmentService(session)
+    service.enroll(first, course.id)
+    claim_seat = service._claim_seat
+
+    def claim_then_concurrent_drop(course_id):
+        claimed = claim_seat(course_id)
+        if not claimed:
+            # Otra transacción da de baja a ``first`` y no encuentra a nadie en
+            # espera, porque la fila de ``second`` aún no existe.
+            session.execute(
+                update(CourseEnrollment)
+                .where(CourseEnrollment.student_id == first)
+                .values(status=DROPPED)
+            )
+            service._release_seat(course_id)
+            monkeypatch.setattr(service, "_claim_seat", claim_seat)
+        return claimed
+
+    monkeypatch.setattr(service, "_claim_seat", claim_then_concurrent_drop)
+
+    assert service.enroll(second, course.id) == ACTIVE
+    session.expire_all()
+    assert session.get(Course, course.id).enrolled_count == 1
+    assert service.waitlist(course.id) == []
+
+
+@pytest.mark.parametrize("capacity", [5, None])
+def test_stress_test_keeps_counter_capacity_and_waitlist_consistent(
+    database_url, capacity
+):
+    engine = make_engine(database_url)
+    serialize_sqlite_transactions(engine)
+    try:
+        with Session(engine) as session:
+            school = add_school(session, students=40)
+            course_id = add_course(session, school, capacity).id
+            student_ids = [s.id for s in school.students]
+
+        report = stress_test(
+            course_id,
+            student_ids,
+            workers=8,
+            drop_ratio=0.25,
+            session_factory=lambda: Session(engine),
+            seed=7,
+        )
+    finally:
+        engine.dispose()
+
+    assert report.errors == 0
+    assert sum(report.outcomes.values()) == 40
+    assert report.outcomes[DROPPED] == 10
+    assert report.consistent
+    if capacity is not None:
+        assert report.active_rows == capacity
+        assert report.waitlisted_rows == 40 - 10 - capacity
+    else:
+        assert report.active_rows == 30 and report.waitlisted_rows == 0
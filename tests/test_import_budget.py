@@ -0,0 +1,35 @@
+import pytest
+
+from schoolar_control_api import import_budget
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       150 |        150 |   _io
+import time:      2000 |      40000 |   sqlalchemy
+import time:       800 |        800 |     schoolar_control_api.database
+import time:      1200 |      42000 |   schoolar_control_api.database.connection
+Traceback noise | not | a row
+"""
+
+
+def test_parse_sums_package_time_and_reads_the_module_total():
+    total, package = import_budget._parse(
+        IMPORTTIME, "schoolar_control_api.database.connection"
+    )
+
+    assert total == 42.0
+    assert package == 2.0
+
+
+def test_importing_the_package_does_not_need_a_database(monkeypatch):
+    monkeypatch.setenv("HOST", "unreachable.invalid")
+
+    result = import_budget.measure("schoolar_control_api.database.repository", runs=1)
+
+    assert result["total_ms"] > 0
+    assert 0 < result["package_ms"] <= result["total_ms"]
+
+
+def test_failed_imports_are_reported():
+    with pytest.raises(RuntimeError, match="no_such_module"):
+        import_budget.measure("schoolar_control_api.no_such_module", runs=1)
@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database.models import Attendance, Grade
+from schoolar_control_api.services import load_test
+from schoolar_control_api.services.load_test import (
+    OPERATIONS,
+    REGISTRATION_MIX,
+    TERM_MIX,
+    prepare,
+    run_async,
+    run_threads,
+)
+from tests.factories import make_engine, serialize_sqlite_transactions
+
+
+@pytest.fixture
+def load(database_url):
+    engine = make_engine(database_url)
+    serialize_sqlite_transactions(engine)
+    with Session(engine) as session:
+        fixture = prepare(session, courses=3, students=12, capacity=10, seed=5)
+    yield engine, fixture
+    engine.dispose()
+
+
+def test_prepare_respects_capacity_and_creates_submissions(load):
+    _, fixture = load
+
+    assert len(fixture.course_ids) == 3 and len(fixture.student_ids) == 12
+    # Cada estudiante en tres cursos de diez lugares: 30 inscripciones, dos
+    # entregas por inscrito.
+    assert len(fixture.submission_ids) == 2 * 30
+
+
+def test_mixes_only_name_known_operations():
+    for mix in (TERM_MIX, REGISTRATION_MIX):
+        assert set(mix) <= set(OPERATIONS)
+        assert sum(mix.values()) == pytest.approx(1.0)
+
+
+def test_closed_and_open_loop_runs_report_every_operation(load):
+    engine, fixture = load
+
+    threads = run_threads(
+        fixture,
+        users=4,
+        duration=0.5,
+        session_factory=lambda: Session(engine),
+        seed=1,
+    )
+    opened = run_async(
+        fixture,
+        rate=60,
+        duration=0.5,
+        concurrency=4,
+        mix=REGISTRATION_MIX,
+        session_factory=lambda: Session(engine),
+        seed=1,
+    )
+
+    assert threads.errors == {} and opened.errors == {}
+    assert set(threads.operations) == set(TERM_MIX)
+    assert opened.total > 0 and opened.mode == "asyncio"
+    stats = threads.operations["roster_read"]
+    assert stats.count > 0 and stats.latency[50] <= stats.latency[99]
+    assert "roster_read" in threads.format()
+    with Session(engine) as session:
+        assert session.execute(select(func.count()).select_from(Attendance)).scalar()
+        assert session.execute(select(func.count()).select_from(Grade)).scalar()
+
+
+def test_unexpected_operation_errors_are_counted(load, monkeypatch):
+    engine, fixture = load
+
+    def broken(session, fixture, rng):
+        raise KeyError("missing fixture row")
+
+    monkeypatch.setitem(load_test.OPERATIONS, "roster_read", broken)
+    report = run_threads(
+        fixture,
+        users=2,
+        duration=0.3,
+        mix={"roster_read": 0.5, "roll_call": 0.5},
+        session_factory=lambda: Session(engine),
+        seed=1,
+    )
+
+    roster = report.operations["roster_read"]
+    assert roster.count > 0 and roster.errors == roster.count
+    assert report.errors == {"roster_read: KeyError": roster.count}
+    assert report.operations["roll_call"].errors == 0
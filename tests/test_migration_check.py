@@ -0,0 +1,18 @@
+from alembic.script import ScriptDirectory
+
+from schoolar_control_api.database.migration_check import (
+    alembic_config,
+    check_migrations,
+)
+
+
+def test_every_revision_upgrades_and_downgrades_cleanly(tmp_path):
+    revisions = list(ScriptDirectory.from_config(alembic_config()).walk_revisions())
+
+    report = check_migrations(f"sqlite:///{tmp_path / 'check.db'}")
+
+    assert [s.error for s in report.steps if s.error] == []
+    assert report.drift == []
+    assert report.leftover_tables == []
+    assert len(report.steps) == 2 * len(revisions) + 1
+    assert report.ok
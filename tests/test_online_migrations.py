@@ -0,0 +1,122 @@
+from sqlalchemy import Column, Integer, MetaData, Table, delete, insert, inspect
+from sqlalchemy import select, text, update
+from sqlalchemy.dialects import mysql
+
+from schoolar_control_api.database import online_migrations
+from schoolar_control_api.database.models import Task, TaskSubmission
+from schoolar_control_api.database.online_migrations import Throttle, online_alter
+
+TASKS = Task.__table__
+
+
+def add_column(connection, shadow):
+    connection.execute(text(f"ALTER TABLE {shadow} ADD COLUMN notes VARCHAR(50)"))
+
+
+def test_online_alter_copies_rows_and_replicates_concurrent_writes(engine, school):
+    task_ids = [t.id for t in school.tasks]
+    student_id = school.students[0].id
+    calls = []
+
+    def write_during_copy(batch, total):
+        # Tras el primer lote: cambios que sólo llegan a la sombra por triggers.
+        if calls:
+            return
+        calls.append(batch.rows)
+        row = dict(
+            connection.execute(select(TASKS).where(TASKS.c.id == task_ids[0]))
+            .mappings()
+            .one()
+        )
+        row.pop("id")
+        connection.execute(insert(TASKS).values(dict(row, name="Tarea extra")))
+        connection.execute(
+            update(TASKS).where(TASKS.c.id == task_ids[-1]).values(name="Renombrada")
+        )
+        connection.execute(delete(TASKS).where(TASKS.c.id == task_ids[1]))
+        connection.commit()
+
+    with engine.connect() as connection:
+        report = online_alter(
+            connection,
+            "tasks",
+            add_column,
+            throttle=Throttle(batch_size=1, min_batch=1, max_batch=1),
+            progress=write_during_copy,
+        )
+        names = dict(connection.execute(select(TASKS.c.id, TASKS.c.name)).all())
+        inspector = inspect(connection)
+        columns = {c["name"] for c in inspector.get_columns("tasks")}
+        indexes = {i["name"] for i in inspector.get_indexes("tasks")}
+        tables = inspector.get_table_names()
+        (referred,) = {
+            fk["referred_table"]
+            for fk in inspector.get_foreign_keys("task_submissions")
+            if fk["constrained_columns"] == ["task_id"]
+        }
+        connection.execute(
+            insert(TaskSubmission.__table__).values(
+                task_id=task_ids[0], student_id=student_id
+            )
+        )
+        connection.commit()
+
+    assert calls == [1] and report.batches == len(task_ids)
+    assert task_ids[1] not in names and "Tarea extra" in names.values()
+    assert names[task_ids[-1]] == "Renombrada"
+    assert "notes" in columns
+    assert {i.name for i in TASKS.indexes} <= indexes
+    assert referred == "tasks"
+    assert not {"_tasks_new", "_tasks_old"} & set(tables)
+
+
+class RecordingConnection:
+    dialect = mysql.dialect()
+
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, statement):
+        self.executed.append(str(statement))
+
+
+FK = {
+    "name": "fk_submission_task",
+    "constrained_columns": ["task_id"],
+    "referred_table": "tasks",
+    "referred_columns": ["id"],
+    "options": {"ondelete": "CASCADE"},
+}
+
+
+def test_mysql_keys_are_rebuilt_in_place_with_their_original_names():
+    connection = RecordingConnection()
+    table = Table("tasks", MetaData(), Column("id", Integer, primary_key=True))
+
+    online_migrations._swap(
+        connection,
+        table,
+        "_tasks_new",
+        "_tasks_old",
+        [],
+        [dict(FK, table="task_submissions")],
+    )
+    online_migrations._retire_old(
+        connection, "tasks", "_tasks_old", [dict(FK, referred_table="courses")], True
+    )
+
+    inplace = ", ALGORITHM=INPLACE, LOCK=NONE"
+    assert connection.executed == [
+        "RENAME TABLE tasks TO _tasks_old, _tasks_new TO tasks",
+        "SET SESSION foreign_key_checks = 0",
+        "ALTER TABLE task_submissions DROP FOREIGN KEY fk_submission_task" + inplace,
+        "ALTER TABLE task_submissions ADD CONSTRAINT fk_submission_task "
+        "FOREIGN KEY (task_id) REFERENCES tasks (id) ON DELETE CASCADE" + inplace,
+        "SET SESSION foreign_key_checks = 1",
+        "SET SESSION foreign_key_checks = 0",
+        "ALTER TABLE _tasks_old DROP FOREIGN KEY fk_submission_task" + inplace,
+        "ALTER TABLE tasks DROP FOREIGN KEY _fk_submission_task" + inplace,
+        "ALTER TABLE tasks ADD CONSTRAINT fk_submission_task "
+        "FOREIGN KEY (task_id) REFERENCES courses (id) ON DELETE CASCADE" + inplace,
+        "SET SESSION foreign_key_checks = 1",
+    ]
@@ -0,0 +1,161 @@
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import InvalidRequestError
+
+from schoolar_control_api.database import connection
+from schoolar_control_api.database.connection import get_session
+from schoolar_control_api.database.models import (
+    CourseEnrollment,
+    Grade,
+    OutboxEvent,
+    TaskSubmission,
+)
+from schoolar_control_api.database.outbox import OutboxRelay, QueueSink, Sink
+from schoolar_control_api.database.repository import Repository
+
+
+@pytest.fixture(autouse=True)
+def outbox():
+    outbox = connection.enable_outbox()
+    yield outbox
+    connection.disable_outbox()
+
+
+def add_submission(session, school, index=0):
+    submission = TaskSubmission(
+        task_id=school.tasks[0].id, student_id=school.students[index].id
+    )
+    session.add(submission)
+    session.commit()
+    return submission
+
+
+def events(session):
+    return session.execute(select(OutboxEvent).order_by(OutboxEvent.id)).scalars().all()
+
+
+def test_get_session_writes_events_in_the_same_transaction(configured, school):
+    with get_session() as db:
+        submission = add_submission(db, school)
+        grade = Grade(submission_id=submission.id, grade=70, graded_by=1)
+        db.add(grade)
+        db.commit()
+        grade_id = grade.id
+        grade.feedback = "Bien"
+        db.commit()
+        db.add(Grade(submission_id=submission.id, grade=10, graded_by=1))
+        db.flush()
+        db.rollback()
+
+        recorded = events(db)
+
+    assert [(e.topic, e.action) for e in recorded] == [
+        ("grades", "insert"),
+        ("grades", "update"),
+    ]
+    assert recorded[0].aggregate_id == str(grade_id)
+    assert recorded[0].payload["row"]["grade"] == 70
+    assert recorded[1].payload["changed"] == ["feedback"]
+
+
+def test_bulk_and_core_statements_are_captured(configured, school):
+    student = school.students[0]
+    with get_session() as db:
+        Repository(CourseEnrollment, db).update(
+            CourseEnrollment.student_id == student.id, values={"status": "dropped"}
+        )
+        db.execute(
+            insert(TaskSubmission),
+            [{"task_id": school.tasks[1].id, "student_id": student.id}],
+        )
+        submission_id = db.execute(select(func.max(TaskSubmission.id))).scalar()
+        db.execute(
+            insert(Grade),
+            [
+                {"submission_id": submission_id, "grade": 50, "graded_by": 1},
+                {"submission_id": submission_id, "grade": 60, "graded_by": 1},
+            ],
+        )
+        db.commit()
+
+        recorded = events(db)
+
+    assert [(e.topic, e.action) for e in recorded] == [
+        ("course_enrollments", "update"),
+        ("grades", "insert"),
+        ("grades", "insert"),
+    ]
+    assert {"status", "version"} <= set(recorded[0].payload["changed"])
+    assert recorded[1].payload["row"]["grade"] == "50.00"
+
+
+def test_insert_without_recoverable_keys_fails_the_transaction(
+    configured, school, monkeypatch
+):
+    with get_session() as db:
+        submission = add_submission(db, school)
+        # Como en MySQL: sin RETURNING las claves autoincrementales no vuelven.
+        monkeypatch.setattr(configured.dialect, "insert_executemany_returning", False)
+        with pytest.raises(InvalidRequestError):
+            db.execute(
+                insert(Grade),
+                [
+                    {"submission_id": submission.id, "grade": 50, "graded_by": 1},
+                    {"submission_id": submission.id, "grade": 60, "graded_by": 1},
+                ],
+            )
+        db.rollback()
+
+        assert db.execute(select(func.count()).select_from(Grade)).scalar() == 0
+        assert events(db) == []
+
+
+def test_outbox_is_opt_in(configured, school):
+    connection.disable_outbox()
+    with get_session() as db:
+        add_submission(db, school)
+        assert events(db) == []
+
+
+def test_importing_connection_does_not_load_the_models():
+    code = (
+        "import sys\n"
+        "import schoolar_control_api.database.connection\n"
+        "print('schoolar_control_api.database.models' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == "False"
+
+
+class FailingSink(Sink):
+    def send(self, messages):
+        raise ConnectionError("broker down")
+
+
+def test_relay_publishes_once_and_retries_failed_batches(configured, school):
+    with get_session() as db:
+        submission = add_submission(db, school)
+        db.add_all(
+            Grade(submission_id=submission.id, grade=g, graded_by=1) for g in (1, 2, 3)
+        )
+        db.commit()
+
+    failing = OutboxRelay(configured, [FailingSink()], max_attempts=1)
+    assert failing.publish_batch() == 0
+    assert failing.stats()["dead"] == 3
+
+    with configured.begin() as connection:
+        connection.execute(OutboxEvent.__table__.update().values(attempts=0))
+    sink = QueueSink()
+    relay = OutboxRelay(configured, [sink], batch_size=2)
+
+    assert relay.drain() == 3
+    assert relay.drain() == 0
+    assert [sink.queue.get_nowait().action for _ in range(3)] == ["insert"] * 3
+    assert relay.stats() == {"published": 3, "failed": 0, "pending": 0, "dead": 0}
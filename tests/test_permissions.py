@@ -0,0 +1,180 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from schoolar_control_api.database.models import Role, Teacher, roles_users
+from schoolar_control_api.database.repository import Repository
+from schoolar_control_api.services import permissions
+from schoolar_control_api.services.permissions import PermissionResolver
+
+
+@pytest.fixture(autouse=True)
+def installed(session):
+    permissions.install(session)
+    yield session
+    permissions.uninstall(session)
+
+
+@pytest.fixture
+def resolver(engine):
+    return PermissionResolver(lambda: Session(engine))
+
+
+@pytest.fixture
+def roles(session):
+    roles = {name: Role(name=name) for name in ("admin", "teacher", "student")}
+    session.add_all(roles.values())
+    session.commit()
+    return roles
+
+
+def cached(resolver, user_id):
+    misses = resolver.misses
+    permissions = resolver.resolve(user_id)
+    return resolver.misses == misses, permissions
+
+
+def test_resolve_caches_identities_and_roles(session, school, roles, resolver):
+    teacher = school.teacher.user
+    teacher.roles = roles["teacher"]
+    session.commit()
+
+    permissions = resolver.resolve(teacher.id)
+
+    assert permissions.has_role("teacher", "admin") and not permissions.has_role(
+        "admin"
+    )
+    assert permissions.teacher_id == school.teacher.id and not permissions.is_student
+    assert cached(resolver, teacher.id) == (True, permissions)
+    assert resolver.resolve(10**6) is None
+
+
+def test_orm_role_changes_invalidate_after_commit(session, school, roles, resolver):
+    user = school.students[0].user
+    resolver.resolve(user.id)
+
+    user.roles = roles["admin"]
+    session.flush()
+    assert cached(resolver, user.id)[0]
+    session.commit()
+
+    hit, permissions = cached(resolver, user.id)
+    assert not hit and permissions.has_role("admin")
+
+
+def test_core_roles_users_statements_invalidate(session, school, roles, resolver):
+    first, second = (s.user.id for s in school.students[:2])
+    resolver.resolve_many([first, second])
+
+    session.execute(
+        insert(roles_users).values(
+            [
+                {"user_id": first, "role_id": roles["admin"].id},
+                {"user_id": first, "role_id": roles["student"].id},
+            ]
+        )
+    )
+    session.commit()
+    assert not cached(resolver, first)[0]
+    assert cached(resolver, second)[0]
+
+    session.execute(
+        insert(roles_users), [{"user_id": second, "role_id": roles["admin"].id}]
+    )
+    session.commit()
+    assert not cached(resolver, second)[0]
+
+    session.execute(
+        delete(roles_users).where(roles_users.c.role_id == roles["admin"].id)
+    )
+    session.commit()
+    assert resolver.resolve_many([first, second]) and resolver.hits == 1
+    assert resolver.resolve(first).roles == {"student"}
+    assert resolver.resolve(second).roles == frozenset()
+
+
+def test_bulk_repository_writes_invalidate(session, school, roles, resolver):
+    teacher_user = school.teacher.user_id
+    student_user = school.students[0].user_id
+    resolver.resolve_many([teacher_user, student_user])
+
+    Repository(Teacher, session).update(
+        Teacher.id == school.teacher.id, values={"deleted_at": datetime(2026, 1, 1)}
+    )
+
+    hit, permissions = cached(resolver, teacher_user)
+    assert not hit and not permissions.is_teacher
+    assert cached(resolver, student_user)[0]
+
+    session.execute(
+        update(Role).where(Role.id == roles["admin"].id).values(name="root")
+    )
+    session.commit()
+    assert not cached(resolver, student_user)[0]
+
+
+def test_rolled_back_statements_do_not_invalidate(session, school, roles, resolver):
+    user_id = school.students[0].user_id
+    resolver.resolve(user_id)
+
+    session.execute(
+        insert(roles_users).values(user_id=user_id, role_id=roles["admin"].id)
+    )
+    session.rollback()
+
+    assert cached(resolver, user_id)[0]
+
+
+def test_invalidation_during_load_is_not_overwritten(session, school, roles, resolver):
+    user = school.students[0].user
+    load = resolver._load
+
+    def racing_load(user_ids):
+        loaded = load(user_ids)
+        # Otra petición confirma un cambio de roles antes de guardar el resultado.
+        user.roles = roles["admin"]
+        session.commit()
+        return loaded
+
+    resolver._load = racing_load
+    assert resolver.resolve(user.id).roles == frozenset()
+
+    resolver._load = load
+    hit, permissions = cached(resolver, user.id)
+    assert not hit and permissions.has_role("admin")
+
+
+def test_only_installed_sessions_invalidate(engine, school, roles, resolver):
+    user_id = school.students[0].user_id
+    factory = sessionmaker(engine)
+    resolver.resolve(user_id)
+
+    with Session(engine) as other:
+        other.execute(
+            insert(roles_users).values(user_id=user_id, role_id=roles["admin"].id)
+        )
+        other.commit()
+    assert cached(resolver, user_id)[0]
+
+    permissions.install(factory)
+    permissions.install(factory)
+    try:
+        with factory() as installed:
+            installed.execute(
+                delete(roles_users).where(roles_users.c.user_id == user_id)
+            )
+            installed.commit()
+    finally:
+        permissions.uninstall(factory)
+    assert not cached(resolver, user_id)[0]
+
+
+def test_user_generations_are_bounded(engine):
+    resolver = PermissionResolver(lambda: Session(engine), max_entries=3)
+
+    for user_id in range(10):
+        resolver.invalidate(user_id)
+
+    assert len(resolver._user_generations) <= 3
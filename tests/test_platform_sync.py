@@ -0,0 +1,254 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from sqlalchemy import select
+
+from schoolar_control_api.database.models import Grade, Platform, Task, TaskSubmission
+from schoolar_control_api.database.repository import RepositoryError
+from schoolar_control_api.services.platform_sync import PlatformSyncWorker
+
+
+class FakePlatform:
+    """Servidor HTTP local que responde ``GET <prefijo>/tasks/<id>/results``."""
+
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                fake.requests.append((self.path, time.monotonic()))
+                status, payload = fake.responses.get(self.path, (404, {}))
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def results(self, prefix, external_id, results, status=200):
+        self.responses[f"{prefix}/tasks/{external_id}/results"] = (
+            status,
+            {"results": results},
+        )
+
+    def times(self, prefix):
+        return [at for path, at in self.requests if path.startswith(prefix + "/")]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def server():
+    with FakePlatform() as server:
+        yield server
+
+
+def add_platform(session, server, prefix, **api_config):
+    platform = Platform(
+        name=prefix.strip("/"), base_url=server.url + prefix, api_config=api_config
+    )
+    session.add(platform)
+    session.flush()
+    return platform
+
+
+def add_external_tasks(session, school, platform, count, prefix):
+    tasks = [
+        Task(
+            course_id=school.course.id,
+            unit_id=school.unit.id,
+            component_id=school.component.id,
+            platform_id=platform.id,
+            external_id=f"{prefix}{i}",
+            name=f"Externa {prefix}{i}",
+            max_score=10,
+            due_date=datetime(2026, 10, 1, 23, 59),
+        )
+        for i in range(count)
+    ]
+    session.add_all(tasks)
+    session.commit()
+    return tasks
+
+
+def test_upserts_submissions_and_grades_from_every_platform(session, school, server):
+    moodle = add_platform(session, server, "/moodle")
+    classroom = add_platform(session, server, "/classroom")
+    (quiz,) = add_external_tasks(session, school, moodle, 1, "q")
+    (essay,) = add_external_tasks(session, school, classroom, 1, "e")
+    first, second = (s.key_registration for s in school.students[:2])
+    server.results(
+        "/moodle",
+        "q0",
+        [
+            {"student": first, "score": 8, "submitted_at": "2026-10-01T10:00:00"},
+            {"student": second, "score": "9.5", "feedback": "Bien"},
+            {"student": "K99999", "score": 5},
+        ],
+    )
+    server.results(
+        "/classroom",
+        "e0",
+        [{"student": first, "text": "Ensayo", "submitted_at": "2026-10-02T08:00:00"}],
+    )
+
+    report = PlatformSyncWorker(session, batch_size=2).sync()
+
+    assert (report.tasks, report.results, report.errors) == (2, 4, {})
+    assert (report.submissions_created, report.grades_written) == (3, 2)
+    assert report.skipped == 1
+    submissions = {
+        (s.task_id, s.student_id): s
+        for s in session.execute(select(TaskSubmission)).scalars()
+    }
+    graded = submissions[(quiz.id, school.students[0].id)]
+    assert graded.status == "graded"
+    assert graded.submitted_at == datetime(2026, 10, 1, 10, 0)
+    late = submissions[(essay.id, school.students[0].id)]
+    assert (late.status, late.submission_text) == ("late", "Ensayo")
+    grades = {g.submission_id: g for g in session.execute(select(Grade)).scalars()}
+    assert grades[graded.id].grade == Decimal("80.00")
+    assert grades[graded.id].graded_by == school.teacher.user_id
+    other = submissions[(quiz.id, school.students[1].id)]
+    assert (grades[other.id].grade, grades[other.id].feedback) == (
+        Decimal("95.00"),
+        "Bien",
+    )
+
+    # Una segunda pasada actualiza las mismas filas sin duplicarlas.
+    server.results("/moodle", "q0", [{"student": first, "score": 10}])
+    report = PlatformSyncWorker(session).sync([moodle.id])
+    assert (report.submissions_created, report.submissions_updated) == (0, 1)
+    session.expire_all()
+    assert session.query(TaskSubmission).count() == 3
+    assert session.get(Grade, grades[graded.id].id).grade == Decimal("100.00")
+
+
+def test_timestamps_with_a_time_zone_are_stored_as_utc(session, school, server):
+    platform = add_platform(session, server, "/lms")
+    (task,) = add_external_tasks(session, school, platform, 1, "t")
+    first, second = (s.key_registration for s in school.students[:2])
+    server.results(
+        "/lms",
+        "t0",
+        [
+            {
+                "student": first,
+                "text": "A tiempo",
+                "submitted_at": "2026-10-01T20:00:00Z",
+            },
+            {
+                "student": second,
+                "text": "Tarde",
+                "submitted_at": "2026-10-01T22:00:00-05:00",
+            },
+        ],
+    )
+
+    report = PlatformSyncWorker(session).sync()
+
+    assert (report.submissions_created, report.errors) == (2, {})
+    rows = {s.student_id: s for s in session.execute(select(TaskSubmission)).scalars()}
+    on_time, late = rows[school.students[0].id], rows[school.students[1].id]
+    assert (on_time.submitted_at, on_time.status) == (
+        datetime(2026, 10, 1, 20, 0),
+        "submitted",
+    )
+    assert (late.submitted_at, late.status) == (datetime(2026, 10, 2, 3, 0), "late")
+
+
+def test_rate_limit_is_applied_per_platform(session, school, server):
+    slow = add_platform(session, server, "/slow", rate_limit=10, max_concurrency=1)
+    fast = add_platform(session, server, "/fast", max_concurrency=4)
+    for platform, prefix in ((slow, "s"), (fast, "f")):
+        for task in add_external_tasks(session, school, platform, 4, prefix):
+            server.results(f"/{platform.name}", task.external_id, [])
+
+    report = PlatformSyncWorker(session).sync()
+
+    assert report.errors == {}
+    slow_times, fast_times = server.times("/slow"), server.times("/fast")
+    assert len(slow_times) == len(fast_times) == 4
+    # 10 peticiones/s con ráfaga de 1: al menos 0.3 s entre la primera y la cuarta.
+    assert max(slow_times) - min(slow_times) >= 0.25
+    # La plataforma sin límite no espera a la limitada.
+    assert max(fast_times) < max(slow_times)
+
+
+def test_bad_payloads_and_http_errors_do_not_stop_the_sync(session, school, server):
+    platform = add_platform(session, server, "/moodle")
+    broken, valid, failing = add_external_tasks(session, school, platform, 3, "t")
+    key = school.students[0].key_registration
+    server.results(
+        "/moodle",
+        "t0",
+        [
+            {"student": key, "submitted_at": "ayer"},
+            {"student": key, "score": "diez"},
+            {"student": key, "score": "NaN"},
+            "not an object",
+            {"student": school.students[1].key_registration, "score": 7},
+        ],
+    )
+    server.results("/moodle", "t1", [{"student": key, "score": 6}])
+    server.results("/moodle", "t2", [], status=500)
+
+    report = PlatformSyncWorker(session).sync()
+
+    assert set(report.errors) == {broken.id, failing.id}
+    assert "HTTP 500" in report.errors[failing.id]
+    assert report.skipped == 4
+    assert report.grades_written == 2
+    assert {s.task_id for s in session.execute(select(TaskSubmission)).scalars()} == {
+        broken.id,
+        valid.id,
+    }
+
+
+def test_writer_failure_cancels_fetchers_instead_of_hanging(
+    session, school, server, monkeypatch
+):
+    platform = add_platform(session, server, "/moodle", max_concurrency=8)
+    tasks = add_external_tasks(session, school, platform, 20, "t")
+    keys = [s.key_registration for s in school.students]
+    for task in tasks:
+        server.results(
+            "/moodle", task.external_id, [{"student": k, "score": 5} for k in keys]
+        )
+
+    def fail(self, batch, tasks, report):
+        raise RepositoryError("Error saving external TaskSubmission")
+
+    monkeypatch.setattr(PlatformSyncWorker, "_upsert", fail)
+    worker = PlatformSyncWorker(session, batch_size=1)
+
+    # La cola admite cuatro resultados: antes, las descargas se quedaban
+    # bloqueadas en ``queue.put`` para siempre.
+    with pytest.raises(RepositoryError):
+        asyncio.run(asyncio.wait_for(worker.sync_async(), timeout=10))
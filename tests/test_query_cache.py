@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database import query_cache
+from schoolar_control_api.database.models import Course, CourseEnrollment, Student
+from schoolar_control_api.database.query_cache import QueryCache
+from schoolar_control_api.database.repository import Repository
+
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_repeated_reads_are_served_without_sql(engine, school, statements):
+    cache = QueryCache()
+    with Session(engine) as first, Session(engine) as second:
+        cold = Repository(Student, first, cache=cache).get_all()
+        statements.clear()
+        warm = Repository(Student, second, cache=cache).get_all()
+
+        assert statements == []
+        assert [s.id for s in warm] == [s.id for s in cold]
+        assert all(s in second and s not in first for s in warm)
+        assert warm[0].key_registration == cold[0].key_registration
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_repository_writes_invalidate_the_table_and_counter_parents(session, school):
+    cache = QueryCache()
+    students = Repository(Student, session, cache=cache)
+    courses = Repository(Course, session, cache=cache)
+    student_id = school.students[0].id
+    students.get_all()
+    courses.get(Course.id == school.course.id)
+
+    Repository(CourseEnrollment, session, cache=cache).update(
+        CourseEnrollment.student_id == student_id,
+        values={"status": "dropped"},
+    )
+
+    assert cache.stats()["invalidations"] == 1
+    assert courses.get(Course.id == school.course.id).enrolled_count == 4
+    students.get_all()
+    assert cache.hits == 1
+
+
+def test_ttl_zero_bypasses_and_lru_evicts(session, school, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(query_cache.time, "monotonic", lambda: clock[0])
+    cache = QueryCache(max_entries=1, default_ttl=10)
+    repository = Repository(Student, session, cache=cache)
+    first_id = school.students[0].id
+
+    repository.get(Student.id == first_id)
+    repository.get(Student.id == first_id, cache_ttl=0)
+    assert cache.stats()["size"] == 1 and cache.misses == 1
+
+    repository.get(Student.id == school.students[1].id)
+    assert cache.evictions == 1
+    clock[0] += 11
+    repository.get(Student.id == school.students[1].id)
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_results_read_during_an_invalidation_are_not_stored(engine, session, school):
+    cache = QueryCache()
+
+    def concurrent_write(conn, cursor, statement, parameters, context, executemany):
+        cache.invalidate(["students"])
+
+    event.listen(engine, "before_cursor_execute", concurrent_write, once=True)
+    cache.execute(session, select(Student))
+
+    assert cache.stats()["size"] == 0
+    cache.execute(session, select(Student))
+    assert cache.stats()["size"] == 1
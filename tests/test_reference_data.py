@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database.models import Course, Degree, Student
+from schoolar_control_api.services.reference_data import CompactIndex, ReferenceSnapshot
+
+
+def test_compact_index_lookups_and_merges():
+    index = CompactIndex([("MAT-101", 3), ("FIS-101", 1), ("QUI-101", 2)])
+
+    assert [index.get(k) for k in ("FIS-101", "MAT-101", "BIO-101")] == [1, 3, None]
+    assert "QUI-101" in index and len(index) == 3
+
+    merged = index.merged({1: "FIS-201", 2: None, 4: "BIO-101"})
+
+    assert sorted(merged.items()) == [("BIO-101", 4), ("FIS-201", 1), ("MAT-101", 3)]
+    assert index.get("FIS-101") == 1 and merged.get("FIS-101") is None
+    assert merged.nbytes() > 0
+
+
+def test_snapshot_loads_and_applies_incremental_changes(engine, session, school):
+    snapshot = ReferenceSnapshot(lambda: Session(engine), settle=0)
+    snapshot.load()
+    student = school.students[0]
+    key = student.key_registration
+
+    assert snapshot.course_id("MAT-101") == school.course.id
+    assert snapshot.student_id(key) == student.id
+    assert snapshot.degree_id(school.degree.name) == school.degree.id
+
+    session.get(Course, school.course.id).code = "MAT-201"
+    session.get(Student, student.id).deleted_at = datetime.utcnow()
+    session.add(Degree(name="Medicina", description="Carrera de prueba"))
+    session.commit()
+
+    assert snapshot.refresh() == 3
+    assert snapshot.course_id("MAT-101") is None
+    assert snapshot.course_id("MAT-201") == school.course.id
+    assert snapshot.student_id(key) is None
+    assert snapshot.degree_id("Medicina") is not None
+    assert snapshot.refresh() == 0
+    assert snapshot.stats()["sizes"]["key_registration"] == len(school.students) - 1
@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+import pytest
+
+from schoolar_control_api.database.models import Attendance, Grade, TaskSubmission
+from schoolar_control_api.services.reports import (
+    ReportRunner,
+    build_course_report,
+    build_transcripts,
+    final_grade,
+)
+from tests.factories import SQLITE_CONNECT_ARGS
+
+
+def test_final_grade_weights_tasks_then_components():
+    rows = [
+        (1, Decimal("60"), Decimal("1"), Decimal("80")),
+        (1, Decimal("60"), Decimal("3"), Decimal("40")),
+        (2, Decimal("40"), Decimal("1"), Decimal("100")),
+        (2, Decimal("40"), Decimal("1"), None),
+        (None, None, None, None),
+    ]
+
+    # Componente 1: (80 + 3 * 40) / 4 = 50; componente 2: 100.
+    assert final_grade(rows) == pytest.approx((60 * 50 + 40 * 100) / 100)
+    assert final_grade(rows[3:]) is None
+
+
+@pytest.fixture
+def graded(session, school):
+    first, second = school.students[:2]
+    submission = TaskSubmission(task_id=school.tasks[0].id, student_id=first.id)
+    session.add(submission)
+    session.flush()
+    session.add(Grade(submission_id=submission.id, grade=85, graded_by=1))
+    session.add(
+        Attendance(
+            course_id=school.course.id,
+            student_id=second.id,
+            date=school.period.start_date,
+            status="present",
+        )
+    )
+    session.commit()
+    return school
+
+
+def test_reports_show_final_grades_and_attendance(session, graded):
+    first, second = graded.students[:2]
+
+    report = build_course_report(session, graded.course.id)
+    transcripts = build_transcripts(session, graded.degree.id)
+
+    lines = report.splitlines()
+    assert lines[0] == "MAT-101 - Cálculo"
+    assert any(first.key_registration in line and " 85.00" in line for line in lines)
+    assert any(second.key_registration in line and "100.0%" in line for line in lines)
+    assert lines[-1] == f"  Estudiantes: {len(graded.students)}  Promedio:  85.00"
+    assert set(transcripts) == {s.id for s in graded.students}
+    assert "MAT-101" in transcripts[first.id] and " 85.00" in transcripts[first.id]
+
+
+def test_runner_matches_in_process_reports(session, graded, database_url, tmp_path):
+    runner = ReportRunner(
+        processes=2, database_url=database_url, connect_args=SQLITE_CONNECT_ARGS
+    )
+
+    reports = runner.course_reports([graded.course.id])
+    transcripts = runner.transcripts([graded.degree.id])
+
+    assert reports == {graded.course.id: build_course_report(session, graded.course.id)}
+    assert transcripts == build_transcripts(session, graded.degree.id)
+    path = tmp_path / "reports.txt"
+    ReportRunner.write(reports, str(path))
+    assert path.read_text(encoding="utf-8") == reports[graded.course.id] + "\n"
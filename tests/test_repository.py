@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from schoolar_control_api.database.models import Grade, Student, TaskSubmission, User
+from schoolar_control_api.database.repository import (
+    Repository,
+    RepositoryError,
+    VersionConflictError,
+)
+
+
+def add_grade(session, school, grade=70):
+    submission = TaskSubmission(
+        task_id=school.tasks[0].id, student_id=school.students[0].id
+    )
+    session.add(submission)
+    session.flush()
+    entity = Grade(submission_id=submission.id, grade=grade, graded_by=1)
+    session.add(entity)
+    session.commit()
+    return entity
+
+
+def test_updates_bump_the_version_and_check_the_expected_one(session, school):
+    grade_id = add_grade(session, school).id
+    repository = Repository(Grade, session)
+
+    updated = repository.update(
+        Grade.id == grade_id, values={"grade": 80}, expected_version=1
+    )
+    assert (updated.grade, updated.version) == (80, 2)
+
+    with pytest.raises(VersionConflictError):
+        repository.update(
+            Grade.id == grade_id, values={"grade": 10}, expected_version=1
+        )
+    missing = repository.update(Grade.id == -1, values={"grade": 1}, expected_version=1)
+    assert missing is None
+
+    session.expire_all()
+    stored = session.get(Grade, grade_id)
+    assert (stored.grade, stored.version) == (80, 2)
+    bumped = repository.update(Grade.id == grade_id, values={"feedback": "Bien"})
+    assert bumped.version == 3
+
+
+def test_stale_objects_are_rejected_on_flush(engine, school, session):
+    grade_id = add_grade(session, school).id
+
+    with Session(engine) as first, Session(engine) as second:
+        mine = first.get(Grade, grade_id)
+        theirs = second.get(Grade, grade_id)
+        theirs.grade = 90
+        second.commit()
+
+        mine.grade = 60
+        with pytest.raises(StaleDataError):
+            first.commit()
+
+    session.expire_all()
+    assert session.get(Grade, grade_id).grade == 90
+
+
+def test_concurrent_edits_through_the_repository_conflict(engine, school, session):
+    grade_id = add_grade(session, school).id
+
+    with Session(engine) as first, Session(engine) as second:
+        mine = first.get(Grade, grade_id)
+        theirs = second.get(Grade, grade_id)
+        theirs.grade = 90
+        Repository(Grade, second).add(theirs)
+
+        mine.grade = 60
+        with pytest.raises(VersionConflictError):
+            Repository(Grade, first).add(mine)
+        first.rollback()
+
+    session.expire_all()
+    assert session.get(Grade, grade_id).grade == 90
+
+
+def test_change_feed_pages_through_ties_without_gaps(session, school):
+    ids = sorted(s.id for s in school.students)
+    stamp = datetime(2026, 1, 1)
+    # Tres estudiantes con el mismo ``updated_at``: el id desempata.
+    for student_id, minutes in zip(ids, (0, 0, 0, 5, 10)):
+        session.execute(
+            update(Student)
+            .where(Student.id == student_id)
+            .values(updated_at=stamp + timedelta(minutes=minutes))
+        )
+    session.commit()
+    repository = Repository(Student, session)
+
+    seen, watermark, pages = [], None, 0
+    while True:
+        batch = repository.changes_since(watermark=watermark, limit=2)
+        seen.extend(s.id for s in batch.items)
+        watermark, pages = batch.watermark, pages + 1
+        if not batch.has_more:
+            break
+
+    assert seen == ids and pages == 3
+    assert watermark == (stamp + timedelta(minutes=10), ids[-1])
+    assert repository.changes_since(watermark=watermark).items == []
+
+    session.execute(
+        update(Student).where(Student.id == ids[0]).values(updated_at=datetime.utcnow())
+    )
+    session.commit()
+    assert repository.changes_since(watermark=watermark, settle=60).items == []
+    (changed,) = repository.changes_since(watermark=watermark).items
+    assert changed.id == ids[0]
+
+
+def test_change_feed_requires_updated_at(session):
+    with pytest.raises(RepositoryError):
+        Repository(User, session).changes_since()
@@ -0,0 +1,128 @@
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from schoolar_control_api.database import repository as repository_module
+from schoolar_control_api.database.models import CourseEnrollment
+from schoolar_control_api.database.repository import (
+    DeadlockError,
+    Repository,
+    StatementTimeoutError,
+)
+from schoolar_control_api.database.resilience import (
+    CONNECTION,
+    DEADLOCK,
+    INTEGRITY,
+    OTHER,
+    TIMEOUT,
+    RetryPolicy,
+    classify,
+)
+
+
+class MySQLError(Exception):
+    def __init__(self, errno, message):
+        super().__init__(errno, message)
+        self.errno = errno
+
+
+def mysql_error(errno):
+    return OperationalError("UPDATE ...", {}, MySQLError(errno, "error"))
+
+
+@pytest.mark.parametrize(
+    "errno, kind",
+    [
+        (1213, DEADLOCK),
+        (1205, TIMEOUT),
+        (3024, TIMEOUT),
+        (1317, TIMEOUT),
+        (2013, CONNECTION),
+        (1064, OTHER),
+    ],
+)
+def test_classify_mysql_error_codes(errno, kind):
+    assert classify(mysql_error(errno)) == kind
+
+
+def test_classify_integrity_errors():
+    assert classify(IntegrityError("INSERT ...", {}, Exception())) == INTEGRITY
+
+
+@pytest.mark.parametrize(
+    "errno, error_class, attempts",
+    [(1213, DeadlockError, 3), (1205, StatementTimeoutError, 1)],
+)
+def test_only_deadlocks_are_retried_on_writes(
+    session, school, monkeypatch, errno, error_class, attempts
+):
+    student_id = school.students[0].id
+    calls = []
+
+    def failing_execute(*args, **kwargs):
+        calls.append(args)
+        raise mysql_error(errno)
+
+    repository = Repository(
+        CourseEnrollment, session, retry_policy=RetryPolicy(base_delay=0)
+    )
+    monkeypatch.setattr(session, "execute", failing_execute)
+
+    with pytest.raises(error_class):
+        repository.update(
+            CourseEnrollment.student_id == student_id,
+            values={"status": "dropped"},
+        )
+    assert len(calls) == attempts
+
+
+class FakeCursor:
+    def __init__(self, log, fail):
+        self._log = log
+        self._fail = fail
+
+    def execute(self, sql):
+        if self._fail:
+            raise MySQLError(2013, "Lost connection")
+        self._log.append(sql)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, fail=False):
+        self.executed = []
+        self._fail = fail
+
+    def cursor(self):
+        return FakeCursor(self.executed, self._fail)
+
+
+class FakeRecord:
+    def __init__(self, modified):
+        self.info = {repository_module._LOCK_TIMEOUT_KEY: True} if modified else {}
+        self.invalidated = None
+
+    def invalidate(self, error=None):
+        self.invalidated = error
+
+
+def test_lock_wait_timeout_is_reset_when_the_connection_is_checked_in():
+    untouched, modified = FakeConnection(), FakeConnection()
+    record = FakeRecord(modified=True)
+
+    repository_module._reset_lock_timeout(untouched, FakeRecord(modified=False))
+    repository_module._reset_lock_timeout(modified, record)
+    repository_module._reset_lock_timeout(modified, record)
+
+    assert untouched.executed == []
+    assert modified.executed == ["SET SESSION innodb_lock_wait_timeout = DEFAULT"]
+    assert record.info == {}
+
+
+def test_connection_is_discarded_if_the_reset_fails():
+    record = FakeRecord(modified=True)
+
+    repository_module._reset_lock_timeout(FakeConnection(fail=True), record)
+
+    assert isinstance(record.invalidated, MySQLError)
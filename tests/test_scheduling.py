@@ -0,0 +1,117 @@
+import random
+from datetime import datetime, time, timedelta
+
+from schoolar_control_api.database.models import (
+    Course,
+    CourseEnrollment,
+    CourseSchedule,
+    Room,
+    Teacher,
+    User,
+)
+from schoolar_control_api.services.scheduling import IntervalTree, TimetableValidator
+
+
+def test_interval_tree_matches_a_linear_scan():
+    rng = random.Random(11)
+    intervals = []
+    for value in range(300):
+        start = rng.randrange(0, 1000)
+        intervals.append((start, start + rng.randrange(1, 80), value))
+    tree = IntervalTree(intervals)
+
+    for _ in range(300):
+        start = rng.randrange(-20, 1050)
+        end = start + rng.randrange(1, 60)
+        expected = {v for s, e, v in intervals if s < end and e > start}
+        assert sorted(tree.overlapping(start, end)) == sorted(expected)
+    assert len(tree) == 300
+    assert IntervalTree([]).overlapping(0, 10) == []
+    # Semiabiertos: los intervalos contiguos no se traslapan.
+    assert IntervalTree([(0, 10, "a"), (10, 20, "b")]).overlapping(10, 15) == ["b"]
+
+
+def add_timetable(session, school):
+    user = User(
+        fullname="Otra docente",
+        username="docente2",
+        email="docente2@school.edu",
+        password="secret-password",
+    )
+    session.add(user)
+    session.flush()
+    other_teacher = Teacher(user_id=user.id, specialization="Física")
+    rooms = [Room(name=f"Aula {i}", capacity=30) for i in range(3)]
+    session.add_all([other_teacher, *rooms])
+    session.flush()
+    same_teacher = Course(
+        name="Álgebra",
+        code="ALG-101",
+        teacher_id=school.teacher.id,
+        period_id=school.period.id,
+    )
+    other = Course(
+        name="Física",
+        code="FIS-101",
+        teacher_id=other_teacher.id,
+        period_id=school.period.id,
+    )
+    session.add_all([same_teacher, other])
+    session.flush()
+    session.add(CourseEnrollment(student_id=school.students[0].id, course_id=other.id))
+
+    def meet(course, room, weekday, start, end):
+        schedule = CourseSchedule(
+            course_id=course.id,
+            room_id=room.id,
+            weekday=weekday,
+            start_time=time(*start),
+            end_time=time(*end),
+        )
+        session.add(schedule)
+        session.flush()
+        return schedule.id
+
+    ids = {
+        "monday": meet(school.course, rooms[0], 0, (9, 0), (11, 0)),
+        "same_teacher": meet(same_teacher, rooms[1], 0, (10, 0), (12, 0)),
+        "tuesday": meet(school.course, rooms[0], 1, (9, 0), (10, 0)),
+        "other": meet(other, rooms[0], 1, (9, 30), (10, 30)),
+        "adjacent": meet(other, rooms[0], 1, (10, 30), (11, 0)),
+    }
+    session.commit()
+    return ids, rooms, same_teacher
+
+
+def test_period_conflicts_by_teacher_room_and_student(session, school):
+    ids, rooms, _ = add_timetable(session, school)
+
+    conflicts = TimetableValidator(session).validate_period(school.period.id)
+
+    assert {
+        (c.kind, c.resource_id, c.first.schedule_id, c.second.schedule_id)
+        for c in conflicts
+    } == {
+        ("teacher", school.teacher.id, ids["monday"], ids["same_teacher"]),
+        ("room", rooms[0].id, ids["tuesday"], ids["other"]),
+        ("student", school.students[0].id, ids["tuesday"], ids["other"]),
+    }
+
+
+def test_candidate_slots_and_scheduled_moments(session, school):
+    ids, rooms, same_teacher = add_timetable(session, school)
+    validator = TimetableValidator(session)
+
+    (conflict,) = validator.check_slot(
+        same_teacher.id, 1, time(9, 45), time(10, 15), room_id=rooms[1].id
+    )
+    assert (conflict.kind, conflict.second.schedule_id) == ("teacher", ids["tuesday"])
+    assert validator.check_slot(same_teacher.id, 2, time(9), time(10)) == []
+
+    start = school.period.start_date
+    monday = datetime.combine(start + timedelta(days=-start.weekday() % 7), time())
+    assert validator.is_scheduled(school.course.id, monday.replace(hour=10))
+    assert not validator.is_scheduled(school.course.id, monday.replace(hour=11))
+    assert not validator.is_scheduled(
+        school.course.id, monday.replace(hour=10) + timedelta(days=365)
+    )
@@ -0,0 +1,69 @@
+import json
+from datetime import time
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from schoolar_control_api.database.models import CourseSchedule, Task, User
+from schoolar_control_api.services import serialization
+from schoolar_control_api.services.serialization import (
+    ModelSerializer,
+    serialize,
+    serialize_rows,
+)
+
+
+def test_model_serializer_converts_numeric_and_hides_passwords(session, school):
+    task = school.tasks[0]
+
+    (data,) = json.loads(serialize([task]))
+    (text,) = json.loads(serialize([task], decimal="str"))
+
+    assert data["max_score"] == 100.0 and data["weight"] == 1.0
+    assert (text["max_score"], text["weight"]) == ("100.00", "1.00")
+    assert data["due_date"] == task.due_date.isoformat()
+    assert "password" not in ModelSerializer(User).fields
+    assert serialize([]) == b"[]"
+
+
+def test_serialize_rows_honours_decimal_mode(session, school):
+    rows = session.execute(
+        select(Task.id, Task.max_score, Task.due_date).order_by(Task.id)
+    ).all()
+
+    floats = json.loads(serialize_rows(rows))
+    strings = json.loads(serialize_rows(rows, decimal="str"))
+
+    assert [r["max_score"] for r in floats] == [100.0] * len(rows)
+    assert [r["max_score"] for r in strings] == ["100.00"] * len(rows)
+    assert strings[0]["due_date"] == rows[0].due_date.isoformat()
+    with pytest.raises(ValueError):
+        serialize_rows(rows, decimal="int")
+
+
+def test_standard_library_fallback_matches_orjson(session, school, monkeypatch):
+    data = [{"score": Decimal("9.50"), "due": school.tasks[0].due_date, "n": None}]
+    fast = serialization.dumps(data)
+
+    monkeypatch.setattr(serialization, "orjson", None)
+
+    assert json.loads(serialization.dumps(data)) == json.loads(fast)
+
+
+def test_both_backends_serialize_schedule_times_alike(session, school, monkeypatch):
+    schedule = CourseSchedule(
+        course_id=school.course.id,
+        weekday=1,
+        start_time=time(8, 0),
+        end_time=time(9, 30),
+    )
+    session.add(schedule)
+    session.commit()
+    fast = serialize([schedule])
+
+    monkeypatch.setattr(serialization, "orjson", None)
+    standard = serialize([schedule])
+
+    assert json.loads(standard) == json.loads(fast)
+    assert json.loads(standard)[0]["start_time"] == "08:00:00"
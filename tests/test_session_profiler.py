@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import select, text
+
+from schoolar_control_api.database import connection
+from schoolar_control_api.database.connection import get_session
+from schoolar_control_api.database.models import Student
+from schoolar_control_api.database.session_profiler import _PROFILE_KEY
+
+
+@pytest.fixture
+def profiler(configured):
+    profiler = connection.enable_profiling(max_statements=2, max_hold=60)
+    yield profiler
+    connection.disable_profiling()
+
+
+def test_sessions_are_measured_and_grouped_by_origin(profiler, configured, school):
+    loaded = []
+    for statements in (3, 1):
+        with get_session() as db:
+            loaded.extend(db.execute(select(Student)).scalars().all())
+            db.commit()
+            for _ in range(statements - 1):
+                db.execute(text("SELECT 1"))
+
+    summary = profiler.summary()
+    first, second = profiler._profiles
+    (origin,) = summary["origins"]
+
+    assert __file__ in origin
+    assert summary["sessions"] == summary["origins"][origin].sessions == 2
+    assert (first.statements, first.transactions) == (3, 2)
+    assert (second.statements, second.transactions) == (1, 1)
+    assert first.warnings == ["statements 3 > 2"] and second.warnings == []
+    assert first.identity_map == len(school.students)
+    assert 0 < first.db_time <= first.hold_time <= first.duration
+    assert summary["with_warnings"] == 1
+    with configured.connect() as conn:
+        assert _PROFILE_KEY not in conn.info
+    assert "2 sessions, 1 over thresholds" in profiler.report()
+
+
+def test_sessions_left_open_are_reported(profiler, configured):
+    with get_session() as db:
+        db.execute(text("SELECT 1"))
+        (leak,) = profiler.open_sessions(older_than=0)
+        report = profiler.report()
+
+    assert __file__ in leak.origin
+    assert "open " in report and profiler.open_sessions(older_than=0) == []
+
+
+def test_disabled_profiler_does_not_track_sessions(configured):
+    profiler = connection.enable_profiling()
+    assert connection.disable_profiling() is profiler
+
+    with get_session() as db:
+        db.execute(text("SELECT 1"))
+
+    assert profiler.summary()["sessions"] == 0
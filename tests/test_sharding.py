@@ -0,0 +1,235 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from schoolar_control_api.database.models import (
+    AcademicPeriod,
+    Attendance,
+    Course,
+    CourseEnrollment,
+    Degree,
+    EvaluationComponent,
+    Grade,
+    Student,
+    Task,
+    TaskSubmission,
+    Teacher,
+    Unit,
+    User,
+)
+from schoolar_control_api.database.query_cache import QueryCache
+from schoolar_control_api.database.repository import CircuitOpenError
+from schoolar_control_api.database.resilience import CircuitBreaker
+from schoolar_control_api.database.sharding import (
+    ShardedRepository,
+    ShardMap,
+    shard_keys,
+)
+from tests.factories import make_engine
+
+
+@pytest.fixture
+def shards(tmp_path):
+    engines = {
+        name: make_engine(f"sqlite:///{tmp_path / name}.db")
+        for name in ("norte", "sur")
+    }
+    shards = ShardMap(
+        engines,
+        assignments={1: "norte", 2: "sur"},
+        breaker_factory=lambda: CircuitBreaker(failure_threshold=1, reset_timeout=60),
+    )
+    yield shards
+    shards.dispose()
+
+
+def replicate(shards, entity):
+    return ShardedRepository(type(entity), shards).add(entity)
+
+
+@pytest.fixture
+def world(shards):
+    """Catálogos replicados en ambos shards y dos estudiantes por grado."""
+    north = replicate(shards, Degree(name="Ingeniería", description="Campus norte"))
+    south = replicate(shards, Degree(name="Medicina", description="Campus sur"))
+    users = [
+        replicate(
+            shards,
+            User(
+                fullname=f"Usuario {i}",
+                username=f"user{i}",
+                email=f"user{i}@school.edu",
+                password="x" * 8,
+            ),
+        )
+        for i in range(5)
+    ]
+    teacher = replicate(shards, Teacher(user_id=users[0].id, specialization="Física"))
+    period = replicate(
+        shards,
+        AcademicPeriod(
+            name="2026A", start_date=date(2026, 1, 1), end_date=date(2026, 6, 1)
+        ),
+    )
+    course = replicate(
+        shards,
+        Course(
+            name="Física", code="FIS-101", teacher_id=teacher.id, period_id=period.id
+        ),
+    )
+    unit = replicate(shards, Unit(course_id=course.id, name="Unidad 1", order_index=1))
+    component = replicate(
+        shards, EvaluationComponent(course_id=course.id, name="Tareas", weight=50)
+    )
+    task = replicate(
+        shards,
+        Task(
+            course_id=course.id,
+            unit_id=unit.id,
+            component_id=component.id,
+            name="Tarea 1",
+            due_date=datetime(2026, 3, 1),
+        ),
+    )
+    students = ShardedRepository(Student, shards)
+    added = [
+        students.add(
+            Student(
+                user_id=user.id,
+                degree_id=degree.id,
+                key_registration=f"K{user.id:05d}",
+            )
+        )
+        for user, degree in zip(users[1:], (north, north, south, south))
+    ]
+    return SimpleNamespace(
+        degrees=(north, south),
+        teacher=teacher,
+        course=course,
+        task=task,
+        students=added,
+    )
+
+
+def rows(shards, shard_id, model):
+    with Session(shards.engine(shard_id)) as db:
+        return db.execute(select(model)).scalars().all()
+
+
+def test_sharded_rows_live_only_in_their_degree_shard(shards, world):
+    north, south = world.degrees
+
+    assert {s.degree_id for s in rows(shards, "norte", Student)} == {north.id}
+    assert {s.degree_id for s in rows(shards, "sur", Student)} == {south.id}
+    for shard_id in shards.shard_ids:
+        assert [d.id for d in rows(shards, shard_id, Degree)] == [north.id, south.id]
+
+
+def test_ids_are_interleaved_and_unique_across_shards(shards, world):
+    ids = {
+        shard_id: [s.id for s in rows(shards, shard_id, Student)]
+        for shard_id in shards.shard_ids
+    }
+
+    assert all(i % 2 == 1 for i in ids["norte"])
+    assert all(i % 2 == 0 for i in ids["sur"])
+    assert len(set(ids["norte"]) | set(ids["sur"])) == 4
+
+
+def test_reads_are_routed_or_fanned_out_and_merged(shards, world):
+    north, south = world.degrees
+    repository = ShardedRepository(Student, shards)
+
+    merged = repository.get_all(order_by=lambda s: s.id)
+    assert [s.id for s in merged] == sorted(s.id for s in world.students)
+
+    # Con el shard ``sur`` caído, sólo fallan las consultas que lo necesitan.
+    shards.breaker("sur").record_failure()
+    assert len(repository.get_all(Student.degree_id == north.id)) == 2
+    assert len(repository.get_all(degree_id=north.id)) == 2
+    with pytest.raises(CircuitOpenError):
+        repository.get_all()
+    with pytest.raises(CircuitOpenError):
+        repository.get_all(Student.degree_id.in_([north.id, south.id]))
+
+
+def test_dependent_rows_are_routed_by_student_and_submission(shards, world):
+    south_student = world.students[2]
+    shards.breaker("norte").record_failure()
+
+    ShardedRepository(CourseEnrollment, shards).add(
+        CourseEnrollment(student_id=south_student.id, course_id=world.course.id)
+    )
+    submission = ShardedRepository(TaskSubmission, shards).add(
+        TaskSubmission(task_id=world.task.id, student_id=south_student.id)
+    )
+    grade = ShardedRepository(Grade, shards).add(
+        Grade(submission_id=submission.id, grade=90, graded_by=world.teacher.user_id)
+    )
+
+    assert [g.id for g in rows(shards, "sur", Grade)] == [grade.id]
+    assert rows(shards, "sur", CourseEnrollment)
+    assert ShardedRepository(Grade, shards).get(Grade.submission_id == submission.id)
+    assert ShardedRepository(TaskSubmission, shards).get_all(
+        TaskSubmission.student_id == south_student.id
+    )
+
+
+def test_shard_keys_reads_equality_and_in_conditions():
+    assert shard_keys([Student.degree_id == 3, Student.id > 1]) == {3}
+    assert shard_keys([Student.degree_id.in_([1, 2])]) == {1, 2}
+    assert shard_keys([TaskSubmission.student_id == 7], "student_id") == {7}
+    assert shard_keys([Student.id == 3]) is None
+
+
+def test_each_shard_has_its_own_cache_namespace(shards, world):
+    cache = QueryCache()
+    repository = ShardedRepository(Student, shards, cache=cache)
+
+    first = repository.get_all()
+    second = repository.get_all()
+    assert sorted(s.id for s in first) == sorted(s.id for s in world.students)
+    assert sorted(s.id for s in second) == sorted(s.id for s in first)
+    assert cache.hits == 2
+
+    user = replicate(
+        shards,
+        User(
+            fullname="Nuevo", username="nuevo", email="n@school.edu", password="x" * 8
+        ),
+    )
+    repository.add(
+        Student(
+            user_id=user.id, degree_id=world.degrees[0].id, key_registration="K00099"
+        )
+    )
+    assert len(repository.get_all()) == 5
+    assert cache.hits == 3  # el shard ``sur`` no se invalidó
+    with pytest.raises(ValueError):
+        ShardedRepository(Student, shards, breaker=CircuitBreaker())
+
+
+def test_concurrent_adds_to_one_shard_get_distinct_ids(shards, world):
+    student = world.students[0]
+    repository = ShardedRepository(Attendance, shards)
+    start = datetime(2026, 2, 1)
+
+    def attend(day):
+        return repository.add(
+            Attendance(
+                course_id=world.course.id,
+                student_id=student.id,
+                date=start + timedelta(days=day),
+            )
+        ).id
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        ids = list(executor.map(attend, range(24)))
+
+    assert len(set(ids)) == 24
+    assert all(i % 2 == 1 for i in ids)
+    assert len(rows(shards, "norte", Attendance)) == 24
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from schoolar_control_api.database.models import SubmissionSignature, TaskSubmission
+from schoolar_control_api.services.similarity import SimilarityDetector
+
+ESSAY = (
+    "La fotosíntesis convierte la energía de la luz en energía química que las "
+    "plantas almacenan en forma de glucosa a partir de agua y dióxido de carbono"
+)
+OTHER = (
+    "Las placas tectónicas se desplazan sobre el manto y sus choques levantan "
+    "cordilleras, abren océanos y provocan sismos y erupciones volcánicas"
+)
+
+
+def submit(session, school, texts):
+    submissions = [
+        TaskSubmission(
+            task_id=school.tasks[0].id,
+            student_id=school.students[i].id,
+            submission_text=text,
+        )
+        for i, text in enumerate(texts)
+    ]
+    session.add_all(submissions)
+    session.commit()
+    return [s.id for s in submissions]
+
+
+def signature(session, submission_id):
+    session.expire_all()
+    return session.get(SubmissionSignature, submission_id)
+
+
+def test_near_duplicates_are_found_within_a_task(session, school):
+    first, second, third = submit(
+        session, school, [ESSAY, ESSAY.replace("glucosa", "azúcar"), OTHER]
+    )
+    detector = SimilarityDetector(session)
+
+    (match,) = detector.find_duplicates(school.tasks[0].id)
+
+    assert (match.submission_id, match.other_id) == (first, second)
+    assert match.similarity >= 0.5
+    assert [m.other_id for m in detector.check(second)] == [first]
+    assert detector.check(third) == []
+
+
+def test_only_edited_text_is_signed_again(session, school):
+    task_id = school.tasks[0].id
+    first, second = submit(session, school, [ESSAY, OTHER])
+    detector = SimilarityDetector(session)
+    assert detector.index_task(task_id) == 2
+    computed_at = signature(session, first).computed_at
+
+    session.execute(
+        update(TaskSubmission)
+        .where(TaskSubmission.id == first)
+        .values(status="graded", updated_at=datetime.utcnow() + timedelta(hours=1))
+    )
+    session.commit()
+
+    assert detector.index_task(task_id) == 1
+    assert signature(session, first).computed_at == computed_at
+    assert detector.index_task(task_id) == 0
+
+
+def test_edits_are_detected_regardless_of_the_clock(session, school):
+    task_id = school.tasks[0].id
+    first, second = submit(session, school, [ESSAY, OTHER])
+    detector = SimilarityDetector(session)
+    detector.index_task(task_id)
+    assert detector.find_duplicates(task_id) == []
+
+    # El servidor que editó la entrega tiene el reloj atrasado: su
+    # ``updated_at`` queda antes de la hora en que se calculó la firma.
+    computed_at = signature(session, second).computed_at
+    session.execute(
+        update(TaskSubmission)
+        .where(TaskSubmission.id == second)
+        .values(submission_text=ESSAY, updated_at=computed_at - timedelta(hours=1))
+    )
+    session.commit()
+
+    assert detector.index_task(task_id) == 1
+    assert [(m.submission_id, m.other_id) for m in detector.check(second)] == [
+        (second, first)
+    ]
+    assert signature(session, second).text_hash == signature(session, first).text_hash